@@ -10,6 +10,7 @@ from fastapi_users.authentication import (
 from fastapi_users_db_beanie import BeanieUserDatabase
 from httpx_oauth.clients.google import GoogleOAuth2
 from models.user import User, UserCreate, UserUpdate
+from services.platform_counters import platform_counters
 
 
 class UserManager(BaseUserManager[User, str]):
@@ -23,6 +24,7 @@ class UserManager(BaseUserManager[User, str]):
 
     async def on_after_register(self, user: User, request: Optional[Request] = None):
         print(f"User {user.email} has registered.")
+        await platform_counters.increment(totalUsers=1)
         # Update user profile based on creation data
         if hasattr(request, 'json_body'):
             data = request.json_body
@@ -44,6 +46,9 @@ class UserManager(BaseUserManager[User, str]):
         user.updated_at = datetime.utcnow()
         await user.save()
 
+    async def on_after_delete(self, user: User, request: Optional[Request] = None):
+        await platform_counters.increment(totalUsers=-1)
+
     async def on_after_request_verify(
         self, user: User, token: str, request: Optional[Request] = None
     ):
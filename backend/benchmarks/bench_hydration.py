@@ -0,0 +1,116 @@
+"""
+Benchmark: Beanie Document hydration vs lean reads, per document
+
+For realistic job_requests, reviews and users documents, times what a read
+path pays per document to get from the decoded BSON dict to something it can
+use:
+
+- beanie: parse into the Document class, as Document.find(...).to_list() does
+- lean dict: the stored dict with _id mapped to id, as lean.find returns it
+- lean construct: lean.construct into the Document class, no validation
+- lean validate: lean.construct(..., validate=True), the opt-in path
+
+Beanie refuses to build Documents before init_beanie, so this connects to
+MONGO_URL from .env once to initialise the models. No documents are read or
+written.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_hydration [documents]
+"""
+
+import asyncio
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+import bson
+from beanie.odm.utils.parsing import parse_obj
+
+from benchmarks.bench_projection import make_job
+from models.job_request import JobRequest
+from models.review import Review
+from models.user import User
+from services import lean
+from services.database import db_service
+
+
+def make_review(i: int) -> dict:
+    """Build a reviews document shaped like production data"""
+    return {
+        "_id": str(uuid.uuid4()),
+        "job_request_id": str(uuid.uuid4()),
+        "professional_id": str(uuid.uuid4()),
+        "customer_id": str(uuid.uuid4()),
+        "rating": 1 + i % 5,
+        "title": f"Great work on the kitchen {i}",
+        "content": "Arrived on time, fixed the leak and cleaned up afterwards. " * 3,
+        "project_category": "plumbing",
+        "project_postcode": str(101 + i % 50),
+        "images": [f"/uploads/reviews/{uuid.uuid4()}.jpg" for _ in range(2)],
+        "status": "approved",
+        "is_verified": True,
+        "created_at": datetime.utcnow() - timedelta(days=i),
+        "updated_at": datetime.utcnow(),
+        "moderated_at": datetime.utcnow(),
+        "moderated_by": str(uuid.uuid4()),
+        "revision_id": None
+    }
+
+
+def make_user(i: int) -> dict:
+    """Build a users document shaped like production data"""
+    return {
+        "_id": str(uuid.uuid4()),
+        "email": f"pro{i}@example.is",
+        "hashed_password": "$2b$12$" + "x" * 53,
+        "role": "professional",
+        "profile": {
+            "first_name": "Jón",
+            "last_name": f"Guðmundsson {i}",
+            "phone": "+354 555 1234",
+            "location": "Reykjavík",
+            "avatar": None,
+            "company_name": f"Pípulagnir {i} ehf.",
+            "company_id": "5501692829",
+            "trade_certifications": ["pipulagnir"],
+            "service_areas": [str(101 + n) for n in range(12)]
+        },
+        "language": "is",
+        "is_active": True,
+        "is_superuser": False,
+        "is_verified": True,
+        "oauth_accounts": [],
+        "created_at": datetime.utcnow() - timedelta(days=i),
+        "updated_at": datetime.utcnow(),
+        "revision_id": None
+    }
+
+
+def time_per_document(fn, documents, runs: int) -> float:
+    return timeit.timeit(lambda: [fn(document) for document in documents], number=runs) / runs / len(documents)
+
+
+def main(count: int = 100) -> None:
+    asyncio.run(db_service.connect_to_database(reconcile_indexes=False))
+    runs = 50
+    cases = [(JobRequest, make_job), (Review, make_review), (User, make_user)]
+
+    print(f"Per-document hydrate cost over {count} documents")
+    print(f"  {'model':<12} {'beanie':>10} {'lean dict':>10} {'construct':>10} {'validate':>10}")
+    for model, make in cases:
+        # Round-trip through BSON so values have the types Motor hands back
+        raw = [bson.decode(bson.encode(make(i))) for i in range(count)]
+        api = [db_service._to_api(dict(document)) for document in raw]
+        timings = [
+            time_per_document(lambda document: parse_obj(model, document), raw, runs),
+            time_per_document(lambda document: db_service._to_api(dict(document)), raw, runs),
+            time_per_document(lambda document: lean.construct(model, document), api, runs),
+            time_per_document(lambda document: lean.construct(model, document, validate=True), api, runs),
+        ]
+        print(f"  {model.__name__:<12}" + "".join(f" {seconds * 1e6:>7.1f} us" for seconds in timings))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,74 @@
+"""
+Benchmark: ranked feed matching against the in-memory job feed index
+
+Fills a JobFeedIndex with open jobs spread over Icelandic postcodes and
+service categories, then times what the feed endpoint does before hydration:
+
+- match: merge a professional's service-area postcode lists and take a page
+  of ranked ids, with and without a category filter, and deeper in the feed
+  by offset and by cursor
+- upsert: re-file one job after a write (quote admitted, status changed)
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_job_feed [open_jobs]
+"""
+
+import random
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+from services.job_feed import JobFeedIndex
+
+CATEGORIES = ["plumbing", "electrical", "carpentry", "painting", "roofing",
+              "automotive", "cleaning", "landscaping", "masonry", "hvac"]
+POSTCODES = [str(code) for code in range(101, 300)]
+PRIORITIES = ["low", "medium", "medium", "high", "urgent"]
+
+
+def make_feed_job(rng: random.Random, now: datetime) -> dict:
+    """Build the projected fields the index files a job by"""
+    return {
+        "id": str(uuid.uuid4()),
+        "category": rng.choice(CATEGORIES),
+        "postcode": rng.choice(POSTCODES),
+        "status": rng.choice(["open", "quoted"]),
+        "priority": rng.choice(PRIORITIES),
+        "posted_at": now - timedelta(minutes=rng.randrange(60 * 24 * 60)),
+        "budget_max": rng.choice([None, 20000.0, 150000.0, 2000000.0]),
+        "max_quotes": 10,
+        "quotes_count": rng.randrange(10),
+    }
+
+
+def main(open_jobs: int = 50000) -> None:
+    rng = random.Random(21)
+    now = datetime.utcnow()
+    jobs = [make_feed_job(rng, now) for _ in range(open_jobs)]
+    index = JobFeedIndex()
+    for job in jobs:
+        index.upsert(job)
+
+    service_areas = rng.sample(POSTCODES, 12)
+    # Resume point of page 10, as a client scrolling by cursor would send it
+    after = index.match(service_areas, offset=160, limit=20)[1]
+    runs = 2000
+    cases = [
+        ("page 1", lambda: index.match(service_areas, limit=20)),
+        ("page 1, category", lambda: index.match(service_areas, "plumbing", limit=20)),
+        ("page 10", lambda: index.match(service_areas, offset=180, limit=20)),
+        ("page 10, cursor", lambda: index.match(service_areas, limit=20, after=after)),
+        ("all areas, page 1", lambda: index.match(None, limit=20)),
+        ("upsert", lambda: index.upsert(rng.choice(jobs))),
+    ]
+
+    print(f"{len(index):,} open jobs, {len(service_areas)} service areas")
+    for name, case in cases:
+        seconds = timeit.timeit(case, number=runs) / runs
+        print(f"  {name:<20} {seconds * 1e6:>8.1f} µs")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,103 @@
+"""
+Benchmark: job search latency over a large in-process index
+
+Indexes synthetic posted jobs written from an Icelandic trade vocabulary:
+root words (viðgerð, þak, baðherbergi, ...), their inflected forms and
+two-root compounds (þakviðgerð), drawn with Zipf weights so the head words
+appear in a large share of jobs as they do in production. Then runs a Zipf
+mix of one to three word queries, folded and unfolded spellings alike, and
+reports search latency percentiles for a 20-hit first page, over all jobs
+and restricted to a professional's service areas. Head queries (only the
+ten most common roots, each in a quarter or more of all jobs) are reported
+separately as the worst case.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_job_search [jobs] [queries]
+"""
+
+import random
+import statistics
+import sys
+import time
+import uuid
+
+from services.job_search import JobSearchIndex, query_terms
+
+WORDS = """
+    viðgerð hús baðherbergi eldhús þak leki gólf flísar málun parket rafmagn lagnir ofn glugga
+    hurð pallur girðing steypa múrverk klæðning einangrun þakrenna sturta klósett vaskur
+    innrétting skápar stigi svalir bílskúr garður hellulögn lýsing tengill rofi töflu hitalögn
+    ofnalögn vatnslögn frárennsli skólp drenlögn sólpallur timbur gifs spartl sparsl lakk bón
+    þrif flutningur bíll dekk bremsur olíuskipti smurning rúða spegill hljóðkútur púst
+""".split()
+FILLER = "og í á að við með til fyrir er sem það þetta nýtt gamalt stórt lítið þarf vantar".split()
+SUFFIXES = ["a", "i", "ar", "um", "ir", "ina", "inu"]
+CATEGORIES = ["plumbing", "electrical", "carpentry", "painting", "roofing", "automotive", "cleaning"]
+POSTCODES = [str(code) for code in range(101, 300)]
+
+
+# Roots, then inflected forms, then compounds, with Zipf weights in that order
+RANKED = (
+    WORDS
+    + [root + suffix for suffix in SUFFIXES for root in WORDS]
+    + [first + second for first in WORDS[:40] for second in WORDS[:40] if first != second]
+)
+WEIGHTS = [1 / (rank + 1) for rank in range(len(RANKED))]
+
+
+def make_search_job(rng: random.Random) -> dict:
+    """Build the projected fields the search index reads"""
+    title = " ".join(rng.choices(RANKED, weights=WEIGHTS, k=3))
+    description = " ".join(rng.choices(RANKED, weights=WEIGHTS, k=20) + rng.sample(FILLER, 8))
+    return {
+        "id": str(uuid.uuid4()),
+        "title": title.capitalize(),
+        "description": description,
+        "status": rng.choice(["open", "quoted", "accepted", "completed"]),
+        "category": rng.choice(CATEGORIES),
+        "postcode": rng.choice(POSTCODES),
+    }
+
+
+def percentile(samples, fraction: float) -> float:
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main(jobs: int = 1_000_000, queries: int = 300) -> None:
+    rng = random.Random(23)
+    index = JobSearchIndex()
+    started = time.perf_counter()
+    for _ in range(jobs):
+        index.upsert(make_search_job(rng))
+    build_seconds = time.perf_counter() - started
+    print(f"{len(index):,} jobs, {index.terms:,} terms, built in {build_seconds:.1f} s")
+
+    folded = ["thak", "vidgerd", "badherbergi", "eldhus", "flisar", "malun"]
+    mixes = [
+        ("zipf queries", [
+            " ".join(rng.choices(RANKED, weights=WEIGHTS, k=rng.randint(1, 3))) for _ in range(queries)
+        ]),
+        ("head queries", [
+            " ".join(rng.sample(WORDS[:10] + folded, rng.randint(1, 3))) for _ in range(queries)
+        ]),
+    ]
+    service_areas = rng.sample(POSTCODES, 12)
+    cases = [
+        ("all jobs", {}),
+        ("service areas", {"postcodes": service_areas, "statuses": {"open", "quoted"}}),
+    ]
+    for mix_name, mix in mixes:
+        for name, filters in cases:
+            samples = []
+            for query in mix:
+                terms = query_terms(query)
+                started = time.perf_counter()
+                index.search(terms, limit=20, **filters)
+                samples.append((time.perf_counter() - started) * 1000)
+            print(f"  {mix_name:<13} {name:<14} p50 {statistics.median(samples):6.1f} ms   "
+                  f"p99 {percentile(samples, 0.99):6.1f} ms   max {max(samples):6.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,92 @@
+"""
+Benchmark: full documents vs response-model projections on the job listing
+
+Builds a page of realistic job_requests documents (photos, documents, vehicle
+metadata), applies the JobRequestResponse projection the listing route now
+sends to Mongo, and compares BSON wire size and decode time.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_projection [page_size]
+"""
+
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+import bson
+
+from models.job_request import JobRequestResponse
+from services.projection import projection_for
+
+
+def make_job(i: int) -> dict:
+    """Build a job_requests document shaped like production data"""
+    job_id = str(uuid.uuid4())
+    return {
+        "_id": job_id,
+        "customer_id": str(uuid.uuid4()),
+        "guest_id": None,
+        "category": "automotive" if i % 5 == 0 else "plumbing",
+        "subcategory": None,
+        "title": f"Replace leaking kitchen pipes in apartment {i}",
+        "description": "Water is leaking under the kitchen sink and the cabinet floor is damaged. " * 4,
+        "postcode": str(101 + i % 50),
+        "address": f"Laugavegur {i}",
+        "license_plate": "ABC123" if i % 5 == 0 else None,
+        "plate_country": "IS" if i % 5 == 0 else None,
+        "vehicle_make": "Toyota" if i % 5 == 0 else None,
+        "vehicle_model": "Corolla" if i % 5 == 0 else None,
+        "vehicle_year": 2019 if i % 5 == 0 else None,
+        "vehicle_color": "Hvítur" if i % 5 == 0 else None,
+        "budget_min": 50000.0,
+        "budget_max": 150000.0,
+        "budget_currency": "ISK",
+        "priority": "medium",
+        "photos": [f"/uploads/jobs/{job_id}/{uuid.uuid4()}.jpg" for _ in range(4)],
+        "documents": [f"/uploads/jobs/{job_id}/{uuid.uuid4()}.pdf" for _ in range(3)],
+        "status": "open",
+        "posted_at": datetime.utcnow() - timedelta(hours=i),
+        "deadline": None,
+        "quote_deadline": None,
+        "max_quotes": 10,
+        "quotes_count": i % 10,
+        "accepted_quote_id": None,
+        "assigned_professional_id": None,
+        "completed_at": None,
+        "cancelled_at": None,
+        "cancellation_reason": None,
+        "updated_at": datetime.utcnow(),
+        "is_featured": False,
+        "views_count": i * 3,
+    }
+
+
+def project(document: dict, projection: dict) -> dict:
+    """Apply an inclusion projection the way mongod does for top-level fields"""
+    return {k: v for k, v in document.items() if k == "_id" or k in projection}
+
+
+def main(page_size: int = 100) -> None:
+    projection = projection_for(JobRequestResponse)
+    full = [bson.encode(make_job(i)) for i in range(page_size)]
+    projected = [bson.encode(project(bson.decode(raw), projection)) for raw in full]
+
+    full_bytes = sum(len(raw) for raw in full)
+    projected_bytes = sum(len(raw) for raw in projected)
+
+    runs = 200
+    full_time = timeit.timeit(lambda: [bson.decode(raw) for raw in full], number=runs) / runs
+    projected_time = timeit.timeit(lambda: [bson.decode(raw) for raw in projected], number=runs) / runs
+
+    print(f"Job listing page of {page_size} documents")
+    print(f"  projected fields: {len(projection)}")
+    print(f"  wire size   full: {full_bytes:>9,} B   projected: {projected_bytes:>9,} B   "
+          f"saved: {100 * (1 - projected_bytes / full_bytes):.1f}%")
+    print(f"  decode time full: {full_time * 1e3:>9.3f} ms  projected: {projected_time * 1e3:>9.3f} ms  "
+          f"saved: {100 * (1 - projected_time / full_time):.1f}%")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,68 @@
+"""
+Benchmark: FastAPI's default response path vs the pre-built list serializer
+
+Takes a page of projected job_requests documents, as the listing route gets
+them from get_page, and times turning them into response bytes:
+
+- before: build JobRequestResponse per item, then FastAPI re-validates the
+  list against the response field, serializes it to JSON-able Python and
+  JSONResponse encodes it with the stdlib json module
+- after: ModelListSerializer validates the documents in one pass and dumps
+  JSON bytes straight from pydantic-core
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_serialization [page_size]
+"""
+
+import asyncio
+import sys
+import timeit
+from typing import List
+
+import bson
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from benchmarks.bench_projection import make_job, project
+from models.job_request import JobRequestResponse
+from services.database import db_service
+from services.projection import projection_for
+from services.serialization import ModelListSerializer
+
+
+def main(page_size: int = 100) -> None:
+    projection = projection_for(JobRequestResponse)
+    documents = [
+        db_service._to_api(bson.decode(bson.encode(project(make_job(i), projection))))
+        for i in range(page_size)
+    ]
+    field = create_response_field(name="Response_get_job_requests", type_=List[JobRequestResponse])
+    serializer = ModelListSerializer(JobRequestResponse)
+    loop = asyncio.new_event_loop()
+
+    def default_path(response_class):
+        items = [JobRequestResponse(**document) for document in documents]
+        content = loop.run_until_complete(serialize_response(field=field, response_content=items))
+        return response_class(content).body
+
+    def serializer_path():
+        return serializer.response(serializer.validate(documents)).body
+
+    assert len(serializer_path()) > 0
+    runs = 200
+    results = [
+        ("default (JSONResponse)", timeit.timeit(lambda: default_path(JSONResponse), number=runs) / runs),
+        ("default (ORJSONResponse)", timeit.timeit(lambda: default_path(ORJSONResponse), number=runs) / runs),
+        ("ModelListSerializer", timeit.timeit(serializer_path, number=runs) / runs),
+    ]
+    baseline = results[0][1]
+
+    print(f"Job listing page of {page_size} items, {len(serializer_path()):,} B of JSON")
+    for name, seconds in results:
+        print(f"  {name:<26} {seconds * 1e3:>8.3f} ms  {baseline / seconds:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
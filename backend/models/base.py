@@ -0,0 +1,11 @@
+from beanie import Document, after_event, Insert, Replace, Save, SaveChanges, Update, Delete
+
+from services.document_cache import document_cache
+
+class CachedDocument(Document):
+    """Base document whose writes invalidate DatabaseService's document cache"""
+
+    @after_event(Insert, Replace, Save, SaveChanges, Update, Delete)
+    def invalidate_document_cache(self):
+        """Drop this document from the read cache after any Beanie write"""
+        document_cache.invalidate(self.get_collection_name(), self.id)
@@ -1,6 +1,7 @@
-from beanie import Document
+from models.base import CachedDocument
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from pydantic import BaseModel, Field, field_validator, ValidationInfo
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 import uuid
@@ -21,7 +22,7 @@ class JobPriority(str, Enum):
     HIGH = "high"
     URGENT = "urgent"
 
-class JobRequest(Document):
+class JobRequest(CachedDocument):
     """Job request document for customers posting construction jobs"""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     customer_id: Optional[str] = None  # User ID of the customer who posted the job (null for guests)
@@ -81,6 +82,16 @@ class JobRequest(Document):
     
     class Settings:
         name = "job_requests"
+        indexes = [
+            IndexModel([("id", ASCENDING)]),
+            IndexModel([("status", ASCENDING), ("category", ASCENDING), ("postcode", ASCENDING)]),
+            IndexModel([("posted_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("postcode", ASCENDING), ("posted_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("customer_id", ASCENDING), ("posted_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("assigned_professional_id", ASCENDING)]),
+            # Job feed sync reads jobs written since its last pass
+            IndexModel([("updated_at", ASCENDING)]),
+        ]
 
 class JobRequestCreate(BaseModel):
     """Schema for creating a new job request"""
@@ -188,4 +199,23 @@ class JobRequestResponse(BaseModel):
     is_featured: bool
     views_count: int
     license_plate: Optional[str] = None  # For automotive
-    plate_country: Optional[str] = None  # For automotive
\ No newline at end of file
+    plate_country: Optional[str] = None  # For automotive
+
+class JobSearchResult(JobRequestResponse):
+    """Schema for job search hits"""
+    score: float  # BM25 relevance, higher first
+    highlights: Dict[str, str] = {}  # Matched title/description text with terms in <mark>
+
+class FacetCount(BaseModel):
+    """Number of jobs with one value of a facet"""
+    value: str
+    count: int
+    label: Optional[str] = None  # Display name, for postcode regions
+
+class JobFacetsResponse(BaseModel):
+    """Schema for job board filter counts"""
+    total: int
+    category: List[FacetCount]
+    status: List[FacetCount]
+    priority: List[FacetCount]
+    region: List[FacetCount]  # By first postcode digit
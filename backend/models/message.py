@@ -1,4 +1,5 @@
-from beanie import Document
+from models.base import CachedDocument
+from pymongo import IndexModel, ASCENDING
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
@@ -16,7 +17,7 @@ class MessageStatus(str, Enum):
     DELIVERED = "delivered"
     READ = "read"
 
-class JobMessage(Document):
+class JobMessage(CachedDocument):
     """Message document for job-specific communications"""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     job_request_id: str  # Reference to JobRequest
@@ -42,6 +43,11 @@ class JobMessage(Document):
     
     class Settings:
         name = "job_messages"
+        indexes = [
+            IndexModel([("id", ASCENDING)]),
+            IndexModel([("job_request_id", ASCENDING), ("sent_at", ASCENDING), ("_id", ASCENDING)]),
+            IndexModel([("recipient_id", ASCENDING), ("status", ASCENDING)]),
+        ]
 
 class MessageCreate(BaseModel):
     """Schema for creating a new message"""
@@ -1,4 +1,5 @@
-from beanie import Document
+from models.base import CachedDocument
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
 from datetime import datetime
@@ -23,7 +24,7 @@ class NotificationChannel(str, Enum):
     EMAIL = "email"
     SMS = "sms"
 
-class Notification(Document):
+class Notification(CachedDocument):
     """Notification document for user notifications"""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str  # Recipient user ID
@@ -54,6 +55,11 @@ class Notification(Document):
     
     class Settings:
         name = "notifications"
+        indexes = [
+            IndexModel([("id", ASCENDING)]),
+            IndexModel([("user_id", ASCENDING), ("read_at", ASCENDING), ("sent_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("user_id", ASCENDING), ("sent_at", DESCENDING), ("_id", DESCENDING)]),
+        ]
 
 class NotificationCreate(BaseModel):
     """Schema for creating a notification"""
@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, EmailStr, Field
 from beanie import Document
+from pymongo import IndexModel, ASCENDING
 import uuid
 
 class ProLeadCreate(BaseModel):
@@ -15,4 +16,7 @@ class ProLead(Document):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     class Settings:
-        collection = "pro_leads"
\ No newline at end of file
+        collection = "pro_leads"
+        indexes = [
+            IndexModel([("email", ASCENDING)]),
+        ]
\ No newline at end of file
@@ -1,4 +1,5 @@
-from beanie import Document
+from models.base import CachedDocument
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
@@ -12,7 +13,7 @@ class QuoteStatus(str, Enum):
     WITHDRAWN = "withdrawn"
     EXPIRED = "expired"
 
-class Quote(Document):
+class Quote(CachedDocument):
     """Quote document for professionals bidding on jobs"""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     job_request_id: str  # Reference to JobRequest
@@ -48,6 +49,20 @@ class Quote(Document):
     
     class Settings:
         name = "quotes"
+        indexes = [
+            IndexModel([("id", ASCENDING)]),
+            IndexModel([("job_request_id", ASCENDING), ("status", ASCENDING)]),
+            # One live (pending or accepted) bid per professional and job; withdrawn or declined bids may be replaced.
+            # $in in a partial filter needs MongoDB 6.0+; run services.bid_dedupe first on data with duplicates
+            IndexModel(
+                [("job_request_id", ASCENDING), ("professional_id", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"status": {"$in": ["pending", "accepted"]}}
+            ),
+            IndexModel([("submitted_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("professional_id", ASCENDING), ("submitted_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("customer_id", ASCENDING), ("submitted_at", DESCENDING), ("_id", DESCENDING)]),
+        ]
 
 class QuoteCreate(BaseModel):
     """Schema for creating a new quote"""
@@ -1,4 +1,5 @@
-from beanie import Document
+from models.base import CachedDocument
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
@@ -10,7 +11,7 @@ class ReviewStatus(str, Enum):
     APPROVED = "approved" 
     REJECTED = "rejected"
 
-class Review(Document):
+class Review(CachedDocument):
     """Review document for completed projects"""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     
@@ -41,6 +42,11 @@ class Review(Document):
     
     class Settings:
         name = "reviews"
+        indexes = [
+            IndexModel([("status", ASCENDING), ("created_at", DESCENDING)]),
+            IndexModel([("professional_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)]),
+            IndexModel([("job_request_id", ASCENDING), ("professional_id", ASCENDING)]),
+        ]
 
 class ReviewCreate(BaseModel):
     """Schema for creating a new review"""
@@ -1,4 +1,5 @@
-from beanie import Document
+from models.base import CachedDocument
+from pymongo import IndexModel, ASCENDING
 from pydantic import BaseModel, Field, EmailStr
 from typing import Optional
 from datetime import datetime
@@ -26,7 +27,7 @@ class UserProfile(BaseModel):
     trade_certifications: Optional[list] = []  # For professionals
     service_areas: Optional[list] = []  # Postcodes they serve
 
-class User(Document):
+class User(CachedDocument):
     """User document for MongoDB with fastapi-users integration"""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     email: EmailStr = Field(unique=True, index=True)
@@ -44,6 +45,22 @@ class User(Document):
     class Settings:
         name = "users"
         email_collation = None
+        indexes = [
+            IndexModel([("id", ASCENDING)]),
+            IndexModel([("email", ASCENDING)], unique=True),
+            # New-job fan-out looks up professionals by the postcodes they serve
+            IndexModel([("profile.service_areas", ASCENDING), ("role", ASCENDING)]),
+        ]
+
+class UserSummary(BaseModel):
+    """Public display fields of a user, as shown next to quotes, messages and reviews"""
+    id: str
+    role: UserRole
+    first_name: str = ""
+    last_name: str = ""
+    company_name: Optional[str] = None
+    avatar: Optional[str] = None
+    location: Optional[str] = None
 
 # FastAPI Users schemas
 class UserRead(schemas.BaseUser[str]):
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, UploadFile, File
+from pymongo import ASCENDING, DESCENDING
 from typing import List, Optional
 from datetime import datetime
 from models.job_request import (
@@ -6,17 +7,34 @@ from models.job_request import (
     JobRequestCreate, 
     JobRequestUpdate, 
     JobRequestResponse,
+    JobSearchResult,
+    JobFacetsResponse,
     JobStatus,
     JobPriority
 )
 from models.user import User
-from models.notification import NotificationCreate, NotificationType, NotificationChannel
-from auth.config import current_active_user, get_current_customer
+from auth.config import current_active_user, get_current_customer, get_current_professional
 from services.database import db_service
+from services.pagination import InvalidCursor, encode_cursor, decode_cursor, set_next_cursor
+from services.view_counter import view_counter
+from services.etag import version_etag, is_not_modified, not_modified
+from services.serialization import ModelListSerializer, model_response
+from services.projection import SparseFields, sparse_fields, fields_projection, projection_for
+from services import lean
+from services.batch import BatchItem, parse_ids, batch_items
+from services.job_feed import job_feed, FEED_STATUSES, DEFAULT_MAX_QUOTES
+from services.job_fanout import job_fanout
+from services.job_search import job_search, query_terms, highlight
+from services.job_facets import job_facets
+from services.postcodes import NearPostcodes, near_postcodes
 import uuid
 
 router = APIRouter(prefix="/job-requests", tags=["job-requests"])
 
+JOB_LIST_SERIALIZER = ModelListSerializer(JobRequestResponse)
+JOB_BATCH_SERIALIZER = ModelListSerializer(BatchItem[JobRequestResponse])
+JOB_SEARCH_SERIALIZER = ModelListSerializer(JobSearchResult)
+
 @router.post("/", response_model=JobRequestResponse)
 async def create_job_request(
     job_data: JobRequestCreate,
@@ -31,11 +49,13 @@ async def create_job_request(
         )
         
         await job_request.save()
+        job_feed.touch()
         
-        # TODO: Notify relevant professionals in the area
-        # await notify_professionals_in_area(job_request)
+        # Notify relevant professionals in the area once the job is visible to them; drafts wait for submission
+        if job_request.status != JobStatus.DRAFT:
+            job_fanout.enqueue(job_request.__dict__)
         
-        return JobRequestResponse(**job_request.dict())
+        return lean.from_document(JobRequestResponse, job_request)
         
     except Exception as e:
         raise HTTPException(
@@ -43,75 +63,326 @@ async def create_job_request(
             detail=f"Failed to create job request: {str(e)}"
         )
 
+# Newest first; matches the posted_at/_id indexes on job_requests
+JOB_LIST_SORT = [("posted_at", DESCENDING), ("_id", DESCENDING)]
+
+def job_selections(category: Optional[str] = None, postcode: Optional[str] = None,
+                   status: Optional[JobStatus] = None, priority: Optional[JobPriority] = None) -> dict:
+    """Filter for the job board filters a user picked"""
+    selections = {"category": category, "postcode": postcode, "status": status, "priority": priority}
+    return {field: value for field, value in selections.items() if value}
+
+def job_list_scope(current_user: Optional[User], customer_only: bool = False,
+                   nearby: NearPostcodes = None, postcode: Optional[str] = None) -> dict:
+    """Filter for the jobs a listing covers: what the user may see, within near= if given
+    
+    Its status and postcode conditions replace any the user picked.
+    """
+    scope = {}
+    
+    # If customer_only is requested, filter by current user
+    if customer_only and current_user:
+        if current_user.role not in ["customer", "admin"]:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only customers can view their own jobs"
+            )
+        scope["customer_id"] = current_user.id
+    
+    # For professionals, filter by their service areas if not admin and exclude draft jobs
+    elif current_user and current_user.role == "professional":
+        # Professionals should not see draft jobs
+        scope["status"] = {"$ne": "draft"}
+        # Get professional's service areas (postcodes)
+        service_areas = current_user.profile.service_areas or []
+        if service_areas:
+            scope["postcode"] = {"$in": service_areas}
+    
+    # If no specific user filters and not authenticated, show only open jobs (no drafts)
+    elif not current_user:
+        scope["status"] = {"$ne": "draft"}
+    
+    # near= picks the area instead of the professional's service areas; postcode= narrows it
+    if nearby is not None:
+        scope["postcode"] = {"$in": [code for code in nearby if not postcode or code == postcode]}
+    
+    return scope
+
 @router.get("/", response_model=List[JobRequestResponse])
 async def get_job_requests(
+    response: Response,
     category: Optional[str] = Query(None, description="Filter by service category"),
     postcode: Optional[str] = Query(None, description="Filter by postcode"),
     status: Optional[JobStatus] = Query(None, description="Filter by status"),
     priority: Optional[JobPriority] = Query(None, description="Filter by priority"),
     customer_only: bool = Query(False, description="Get only current user's jobs"),
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is given)"),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    fields: SparseFields = Depends(sparse_fields(JobRequestResponse)),
+    nearby: NearPostcodes = Depends(near_postcodes),
     current_user: Optional[User] = Depends(current_active_user)
 ):
-    """Get job requests with filtering and pagination"""
+    """Get job requests with filtering and cursor pagination"""
     try:
-        # Build query filter
-        query_filter = {}
-        
-        if category:
-            query_filter["category"] = category
-        if postcode:
-            query_filter["postcode"] = postcode
-        if status:
-            query_filter["status"] = status
-        if priority:
-            query_filter["priority"] = priority
-            
-        # If customer_only is requested, filter by current user
-        if customer_only and current_user:
-            if current_user.role not in ["customer", "admin"]:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Only customers can view their own jobs"
-                )
-            query_filter["customer_id"] = current_user.id
-        
-        # For professionals, filter by their service areas if not admin and exclude draft jobs
-        elif current_user and current_user.role == "professional":
-            # Professionals should not see draft jobs
-            query_filter["status"] = {"$ne": "draft"}
-            # Get professional's service areas (postcodes)
-            service_areas = current_user.profile.service_areas or []
-            if service_areas:
-                query_filter["postcode"] = {"$in": service_areas}
-        
-        # If no specific user filters and not authenticated, show only open jobs (no drafts)
-        elif not current_user:
-            query_filter["status"] = {"$ne": "draft"}
-        
-        # Calculate skip for pagination
-        skip = (page - 1) * limit
+        query_filter = job_selections(category, postcode, status, priority)
+        query_filter.update(job_list_scope(current_user, customer_only, nearby, postcode))
         
         # Execute query using db_service
-        job_requests = await db_service.get_documents(
-            "job_requests", 
-            filter_dict=query_filter,
-            limit=limit,
-            skip=skip
-        )
+        try:
+            job_requests, next_cursor = await db_service.get_page(
+                "job_requests",
+                filter_dict=query_filter,
+                sort=JOB_LIST_SORT,
+                limit=limit,
+                cursor=cursor,
+                page=page,
+                # customer_id is read below to skip the owner's own views
+                projection=fields_projection(JobRequestResponse, fields, "customer_id")
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        set_next_cursor(response, next_cursor)
         
-        # Increment views for each job (except for owner)
+        # Count views for each job (except for owner); flushed in bulk later
         if current_user:
             for job in job_requests:
                 if job.get("customer_id") != current_user.id:
-                    await db_service.update_document(
-                        "job_requests",
-                        job["id"],
-                        {"views_count": job.get("views_count", 0) + 1}
-                    )
+                    view_counter.record(job["id"])
         
-        return [JobRequestResponse(**job) for job in job_requests]
+        serializer = JOB_LIST_SERIALIZER.for_fields(fields)
+        return serializer.response(serializer.validate(job_requests), response)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch job requests: {str(e)}"
+        )
+
+# Feed cursors hold the last job's index key (-rank score, id)
+JOB_FEED_CURSOR_SORT = [("rank", ASCENDING), ("_id", ASCENDING)]
+
+@router.get("/feed", response_model=List[JobRequestResponse])
+async def get_job_feed(
+    response: Response,
+    category: Optional[str] = Query(None, description="Filter by service category"),
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is given)"),
+    limit: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    fields: SparseFields = Depends(sparse_fields(JobRequestResponse)),
+    nearby: NearPostcodes = Depends(near_postcodes),
+    current_user: User = Depends(get_current_professional)
+):
+    """Get the jobs still taking quotes in the professional's service areas, best match first
+    
+    Ranked by recency, priority, budget and quote slots left; see services/job_feed.py.
+    near= and radius_km= replace the service areas with every postcode in range.
+    X-Next-Cursor is set while more jobs follow, even when a page comes back
+    short because jobs closed since the index last synced.
+    """
+    try:
+        # Professionals without service areas see every area, as in the listing
+        postcodes = nearby if nearby is not None else current_user.profile.service_areas or None
+        
+        after = None
+        if cursor:
+            try:
+                rank, after_id = decode_cursor(cursor, JOB_FEED_CURSOR_SORT)
+                if not isinstance(rank, (int, float)) or not isinstance(after_id, str):
+                    raise InvalidCursor("Pagination cursor does not match this listing")
+            except InvalidCursor as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            after = (float(rank), after_id)
+        offset = 0 if after else (page - 1) * limit
+        
+        # status is read below to drop jobs that closed since the index last synced
+        projection = fields_projection(JobRequestResponse, fields, "status")
+        if job_feed.ready:
+            job_ids, next_key = job_feed.match(postcodes, category, offset=offset, limit=limit, after=after)
+            if next_key is not None:
+                set_next_cursor(response, encode_cursor(next_key))
+            found = await db_service.get_documents_by_ids("job_requests", job_ids, projection=projection)
+        elif after:
+            # Feed cursors are positions in the index order
+            raise HTTPException(status_code=503, detail="Job feed index is still loading")
+        else:
+            # Index still loading: the same jobs (taking quotes, with a free slot) in posting order
+            query_filter = {
+                "status": {"$in": list(FEED_STATUSES)},
+                "$expr": {"$lt": [
+                    {"$ifNull": ["$quotes_count", 0]},
+                    {"$ifNull": ["$max_quotes", DEFAULT_MAX_QUOTES]}
+                ]}
+            }
+            if postcodes:
+                query_filter["postcode"] = {"$in": postcodes}
+            if category:
+                query_filter["category"] = category
+            job_requests = await db_service.get_documents(
+                "job_requests", query_filter, limit=limit, skip=offset, sort=JOB_LIST_SORT, projection=projection
+            )
+            job_ids = [job["id"] for job in job_requests]
+            found = {job["id"]: job for job in job_requests}
+        
+        job_requests = []
+        for job_id in job_ids:
+            job = found.get(job_id)
+            if job is None or job.get("status") not in FEED_STATUSES:
+                job_feed.remove(job_id)
+                continue
+            # A professional never owns the job, so every feed item is a view
+            view_counter.record(job_id)
+            job_requests.append(job)
+        
+        serializer = JOB_LIST_SERIALIZER.for_fields(fields)
+        return serializer.response(serializer.validate(job_requests), response)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch job feed: {str(e)}"
+        )
+
+@router.get("/facets", response_model=JobFacetsResponse)
+async def get_job_facets(
+    category: Optional[str] = Query(None, description="Filter by service category"),
+    postcode: Optional[str] = Query(None, description="Filter by postcode"),
+    status: Optional[JobStatus] = Query(None, description="Filter by status"),
+    priority: Optional[JobPriority] = Query(None, description="Filter by priority"),
+    customer_only: bool = Query(False, description="Count only current user's jobs"),
+    nearby: NearPostcodes = Depends(near_postcodes),
+    current_user: Optional[User] = Depends(current_active_user)
+):
+    """Count the jobs the listing would show per category, status, priority and postcode region
+    
+    Takes the listing's filters; each facet's counts ignore its own filter.
+    Served from a short-lived cache; see services/job_facets.py.
+    """
+    try:
+        scope = job_list_scope(current_user, customer_only, nearby, postcode)
+        # Filters the scope replaces are ignored, as in the listing
+        selections = {
+            field: value for field, value in job_selections(category, postcode, status, priority).items()
+            if field not in scope
+        }
+        return await job_facets.counts(scope, selections)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to count job requests: {str(e)}"
+        )
+
+# Search cursors hold the last hit's (score, id)
+JOB_SEARCH_SORT = [("score", DESCENDING), ("_id", ASCENDING)]
+
+# Description highlights are cut to a snippet of about this many characters
+SEARCH_SNIPPET_LENGTH = 160
+
+@router.get("/search", response_model=List[JobSearchResult])
+async def search_job_requests(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Search text; Icelandic letters match their ASCII spellings"),
+    category: Optional[str] = Query(None, description="Filter by service category"),
+    postcode: Optional[str] = Query(None, description="Filter by postcode"),
+    status: Optional[JobStatus] = Query(None, description="Filter by status"),
+    limit: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    fields: SparseFields = Depends(sparse_fields(JobSearchResult)),
+    current_user: Optional[User] = Depends(current_active_user)
+):
+    """Search posted jobs by title and description, best match first
+    
+    Ranked by BM25 relevance; see services/job_search.py. Drafts are never
+    searchable, and professionals only find jobs in their service areas.
+    """
+    try:
+        terms = query_terms(q)
+        if not terms:
+            raise HTTPException(status_code=400, detail="Search text has no searchable words")
+        if not job_search.ready:
+            raise HTTPException(status_code=503, detail="Job search index is still loading")
+        
+        after = None
+        if cursor:
+            try:
+                after_score, after_id = decode_cursor(cursor, JOB_SEARCH_SORT)
+            except InvalidCursor as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            after = (after_score, after_id)
+        
+        postcodes = [postcode] if postcode else None
+        # Professionals only see jobs in their service areas, as in the listing
+        if current_user and current_user.role == "professional" and current_user.profile.service_areas:
+            service_areas = current_user.profile.service_areas
+            postcodes = [code for code in postcodes if code in service_areas] if postcodes else service_areas
+        
+        hits, has_more = job_search.search(
+            terms, limit=limit, after=after,
+            statuses=[status.value] if status else None, category=category, postcodes=postcodes
+        )
+        if has_more:
+            set_next_cursor(response, encode_cursor([hits[-1][1], hits[-1][0]]))
+        
+        # title and description are read below to highlight the matches
+        projection = fields_projection(JobRequestResponse, fields, "customer_id", "title", "description")
+        found = await db_service.get_documents_by_ids("job_requests", [job_id for job_id, _ in hits], projection=projection)
+        
+        matched = set(terms)
+        job_requests = []
+        for job_id, score in hits:
+            job = found.get(job_id)
+            if job is None:
+                # Deleted since the index last synced
+                job_search.remove(job_id)
+                continue
+            highlights = {
+                "title": highlight(job.get("title"), matched),
+                "description": highlight(job.get("description"), matched, SEARCH_SNIPPET_LENGTH)
+            }
+            job_requests.append({
+                **job, "score": score,
+                "highlights": {field: text for field, text in highlights.items() if text}
+            })
+            if current_user and job.get("customer_id") != current_user.id:
+                view_counter.record(job_id)
+        
+        serializer = JOB_SEARCH_SERIALIZER.for_fields(fields)
+        return serializer.response(serializer.validate(job_requests), response)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to search job requests: {str(e)}"
+        )
+
+@router.get("/batch", response_model=List[BatchItem[JobRequestResponse]])
+async def get_job_requests_batch(
+    ids: List[str] = Query(..., description="Job request IDs, comma separated or repeated"),
+    current_user: Optional[User] = Depends(current_active_user)
+):
+    """Get several job requests by ID in one query, in request order"""
+    try:
+        job_ids = parse_ids(ids)
+        job_requests = await db_service.get_documents_by_ids("job_requests", job_ids, projection=JobRequestResponse)
+        
+        def build(job_request: dict) -> dict:
+            # Count the view if viewer is not the owner, as the single-item route does
+            if current_user and job_request.get("customer_id") != current_user.id:
+                view_counter.record(job_request["id"])
+            pending_views = view_counter.pending_for(job_request["id"])
+            return {**job_request, "views_count": job_request.get("views_count", 0) + pending_views}
+        
+        items = batch_items(job_ids, job_requests, build, not_found="Job request not found")
+        return JOB_BATCH_SERIALIZER.response(JOB_BATCH_SERIALIZER.validate(items))
         
     except HTTPException:
         raise
@@ -124,27 +395,38 @@ async def get_job_requests(
 @router.get("/{job_id}", response_model=JobRequestResponse)
 async def get_job_request(
     job_id: str,
+    request: Request,
+    response: Response,
     current_user: Optional[User] = Depends(current_active_user)
 ):
-    """Get a specific job request by ID"""
+    """Get a specific job request by ID
+    
+    The ETag is derived from updated_at, which every content write bumps.
+    View counts are not part of it, so it is a weak validator.
+    """
     try:
-        job_request = await db_service.get_document("job_requests", job_id)
+        # updated_at is not a response field but versions the ETag
+        job_request = await db_service.get_document(
+            "job_requests", job_id, projection=projection_for(JobRequestResponse, "updated_at")
+        )
         if not job_request:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Job request not found"
             )
         
-        # Increment view count if viewer is not the owner
+        # Count the view if viewer is not the owner; flushed in bulk later
         if current_user and job_request.get("customer_id") != current_user.id:
-            await db_service.update_document(
-                "job_requests",
-                job_id,
-                {"views_count": job_request.get("views_count", 0) + 1}
-            )
-            job_request["views_count"] = job_request.get("views_count", 0) + 1
+            view_counter.record(job_request["id"])
+        
+        etag = version_etag(job_request["id"], job_request.get("updated_at"), weak=True)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        
+        job_request["views_count"] = job_request.get("views_count", 0) + view_counter.pending_for(job_request["id"])
         
-        return JobRequestResponse(**job_request)
+        return model_response(JobRequestResponse(**job_request), response)
         
     except HTTPException:
         raise
@@ -186,9 +468,10 @@ async def update_job_request(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to update job request"
             )
+        job_feed.touch()
         
         # Get updated job request
-        updated_job = await db_service.get_document("job_requests", job_id)
+        updated_job = await db_service.get_document("job_requests", job_id, projection=JobRequestResponse)
         return JobRequestResponse(**updated_job)
         
     except HTTPException:
@@ -235,6 +518,8 @@ async def delete_job_request(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to delete job request"
             )
+        job_feed.remove(job_id)
+        job_search.remove(job_id)
         
         return {"message": "Job request deleted successfully"}
         
@@ -336,6 +621,7 @@ async def update_job_status(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to update job status"
             )
+        job_feed.touch()
         
         # TODO: Send notifications to relevant parties
         
@@ -1,14 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, UploadFile, File
+from pymongo import ASCENDING
 from typing import List, Optional
 from datetime import datetime
 from models.message import JobMessage, MessageCreate, MessageResponse, MessageType, MessageStatus
 from models.user import User
 from auth.config import current_active_user
 from services.database import db_service
+from services.pagination import InvalidCursor, set_next_cursor
+from services.loaders import UserLoader, get_user_loader
+from services.serialization import ModelListSerializer
+from services import lean
+from services.concurrency import gather
 import uuid
 
 router = APIRouter(prefix="/messages", tags=["messages"])
 
+MESSAGE_LIST_SERIALIZER = ModelListSerializer(MessageResponse)
+
+# Job fields the conversation access check reads
+CONVERSATION_JOB_PROJECTION = {"customer_id": 1, "assigned_professional_id": 1}
+
+async def _has_quoted(job_request_id: str, user: User) -> bool:
+    """Whether a professional has quoted on a job, which opens its conversation to them"""
+    if user.role != "professional":
+        return False
+    quote = await db_service.find_one("quotes", {
+        "job_request_id": job_request_id,
+        "professional_id": user.id
+    }, projection={"_id": 1})
+    return quote is not None
+
+def _check_conversation_access(job_request: Optional[dict], user: User, has_quoted: bool):
+    """Raise unless the job exists and the user takes part in its conversation"""
+    if not job_request:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job request not found"
+        )
+    
+    is_customer = job_request["customer_id"] == user.id
+    # Professionals who have submitted quotes may participate too
+    is_professional = job_request.get("assigned_professional_id") == user.id or has_quoted
+    is_admin = user.role == "admin"
+    
+    if not (is_customer or is_professional or is_admin):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this job conversation"
+        )
+
 @router.post("/", response_model=MessageResponse)
 async def send_message(
     message_data: MessageCreate,
@@ -16,36 +56,17 @@ async def send_message(
 ):
     """Send a message in a job conversation"""
     try:
-        # Verify job request exists
-        job_request = await db_service.get_document("job_requests", message_data.job_request_id)
-        if not job_request:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Job request not found"
-            )
-        
-        # Verify sender has access to this job conversation
-        is_customer = job_request["customer_id"] == current_user.id
-        is_professional = job_request.get("assigned_professional_id") == current_user.id
-        
-        # Also allow professionals who have submitted quotes to participate
-        if not is_professional and current_user.role == "professional":
-            quotes = await db_service.get_documents("quotes", {
-                "job_request_id": message_data.job_request_id,
-                "professional_id": current_user.id
-            })
-            is_professional = bool(quotes)
+        # The job, the sender's quote and the recipient are independent lookups
+        job_request, has_quoted, recipient = await gather(
+            db_service.get_document("job_requests", message_data.job_request_id, projection=CONVERSATION_JOB_PROJECTION),
+            _has_quoted(message_data.job_request_id, current_user),
+            db_service.get_document("users", message_data.recipient_id, projection={"_id": 1})
+        )
         
-        is_admin = current_user.role == "admin"
+        # Verify job request exists and sender has access to this job conversation
+        _check_conversation_access(job_request, current_user, has_quoted)
         
-        if not (is_customer or is_professional or is_admin):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have access to this job conversation"
-            )
-        
-        # Verify recipient exists and has access to the job
-        recipient = await db_service.get_document("users", message_data.recipient_id)
+        # Verify recipient exists
         if not recipient:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -64,7 +85,7 @@ async def send_message(
         # TODO: Mark as delivered when recipient is online
         
         # Prepare response with sender information
-        message_response = MessageResponse(**message.dict())
+        message_response = lean.from_document(MessageResponse, message)
         message_response.sender_name = f"{current_user.profile.first_name} {current_user.profile.last_name}"
         message_response.sender_role = current_user.role
         
@@ -78,89 +99,71 @@ async def send_message(
             detail=f"Failed to send message: {str(e)}"
         )
 
+# Oldest first; matches the job_request_id/sent_at index on job_messages
+MESSAGE_HISTORY_SORT = [("sent_at", ASCENDING), ("_id", ASCENDING)]
+
 @router.get("/job/{job_request_id}", response_model=List[MessageResponse])
 async def get_job_messages(
     job_request_id: str,
-    page: int = Query(1, ge=1, description="Page number"),
+    response: Response,
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is given)"),
     limit: int = Query(50, ge=1, le=100, description="Messages per page"),
-    current_user: User = Depends(current_active_user)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    current_user: User = Depends(current_active_user),
+    users: UserLoader = Depends(get_user_loader)
 ):
     """Get messages for a specific job"""
     try:
-        # Verify job request exists and user has access
-        job_request = await db_service.get_document("job_requests", job_request_id)
-        if not job_request:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Job request not found"
+        # Verify job request exists and user has access before reading any messages
+        job_request, has_quoted = await gather(
+            db_service.get_document("job_requests", job_request_id, projection=CONVERSATION_JOB_PROJECTION),
+            _has_quoted(job_request_id, current_user)
+        )
+        _check_conversation_access(job_request, current_user, has_quoted)
+        
+        # Get messages with pagination, oldest first
+        try:
+            messages, next_cursor = await db_service.get_page(
+                "job_messages",
+                {"job_request_id": job_request_id},
+                sort=MESSAGE_HISTORY_SORT,
+                limit=limit,
+                cursor=cursor,
+                page=page,
+                projection=MessageResponse
             )
-        
-        # Check access permissions
-        is_customer = job_request["customer_id"] == current_user.id
-        is_professional = job_request.get("assigned_professional_id") == current_user.id
-        
-        # Allow professionals who have quotes to see messages
-        if not is_professional and current_user.role == "professional":
-            quotes = await db_service.get_documents("quotes", {
-                "job_request_id": job_request_id,
-                "professional_id": current_user.id
-            })
-            is_professional = bool(quotes)
-        
-        is_admin = current_user.role == "admin"
-        
-        if not (is_customer or is_professional or is_admin):
+        except InvalidCursor as e:
             raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have access to this job conversation"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
             )
+        set_next_cursor(response, next_cursor)
         
-        # Get messages with pagination
-        skip = (page - 1) * limit
-        messages = await db_service.get_documents(
-            "job_messages",
-            {"job_request_id": job_request_id},
-            limit=limit,
-            skip=skip
-        )
-        
-        # Sort by sent_at ascending (oldest first)
-        messages.sort(key=lambda x: x.get("sent_at"))
-        
-        # Mark messages as read by current user
-        unread_messages = [
-            msg for msg in messages 
+        # Mark messages as read by current user in one round trip
+        unread_ids = [
+            msg["id"] for msg in messages 
             if msg["recipient_id"] == current_user.id and not msg.get("read_at")
         ]
         
-        for msg in unread_messages:
-            await db_service.update_document("job_messages", msg["id"], {
+        # Enhance messages with sender information (one batched query), alongside the read update
+        pending = [users.load_many(message["sender_id"] for message in messages)]
+        if unread_ids:
+            pending.append(db_service.update_many("job_messages", {
+                **db_service.id_filter({"$in": unread_ids}),
+                "read_at": None
+            }, {
                 "status": "read",
                 "read_at": datetime.utcnow()
-            })
-        
-        # Enhance messages with sender information
-        enhanced_messages = []
-        sender_cache = {}
+            }))
+        senders, *_ = await gather(*pending)
         
-        for message in messages:
-            sender_id = message["sender_id"]
-            
-            # Cache sender info to avoid repeated DB calls
-            if sender_id not in sender_cache:
-                sender = await db_service.get_document("users", sender_id)
-                sender_cache[sender_id] = sender
-            
-            sender = sender_cache[sender_id]
-            
-            message_response = MessageResponse(**message)
+        enhanced_messages = MESSAGE_LIST_SERIALIZER.validate(messages)
+        for message_response, sender in zip(enhanced_messages, senders):
             if sender:
                 message_response.sender_name = f"{sender['profile']['first_name']} {sender['profile']['last_name']}"
                 message_response.sender_role = sender["role"]
-            
-            enhanced_messages.append(message_response)
         
-        return enhanced_messages
+        return MESSAGE_LIST_SERIALIZER.response(enhanced_messages, response)
         
     except HTTPException:
         raise
@@ -181,67 +184,21 @@ async def get_user_conversations(
         if current_user.role == "customer":
             query_filter["customer_id"] = current_user.id
         elif current_user.role == "professional":
-            # Get jobs where user is assigned or has submitted quotes
-            assigned_jobs = await db_service.get_documents("job_requests", 
-                {"assigned_professional_id": current_user.id})
-            
-            quoted_jobs = await db_service.get_documents("quotes", 
-                {"professional_id": current_user.id})
-            quoted_job_ids = [q["job_request_id"] for q in quoted_jobs]
-            
-            all_job_ids = [j["id"] for j in assigned_jobs] + quoted_job_ids
-            all_job_ids = list(set(all_job_ids))  # Remove duplicates
-            
-            if not all_job_ids:
-                return []
-            
-            query_filter["id"] = {"$in": all_job_ids}
+            # Jobs the user is assigned to or has quoted on; distinct only ships the ids
+            quoted_job_ids = await db_service.distinct(
+                "quotes", "job_request_id", {"professional_id": current_user.id}
+            )
+            query_filter["$or"] = [{"assigned_professional_id": current_user.id}]
+            if quoted_job_ids:
+                query_filter["$or"].append(db_service.id_filter({"$in": quoted_job_ids}))
         elif current_user.role == "admin":
             # Admin can see all conversations
             pass
         else:
             return []
         
-        jobs = await db_service.get_documents("job_requests", query_filter)
-        
-        # Get latest message for each job
-        conversations = []
-        for job in jobs:
-            job_id = job["id"]
-            
-            # Get latest message
-            messages = await db_service.get_documents("job_messages", 
-                {"job_request_id": job_id}, limit=1)
-            
-            # Sort to get the latest
-            if messages:
-                messages.sort(key=lambda x: x.get("sent_at"), reverse=True)
-                latest_message = messages[0]
-            else:
-                latest_message = None
-            
-            # Count unread messages
-            unread_count = len(await db_service.get_documents("job_messages", {
-                "job_request_id": job_id,
-                "recipient_id": current_user.id,
-                "status": {"$in": ["sent", "delivered"]}
-            }))
-            
-            conversation = {
-                "job_id": job_id,
-                "job_title": job["title"],
-                "job_status": job["status"],
-                "latest_message": latest_message,
-                "unread_count": unread_count,
-                "updated_at": latest_message["sent_at"] if latest_message else job["posted_at"]
-            }
-            
-            conversations.append(conversation)
-        
-        # Sort by latest activity
-        conversations.sort(key=lambda x: x["updated_at"], reverse=True)
-        
-        return conversations
+        # Latest message, unread count and activity sort in one aggregation
+        return await db_service.get_conversations(query_filter, current_user.id)
         
     except Exception as e:
         raise HTTPException(
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pymongo import DESCENDING
 from typing import List, Optional
 from datetime import datetime, timedelta
 from models.notification import (
@@ -11,9 +12,15 @@ from models.notification import (
 from models.user import User
 from auth.config import current_active_user, get_current_admin
 from services.database import db_service
+from services.pagination import InvalidCursor, set_next_cursor
+from services.serialization import ModelListSerializer
+from services.projection import SparseFields, sparse_fields, fields_projection
+from services import lean
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
+NOTIFICATION_LIST_SERIALIZER = ModelListSerializer(NotificationResponse)
+
 @router.post("/", response_model=NotificationResponse)
 async def create_notification(
     notification_data: NotificationCreate,
@@ -27,7 +34,7 @@ async def create_notification(
         # TODO: Send email/SMS if requested
         # await send_notification_via_channels(notification)
         
-        return NotificationResponse(**notification.dict())
+        return lean.from_document(NotificationResponse, notification)
         
     except Exception as e:
         raise HTTPException(
@@ -35,12 +42,18 @@ async def create_notification(
             detail=f"Failed to create notification: {str(e)}"
         )
 
+# Most recent first; matches the user_id/sent_at indexes on notifications
+NOTIFICATION_LIST_SORT = [("sent_at", DESCENDING), ("_id", DESCENDING)]
+
 @router.get("/", response_model=List[NotificationResponse])
 async def get_user_notifications(
+    response: Response,
     unread_only: bool = Query(False, description="Get only unread notifications"),
     type_filter: Optional[NotificationType] = Query(None, description="Filter by type"),
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is given)"),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    fields: SparseFields = Depends(sparse_fields(NotificationResponse)),
     current_user: User = Depends(current_active_user)
 ):
     """Get notifications for the current user"""
@@ -54,22 +67,26 @@ async def get_user_notifications(
         if type_filter:
             query_filter["type"] = type_filter
         
-        # Calculate skip for pagination
-        skip = (page - 1) * limit
-        
         # Get notifications, sorted by most recent first
-        notifications = await db_service.get_documents(
+        notifications, next_cursor = await db_service.get_page(
             "notifications",
             filter_dict=query_filter,
+            sort=NOTIFICATION_LIST_SORT,
             limit=limit,
-            skip=skip
+            cursor=cursor,
+            page=page,
+            projection=fields_projection(NotificationResponse, fields)
         )
+        set_next_cursor(response, next_cursor)
         
-        # Sort by sent_at descending
-        notifications.sort(key=lambda x: x.get("sent_at"), reverse=True)
-        
-        return [NotificationResponse(**notif) for notif in notifications]
+        serializer = NOTIFICATION_LIST_SERIALIZER.for_fields(fields)
+        return serializer.response(serializer.validate(notifications), response)
         
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -124,20 +141,15 @@ async def mark_all_notifications_read(
 ):
     """Mark all notifications as read for the current user"""
     try:
-        # Find all unread notifications for the user
-        unread_notifications = await db_service.get_documents("notifications", {
+        # Mark every unread notification for the user as read in one round trip
+        result = await db_service.update_many("notifications", {
             "user_id": current_user.id,
             "read_at": None
+        }, {
+            "read_at": datetime.utcnow()
         })
         
-        # Mark them all as read
-        read_time = datetime.utcnow()
-        for notification in unread_notifications:
-            await db_service.update_document("notifications", notification["id"], {
-                "read_at": read_time
-            })
-        
-        return {"message": f"Marked {len(unread_notifications)} notifications as read"}
+        return {"message": f"Marked {result['modified']} notifications as read"}
         
     except Exception as e:
         raise HTTPException(
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Optional
 from models.project import Project, ProjectCreate, ProjectResponse, ProjectStatus, ServiceType
 from services.database import db_service
+from services.platform_counters import platform_counters
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,6 +21,10 @@ async def create_project(project_data: ProjectCreate):
         
         project_dict = project.dict()
         await db_service.create_document("projects", project_dict)
+        await platform_counters.increment(
+            totalProjects=1,
+            completedProjects=int(project.status == ProjectStatus.COMPLETED)
+        )
         
         logger.info(f"Created project: {project.id}")
         
@@ -80,10 +85,18 @@ async def get_project(project_id: str):
 async def update_project_status(project_id: str, status: ProjectStatus):
     """Update project status"""
     try:
-        updated = await db_service.update_document("projects", project_id, {"status": status})
-        if not updated:
+        previous = await db_service.find_one_and_update(
+            "projects", db_service.id_filter(project_id), {"status": status},
+            projection={"status": 1}, return_updated=False
+        )
+        if not previous:
             raise HTTPException(status_code=404, detail="Project not found")
         
+        was_completed = previous.get("status") == ProjectStatus.COMPLETED
+        await platform_counters.increment(
+            completedProjects=int(status == ProjectStatus.COMPLETED) - int(was_completed)
+        )
+        
         return {"success": True, "message": "Project status updated"}
         
     except HTTPException:
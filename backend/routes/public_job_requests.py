@@ -5,6 +5,8 @@ from models.job_request import JobRequest, JobStatus, JobPriority
 from models.user import User
 from auth.config import current_active_user_optional
 from services.database import db_service
+from services.job_feed import job_feed
+from services.job_fanout import job_fanout
 from pydantic import BaseModel, field_validator, model_validator, ValidationInfo
 import uuid
 import time
@@ -377,6 +379,10 @@ async def submit_draft_job_request(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to submit job request"
             )
+        job_feed.touch()
+        
+        # Notify relevant professionals in the area, off the request path
+        job_fanout.enqueue({**draft_job, "id": draft_id})
         
         return {
             "message": "Job request submitted successfully",
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pymongo import DESCENDING
+from pymongo.errors import DuplicateKeyError
 from typing import List, Optional
 from datetime import datetime
 from models.quote import Quote, QuoteCreate, QuoteUpdate, QuoteResponse, QuoteStatus
@@ -6,9 +8,43 @@ from models.job_request import JobRequest, JobStatus as JobStatus
 from models.user import User
 from auth.config import current_active_user, get_current_professional, get_current_customer
 from services.database import db_service
+from services.pagination import InvalidCursor, set_next_cursor
+from services.projection import projection_for
+from services.loaders import UserLoader, get_user_loader
+from services.quote_acceptance import quote_acceptance, AcceptanceRejected
+from services.quote_admission import quote_admission, AdmissionRejected
+from services.serialization import ModelListSerializer
+from services.projection import SparseFields, sparse_fields, fields_projection
+from services import lean
+from services.batch import BatchItem, parse_ids, batch_items
 
 router = APIRouter(prefix="/quotes", tags=["quotes"])
 
+QUOTE_LIST_SERIALIZER = ModelListSerializer(QuoteResponse)
+QUOTE_BATCH_SERIALIZER = ModelListSerializer(BatchItem[QuoteResponse])
+
+# Response fields filled in from the quoting professional's profile
+PROFESSIONAL_INFO_FIELDS = {"professional_name", "professional_company", "professional_rating"}
+
+def _professional_info(professional: Optional[dict]) -> dict:
+    """Label a quote with its professional's name and company"""
+    if not professional:
+        return {}
+    return {
+        "professional_name": f"{professional['profile']['first_name']} {professional['profile']['last_name']}",
+        "professional_company": professional['profile'].get('company_name'),
+        # TODO: Calculate rating
+        "professional_rating": 4.5  # Placeholder
+    }
+
+def _check_quote_access(quote: dict, user: User):
+    """Only the quote's professional, its customer or an admin may view it"""
+    if user.id not in [quote["professional_id"], quote["customer_id"]] and user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to view this quote"
+        )
+
 @router.post("/", response_model=QuoteResponse)
 async def create_quote(
     quote_data: QuoteCreate,
@@ -16,68 +52,35 @@ async def create_quote(
 ):
     """Create a new quote (professionals only)"""
     try:
-        # Get job request to validate and get customer_id
-        job_request = await db_service.get_document("job_requests", quote_data.job_request_id)
-        if not job_request:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Job request not found"
-            )
+        # Reserve a slot: one conditional update checks the job is open and under its cap
+        try:
+            job_request = await quote_admission.admit(quote_data.job_request_id)
+        except AdmissionRejected as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
         
-        # Check if job is still accepting quotes
-        if job_request.get("status") not in ["open", "quoted"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="This job is no longer accepting quotes"
-            )
-        
-        # Check if professional already submitted a quote
-        existing_quotes = await db_service.get_documents(
-            "quotes", 
-            {
-                "job_request_id": quote_data.job_request_id,
-                "professional_id": current_user.id,
-                "status": {"$in": ["pending", "accepted"]}
-            }
-        )
-        if existing_quotes:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="You have already submitted a quote for this job"
-            )
-        
-        # Check if maximum quotes reached
-        max_quotes = job_request.get("max_quotes", 10)
-        current_quotes_count = job_request.get("quotes_count", 0)
-        if current_quotes_count >= max_quotes:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Maximum number of quotes reached for this job"
-            )
-        
-        # Create quote
+        # Create quote; the unique index rejects a second pending or accepted bid
         quote = Quote(
             professional_id=current_user.id,
             customer_id=job_request["customer_id"],
             **quote_data.dict()
         )
         
-        await quote.save()
-        
-        # Update job request quote count and status
-        update_data = {
-            "quotes_count": current_quotes_count + 1,
-            "updated_at": datetime.utcnow()
-        }
-        if job_request.get("status") == "open":
-            update_data["status"] = "quoted"
-        
-        await db_service.update_document("job_requests", quote_data.job_request_id, update_data)
+        try:
+            await quote.insert()
+        except DuplicateKeyError:
+            await quote_admission.release(quote_data.job_request_id)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You have already submitted a quote for this job"
+            )
+        except Exception:
+            await quote_admission.release(quote_data.job_request_id)
+            raise
         
         # TODO: Send notification to customer
         
         # Add professional info to response
-        quote_response = QuoteResponse(**quote.dict())
+        quote_response = lean.from_document(QuoteResponse, quote)
         quote_response.professional_name = f"{current_user.profile.first_name} {current_user.profile.last_name}"
         quote_response.professional_company = current_user.profile.company_name
         # TODO: Calculate and add professional_rating
@@ -92,18 +95,25 @@ async def create_quote(
             detail=f"Failed to create quote: {str(e)}"
         )
 
+# Newest first; matches the submitted_at/_id indexes on quotes
+QUOTE_LIST_SORT = [("submitted_at", DESCENDING), ("_id", DESCENDING)]
+
 @router.get("/", response_model=List[QuoteResponse])
 async def get_quotes(
+    response: Response,
     job_request_id: Optional[str] = Query(None, description="Filter by job request"),
     professional_id: Optional[str] = Query(None, description="Filter by professional"),
     customer_id: Optional[str] = Query(None, description="Filter by customer"),
     status: Optional[QuoteStatus] = Query(None, description="Filter by status"),
     my_quotes: bool = Query(False, description="Get only current user's quotes"),
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is given)"),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
-    current_user: User = Depends(current_active_user)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    fields: SparseFields = Depends(sparse_fields(QuoteResponse)),
+    current_user: User = Depends(current_active_user),
+    users: UserLoader = Depends(get_user_loader)
 ):
-    """Get quotes with filtering and pagination"""
+    """Get quotes with filtering and cursor pagination"""
     try:
         # Build query filter
         query_filter = {}
@@ -129,32 +139,64 @@ async def get_quotes(
                     detail="Access denied"
                 )
         
-        # Calculate skip for pagination
-        skip = (page - 1) * limit
-        
         # Execute query
-        quotes = await db_service.get_documents(
-            "quotes", 
-            filter_dict=query_filter,
-            limit=limit,
-            skip=skip
+        try:
+            quotes, next_cursor = await db_service.get_page(
+                "quotes",
+                filter_dict=query_filter,
+                sort=QUOTE_LIST_SORT,
+                limit=limit,
+                cursor=cursor,
+                page=page,
+                projection=fields_projection(QuoteResponse, fields, "professional_id")
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        set_next_cursor(response, next_cursor)
+        
+        # Enhance quotes with professional information (one batched query), unless none was asked for
+        if fields is None or PROFESSIONAL_INFO_FIELDS.intersection(fields):
+            professionals = await users.load_many(quote["professional_id"] for quote in quotes)
+            for quote, professional in zip(quotes, professionals):
+                quote.update(_professional_info(professional))
+        
+        serializer = QUOTE_LIST_SERIALIZER.for_fields(fields)
+        return serializer.response(serializer.validate(quotes), response)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch quotes: {str(e)}"
+        )
+
+@router.get("/batch", response_model=List[BatchItem[QuoteResponse]])
+async def get_quotes_batch(
+    ids: List[str] = Query(..., description="Quote IDs, comma separated or repeated"),
+    current_user: User = Depends(current_active_user),
+    users: UserLoader = Depends(get_user_loader)
+):
+    """Get several quotes by ID in one query, in request order"""
+    try:
+        quote_ids = parse_ids(ids)
+        quotes = await db_service.get_documents_by_ids(
+            "quotes", quote_ids, projection=projection_for(QuoteResponse, "customer_id")
         )
         
-        # Enhance quotes with professional information
-        enhanced_quotes = []
-        for quote in quotes:
-            professional = await db_service.get_document("users", quote["professional_id"])
-            
-            quote_response = QuoteResponse(**quote)
-            if professional:
-                quote_response.professional_name = f"{professional['profile']['first_name']} {professional['profile']['last_name']}"
-                quote_response.professional_company = professional['profile'].get('company_name')
-                # TODO: Calculate rating
-                quote_response.professional_rating = 4.5  # Placeholder
-            
-            enhanced_quotes.append(quote_response)
+        def build(quote: dict) -> dict:
+            _check_quote_access(quote, current_user)
+            return dict(quote)
         
-        return enhanced_quotes
+        items = batch_items(quote_ids, quotes, build, not_found="Quote not found")
+        
+        # Enhance the visible quotes with professional information (one batched query)
+        visible = [item["data"] for item in items if item["status"] == status.HTTP_200_OK]
+        professionals = await users.load_many(quote["professional_id"] for quote in visible)
+        for quote, professional in zip(visible, professionals):
+            quote.update(_professional_info(professional))
+        
+        return QUOTE_BATCH_SERIALIZER.response(QUOTE_BATCH_SERIALIZER.validate(items))
         
     except HTTPException:
         raise
@@ -167,11 +209,12 @@ async def get_quotes(
 @router.get("/{quote_id}", response_model=QuoteResponse)
 async def get_quote(
     quote_id: str,
-    current_user: User = Depends(current_active_user)
+    current_user: User = Depends(current_active_user),
+    users: UserLoader = Depends(get_user_loader)
 ):
     """Get a specific quote by ID"""
     try:
-        quote = await db_service.get_document("quotes", quote_id)
+        quote = await db_service.get_document("quotes", quote_id, projection=projection_for(QuoteResponse, "customer_id"))
         if not quote:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -179,15 +222,10 @@ async def get_quote(
             )
         
         # Check permissions (customer, professional, or admin)
-        if (current_user.id not in [quote["professional_id"], quote["customer_id"]] 
-            and current_user.role != "admin"):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have permission to view this quote"
-            )
+        _check_quote_access(quote, current_user)
         
         # Enhance with professional information
-        professional = await db_service.get_document("users", quote["professional_id"])
+        professional = await users.load(quote["professional_id"])
         
         quote_response = QuoteResponse(**quote)
         if professional:
@@ -246,7 +284,7 @@ async def update_quote(
             )
         
         # Get updated quote
-        updated_quote = await db_service.get_document("quotes", quote_id)
+        updated_quote = await db_service.get_document("quotes", quote_id, projection=QuoteResponse)
         return QuoteResponse(**updated_quote)
         
     except HTTPException:
@@ -262,69 +300,21 @@ async def accept_quote(
     quote_id: str,
     current_user: User = Depends(get_current_customer)
 ):
-    """Accept a quote (customer only)"""
+    """Accept a quote (customer only)
+    
+    The guarded updates settle ownership, status, expiry and races on the
+    job in three round trips however many other bids the job has.
+    """
     try:
-        quote = await db_service.get_document("quotes", quote_id)
-        if not quote:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Quote not found"
-            )
-        
-        # Check ownership
-        if quote["customer_id"] != current_user.id and current_user.role != "admin":
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only accept quotes for your own jobs"
-            )
-        
-        # Check quote status
-        if quote.get("status") != "pending":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Can only accept pending quotes"
-            )
-        
-        # Check if quote has expired
-        if datetime.utcnow() > quote["expires_at"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Quote has expired"
-            )
-        
-        # Accept this quote
-        await db_service.update_document("quotes", quote_id, {
-            "status": "accepted",
-            "accepted_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        })
-        
-        # Decline all other pending quotes for the same job
-        other_quotes = await db_service.get_documents("quotes", {
-            "job_request_id": quote["job_request_id"],
-            "status": "pending"
-        })
-        
-        for other_quote in other_quotes:
-            if other_quote["id"] != quote_id:
-                await db_service.update_document("quotes", other_quote["id"], {
-                    "status": "declined",
-                    "declined_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow()
-                })
-        
-        # Update job request
-        await db_service.update_document("job_requests", quote["job_request_id"], {
-            "status": "accepted",
-            "accepted_quote_id": quote_id,
-            "assigned_professional_id": quote["professional_id"],
-            "updated_at": datetime.utcnow()
-        })
+        customer_id = None if current_user.role == "admin" else current_user.id
+        outcome = await quote_acceptance.accept(quote_id, customer_id)
         
         # TODO: Send notifications to professional and other bidders
         
-        return {"message": "Quote accepted successfully"}
+        return {"message": "Quote accepted successfully", **outcome}
         
+    except AcceptanceRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except HTTPException:
         raise
     except Exception as e:
@@ -340,33 +330,36 @@ async def decline_quote(
 ):
     """Decline a quote (customer only)"""
     try:
-        quote = await db_service.get_document("quotes", quote_id)
+        owner_guard = [] if current_user.role == "admin" else [{"customer_id": current_user.id}]
+        quote = await db_service.find_one_and_update(
+            "quotes",
+            {"$and": [db_service.id_filter(quote_id), {"status": "pending"}, *owner_guard]},
+            {
+                "status": "declined",
+                "declined_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            },
+            projection={"job_request_id": 1}
+        )
         if not quote:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Quote not found"
-            )
-        
-        # Check ownership
-        if quote["customer_id"] != current_user.id and current_user.role != "admin":
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only decline quotes for your own jobs"
-            )
-        
-        # Check quote status
-        if quote.get("status") != "pending":
+            quote = await db_service.get_document("quotes", quote_id, projection={"customer_id": 1})
+            if not quote:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Quote not found"
+                )
+            if owner_guard and quote["customer_id"] != current_user.id:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="You can only decline quotes for your own jobs"
+                )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Can only decline pending quotes"
             )
         
-        # Decline quote
-        await db_service.update_document("quotes", quote_id, {
-            "status": "declined",
-            "declined_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        })
+        # Give the slot back on the job request
+        await quote_admission.release(quote["job_request_id"])
         
         # TODO: Send notification to professional
         
@@ -387,42 +380,36 @@ async def withdraw_quote(
 ):
     """Withdraw a quote (professional only)"""
     try:
-        quote = await db_service.get_document("quotes", quote_id)
+        owner_guard = [] if current_user.role == "admin" else [{"professional_id": current_user.id}]
+        quote = await db_service.find_one_and_update(
+            "quotes",
+            {"$and": [db_service.id_filter(quote_id), {"status": "pending"}, *owner_guard]},
+            {
+                "status": "withdrawn",
+                "withdrawn_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            },
+            projection={"job_request_id": 1}
+        )
         if not quote:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Quote not found"
-            )
-        
-        # Check ownership
-        if quote["professional_id"] != current_user.id and current_user.role != "admin":
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only withdraw your own quotes"
-            )
-        
-        # Check quote status
-        if quote.get("status") not in ["pending"]:
+            quote = await db_service.get_document("quotes", quote_id, projection={"professional_id": 1})
+            if not quote:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Quote not found"
+                )
+            if owner_guard and quote["professional_id"] != current_user.id:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="You can only withdraw your own quotes"
+                )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Can only withdraw pending quotes"
             )
         
-        # Withdraw quote
-        await db_service.update_document("quotes", quote_id, {
-            "status": "withdrawn",
-            "withdrawn_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        })
-        
-        # Update job request quote count
-        job_request = await db_service.get_document("job_requests", quote["job_request_id"])
-        if job_request:
-            new_count = max(0, job_request.get("quotes_count", 1) - 1)
-            await db_service.update_document("job_requests", quote["job_request_id"], {
-                "quotes_count": new_count,
-                "updated_at": datetime.utcnow()
-            })
+        # Give the slot back on the job request
+        await quote_admission.release(quote["job_request_id"])
         
         # TODO: Send notification to customer
         
@@ -434,4 +421,4 @@ async def withdraw_quote(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to withdraw quote: {str(e)}"
-        )
\ No newline at end of file
+        )
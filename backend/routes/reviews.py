@@ -8,52 +8,100 @@ from models.user import User, UserRole
 from models.review import Review, ReviewCreate, ReviewResponse, ReviewListResponse, ReviewStatus
 from models.job_request import JobRequest
 from models.quote import Quote
+from pymongo import DESCENDING
+from services.loaders import UserLoader, get_user_loader
+from services import lean
+from services.concurrency import gather
+from services.platform_counters import platform_counters
+from services.response_cache import response_cache
+from services.projection import SparseFields, sparse_fields, fields_projection
+from services.serialization import ModelListSerializer
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
+def _profile(user: Optional[dict]) -> dict:
+    """Get the profile of a loaded user summary"""
+    return (user or {}).get("profile") or {}
+
+def _full_name(user: Optional[dict]) -> Optional[str]:
+    """Format a loaded user's display name"""
+    if not user:
+        return None
+    profile = _profile(user)
+    return f"{profile.get('first_name', '')} {profile.get('last_name', '')}"
+
+# Newest first; matches the status/created_at indexes on reviews
+REVIEW_LIST_SORT = [("created_at", DESCENDING)]
+
+# Job fields create_review checks and copies onto the review
+REVIEW_JOB_PROJECTION = {"customer_id": 1, "status": 1, "category": 1, "postcode": 1}
+
+# Response fields filled in from the reviewed professional and the reviewing customer
+PROFESSIONAL_LABEL_FIELDS = {"professional_name", "professional_company_name"}
+CUSTOMER_LABEL_FIELDS = {"customer_name", "customer_location"}
+
+REVIEW_LIST_SERIALIZER = ModelListSerializer(ReviewResponse)
+
+def _review_labels(professional: Optional[dict], customer: Optional[dict]) -> dict:
+    """Display fields of a review's professional and customer"""
+    return {
+        "professional_name": _full_name(professional),
+        "professional_company_name": _profile(professional).get("company_name"),
+        "customer_name": _full_name(customer),
+        "customer_location": _profile(customer).get("location")
+    }
+
+def _review_response(review: dict, professional: Optional[dict], customer: Optional[dict]) -> ReviewResponse:
+    """Build a review response from a stored review and its loaded users"""
+    return ReviewResponse(**review, **_review_labels(professional, customer))
+
 @router.get("/", response_model=List[ReviewListResponse])
 async def get_reviews_for_homepage(
     limit: int = Query(12, ge=1, le=50, description="Number of reviews to return"),
-    locale: str = Query("en", description="Language locale for responses")
+    locale: str = Query("en", description="Language locale for responses"),
+    users: UserLoader = Depends(get_user_loader)
 ):
     """Get approved reviews for homepage display"""
     try:
         # Get approved reviews with proper aggregation
-        reviews = await Review.find(
-            Review.status == ReviewStatus.APPROVED
-        ).sort(-Review.created_at).limit(limit).to_list()
+        reviews = await lean.find(
+            Review, {"status": ReviewStatus.APPROVED}, sort=REVIEW_LIST_SORT, limit=limit
+        )
+        
+        # Load every professional and customer in one batched query
+        loaded = await users.load_many(
+            [review["professional_id"] for review in reviews] + [review["customer_id"] for review in reviews]
+        )
+        professionals, customers = loaded[:len(reviews)], loaded[len(reviews):]
         
         # Convert to frontend format
         result = []
-        for review in reviews:
-            # Get professional info
+        for review, professional, customer in zip(reviews, professionals, customers):
             try:
-                professional = await User.find_one(User.id == review.professional_id)
-                if not professional:
-                    continue
-                    
-                # Get customer info  
-                customer = await User.find_one(User.id == review.customer_id)
-                if not customer:
+                if not professional or not customer:
                     continue
                 
+                professional_profile = _profile(professional)
+                customer_first_name = _profile(customer).get("first_name")
+                
                 # Create response
+                content = review["content"]
                 review_response = ReviewListResponse(
-                    id=review.id,
+                    id=review["id"],
                     company={
-                        "id": professional.id,
-                        "name": professional.profile.company_name or f"{professional.profile.first_name} {professional.profile.last_name}",
-                        "logoUrl": professional.profile.avatar or ""
+                        "id": professional["id"],
+                        "name": professional_profile.get("company_name") or _full_name(professional),
+                        "logoUrl": professional_profile.get("avatar") or ""
                     },
-                    rating=review.rating,
-                    excerpt=review.content[:150] + ("..." if len(review.content) > 150 else ""),
+                    rating=review["rating"],
+                    excerpt=content[:150] + ("..." if len(content) > 150 else ""),
                     reviewer={
-                        "name": f"{customer.profile.first_name} {customer.profile.last_name}",
-                        "initial": customer.profile.first_name[0] if customer.profile.first_name else "A",
-                        "location": review.project_postcode
+                        "name": _full_name(customer),
+                        "initial": customer_first_name[0] if customer_first_name else "A",
+                        "location": review["project_postcode"]
                     },
-                    date=review.created_at.isoformat(),
-                    url=f"/professional/{professional.id}/reviews/{review.id}"
+                    date=review["created_at"].isoformat(),
+                    url=f"/professional/{professional['id']}/reviews/{review['id']}"
                 )
                 result.append(review_response)
                 
@@ -67,72 +115,58 @@ async def get_reviews_for_homepage(
         raise HTTPException(status_code=500, detail=f"Failed to fetch reviews: {str(e)}")
 
 @router.get("/{review_id}", response_model=ReviewResponse)
-async def get_review(review_id: str):
+async def get_review(review_id: str, users: UserLoader = Depends(get_user_loader)):
     """Get a specific review by ID"""
-    review = await Review.find_one(Review.id == review_id)
+    review = await lean.get(Review, review_id)
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
     
     # Get related user info
-    professional = await User.find_one(User.id == review.professional_id)
-    customer = await User.find_one(User.id == review.customer_id)
-    
-    return ReviewResponse(
-        id=review.id,
-        job_request_id=review.job_request_id,
-        professional_id=review.professional_id,
-        customer_id=review.customer_id,
-        rating=review.rating,
-        title=review.title,
-        content=review.content,
-        project_category=review.project_category,
-        project_postcode=review.project_postcode,
-        images=review.images,
-        status=review.status,
-        is_verified=review.is_verified,
-        created_at=review.created_at,
-        professional_name=f"{professional.profile.first_name} {professional.profile.last_name}" if professional else None,
-        professional_company_name=professional.profile.company_name if professional else None,
-        customer_name=f"{customer.profile.first_name} {customer.profile.last_name}" if customer else None,
-        customer_location=customer.profile.location if customer else None
-    )
+    professional, customer = await users.load_many([review["professional_id"], review["customer_id"]])
+    
+    return _review_response(review, professional, customer)
 
 @router.post("/create", response_model=ReviewResponse)
 async def create_review(
     review_data: ReviewCreate,
-    current_user: User = Depends(current_active_user)
+    current_user: User = Depends(current_active_user),
+    users: UserLoader = Depends(get_user_loader)
 ):
     """Create a new review (customer only)"""
     # Verify user is a customer
     if current_user.role != UserRole.CUSTOMER:
         raise HTTPException(status_code=403, detail="Only customers can create reviews")
     
+    # The job, duplicate-review and quote lookups are independent; run them together
+    job_request, existing_review, quote = await gather(
+        lean.get(JobRequest, review_data.job_request_id, projection=REVIEW_JOB_PROJECTION),
+        lean.find_one(Review, {
+            "job_request_id": review_data.job_request_id,
+            "professional_id": review_data.professional_id,
+            "customer_id": current_user.id
+        }, projection={"_id": 1}),
+        lean.find_one(Quote, {
+            "job_request_id": review_data.job_request_id,
+            "professional_id": review_data.professional_id
+        }, projection={"_id": 1})
+    )
+    
     # Verify the job request exists and belongs to the user
-    job_request = await JobRequest.find_one(JobRequest.id == review_data.job_request_id)
     if not job_request:
         raise HTTPException(status_code=404, detail="Job request not found")
     
-    if job_request.customer_id != current_user.id:
+    if job_request.get("customer_id") != current_user.id:
         raise HTTPException(status_code=403, detail="You can only review your own completed jobs")
     
     # Verify job is completed
-    if job_request.status.value != "completed":
+    if job_request.get("status") != "completed":
         raise HTTPException(status_code=400, detail="Can only review completed jobs")
     
     # Check if review already exists for this job and professional
-    existing_review = await Review.find_one(
-        Review.job_request_id == review_data.job_request_id,
-        Review.professional_id == review_data.professional_id,
-        Review.customer_id == current_user.id
-    )
     if existing_review:
         raise HTTPException(status_code=400, detail="Review already exists for this job")
     
     # Verify professional worked on this job
-    quote = await Quote.find_one(
-        Quote.job_request_id == review_data.job_request_id,
-        Quote.professional_id == review_data.professional_id
-    )
     if not quote:
         raise HTTPException(status_code=400, detail="Professional did not work on this job")
     
@@ -144,8 +178,8 @@ async def create_review(
         rating=review_data.rating,
         title=review_data.title,
         content=review_data.content,
-        project_category=job_request.category,
-        project_postcode=job_request.postcode,
+        project_category=job_request["category"],
+        project_postcode=job_request["postcode"],
         images=review_data.images,
         status=ReviewStatus.PENDING,  # Reviews need approval
         is_verified=True  # Verified because linked to completed job
@@ -153,86 +187,63 @@ async def create_review(
     
     await review.insert()
     
-    # Return full review response
-    professional = await User.find_one(User.id == review.professional_id)
-    
-    return ReviewResponse(
-        id=review.id,
-        job_request_id=review.job_request_id,
-        professional_id=review.professional_id,
-        customer_id=review.customer_id,
-        rating=review.rating,
-        title=review.title,
-        content=review.content,
-        project_category=review.project_category,
-        project_postcode=review.project_postcode,
-        images=review.images,
-        status=review.status,
-        is_verified=review.is_verified,
-        created_at=review.created_at,
-        professional_name=f"{professional.profile.first_name} {professional.profile.last_name}" if professional else None,
-        professional_company_name=professional.profile.company_name if professional else None,
-        customer_name=f"{current_user.profile.first_name} {current_user.profile.last_name}",
-        customer_location=current_user.profile.location
+    # Bookkeeping and the professional lookup for the response don't depend on each other
+    _, _, professional = await gather(
+        platform_counters.increment(ratingSum=review.rating, ratingCount=1),
+        response_cache.invalidate("reviews"),
+        users.load(review.professional_id)
     )
+    
+    # Return full review response
+    
+    review_response = lean.from_document(ReviewResponse, review)
+    review_response.professional_name = _full_name(professional)
+    review_response.professional_company_name = _profile(professional).get("company_name")
+    review_response.customer_name = f"{current_user.profile.first_name} {current_user.profile.last_name}"
+    review_response.customer_location = current_user.profile.location
+    
+    return review_response
 
 @router.get("/professional/{professional_id}", response_model=List[ReviewResponse])
 async def get_professional_reviews(
     professional_id: str,
     limit: int = Query(50, ge=1, le=100),
-    status: Optional[ReviewStatus] = None
+    status: Optional[ReviewStatus] = None,
+    fields: SparseFields = Depends(sparse_fields(ReviewResponse)),
+    users: UserLoader = Depends(get_user_loader)
 ):
     """Get all reviews for a specific professional"""
-    # Build query conditions
-    conditions = [Review.professional_id == professional_id]
-    
-    # Filter by status if provided
-    if status:
-        conditions.append(Review.status == status)
-    else:
-        # Default to approved reviews only for public access
-        conditions.append(Review.status == ReviewStatus.APPROVED)
-    
-    # Combine conditions using And
-    from beanie.operators import And
-    query = And(*conditions)
-    
-    reviews = await Review.find(query).sort(-Review.created_at).limit(limit).to_list()
-    
-    result = []
-    for review in reviews:
-        # Get customer info
-        customer = await User.find_one(User.id == review.customer_id)
-        professional = await User.find_one(User.id == review.professional_id)
-        
-        result.append(ReviewResponse(
-            id=review.id,
-            job_request_id=review.job_request_id,
-            professional_id=review.professional_id,
-            customer_id=review.customer_id,
-            rating=review.rating,
-            title=review.title,
-            content=review.content,
-            project_category=review.project_category,
-            project_postcode=review.project_postcode,
-            images=review.images,
-            status=review.status,
-            is_verified=review.is_verified,
-            created_at=review.created_at,
-            professional_name=f"{professional.profile.first_name} {professional.profile.last_name}" if professional else None,
-            professional_company_name=professional.profile.company_name if professional else None,
-            customer_name=f"{customer.profile.first_name} {customer.profile.last_name}" if customer else None,
-            customer_location=customer.profile.location if customer else None
-        ))
-    
-    return result
+    # Default to approved reviews only for public access
+    query = {"professional_id": professional_id, "status": status or ReviewStatus.APPROVED}
+    
+    reviews = await lean.find(
+        Review, query, sort=REVIEW_LIST_SORT, limit=limit,
+        projection=fields_projection(ReviewResponse, fields, "customer_id")
+    )
+    
+    # Only load the users whose labels were asked for
+    wanted = set(fields) if fields is not None else PROFESSIONAL_LABEL_FIELDS | CUSTOMER_LABEL_FIELDS
+    professional_ids = [professional_id] if wanted & PROFESSIONAL_LABEL_FIELDS else []
+    customer_ids = [review["customer_id"] for review in reviews] if wanted & CUSTOMER_LABEL_FIELDS else []
+    
+    # Every review shares the professional, so this is one batched query
+    loaded = await users.load_many(professional_ids + customer_ids)
+    professional = loaded[0] if professional_ids else None
+    customers = loaded[len(professional_ids):] or [None] * len(reviews)
+    
+    for review, customer in zip(reviews, customers):
+        review.update(_review_labels(professional, customer))
+    
+    serializer = REVIEW_LIST_SERIALIZER.for_fields(fields)
+    return serializer.response(serializer.validate(reviews))
 
 # Admin routes for review moderation
 @router.put("/{review_id}/moderate", response_model=ReviewResponse)
 async def moderate_review(
     review_id: str,
     status: ReviewStatus,
-    current_user: User = Depends(current_active_user)
+    current_user: User = Depends(current_active_user),
+    users: UserLoader = Depends(get_user_loader)
 ):
     """Moderate a review (admin only)"""
     if current_user.role != UserRole.ADMIN:
@@ -248,6 +259,7 @@ async def moderate_review(
     review.updated_at = datetime.utcnow()
     
     await review.save()
+    await response_cache.invalidate("reviews")
     
     # Return updated review
-    return await get_review(review_id)
\ No newline at end of file
+    return await get_review(review_id, users)
\ No newline at end of file
@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Set
+from models.user import User, UserSummary
+from auth.config import current_active_user
+from services.database import db_service
+from services.loaders import USER_SUMMARY_PROJECTION
+from services.batch import BatchItem, parse_ids, batch_items
+from services.serialization import ModelListSerializer
+from services.concurrency import gather
+
+# Registered ahead of the fastapi-users routes so /users/batch isn't taken for a user id
+router = APIRouter(prefix="/users", tags=["users"])
+
+USER_SUMMARY_BATCH_SERIALIZER = ModelListSerializer(BatchItem[UserSummary])
+
+# (collection, caller's field, other party's field) for each way two users meet
+USER_RELATIONSHIPS = [
+    ("quotes", "customer_id", "professional_id"),
+    ("quotes", "professional_id", "customer_id"),
+    ("job_requests", "customer_id", "assigned_professional_id"),
+    ("job_requests", "assigned_professional_id", "customer_id"),
+    ("job_messages", "sender_id", "recipient_id"),
+    ("job_messages", "recipient_id", "sender_id"),
+]
+
+async def _related_user_ids(user: User, user_ids: List[str]) -> Set[str]:
+    """Those of user_ids the user shares a job, quote or conversation with"""
+    related = await gather(*[
+        db_service.distinct(collection, other_field, {own_field: user.id, other_field: {"$in": user_ids}})
+        for collection, own_field, other_field in USER_RELATIONSHIPS
+    ])
+    return {user.id}.union(*related)
+
+def _summary(user: dict) -> dict:
+    """Flatten a user's display fields out of their profile"""
+    profile = user.get("profile") or {}
+    return {
+        "id": user["id"],
+        "role": user["role"],
+        "first_name": profile.get("first_name", ""),
+        "last_name": profile.get("last_name", ""),
+        "company_name": profile.get("company_name"),
+        "avatar": profile.get("avatar"),
+        "location": profile.get("location")
+    }
+
+@router.get("/batch", response_model=List[BatchItem[UserSummary]])
+async def get_user_summaries_batch(
+    ids: List[str] = Query(..., description="User IDs, comma separated or repeated"),
+    current_user: User = Depends(current_active_user)
+):
+    """Get display summaries of several users in one query, in request order
+    
+    Users only see people they share a job, quote or conversation with;
+    other ids come back as 403 items. Admins see everyone.
+    """
+    try:
+        user_ids = parse_ids(ids)
+        if current_user.role == "admin":
+            users = await db_service.get_documents_by_ids("users", user_ids, projection=USER_SUMMARY_PROJECTION)
+            related = None
+        else:
+            users, related = await gather(
+                db_service.get_documents_by_ids("users", user_ids, projection=USER_SUMMARY_PROJECTION),
+                _related_user_ids(current_user, user_ids)
+            )
+        
+        def build(user: dict) -> dict:
+            if related is not None and user["id"] not in related:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="You don't share a job, quote or conversation with this user"
+                )
+            return _summary(user)
+        
+        items = batch_items(user_ids, users, build, not_found="User not found")
+        return USER_SUMMARY_BATCH_SERIALIZER.response(USER_SUMMARY_BATCH_SERIALIZER.validate(items))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch users: {str(e)}"
+        )
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
@@ -11,7 +12,21 @@ from datetime import datetime
 
 # Import our routes and services
 from services.database import db_service
-from routes import projects, services, stats, testimonials, auth, job_requests, quotes, messages, notifications, public_job_requests, public, reviews, xl, pro_leads
+from services.pagination import NEXT_CURSOR_HEADER
+from services.view_counter import view_counter
+from services.document_cache import document_cache
+from services.query_monitor import query_monitor, QueryTimingMiddleware
+from services.quote_acceptance import quote_acceptance
+from services.quote_admission import quote_admission
+from services.platform_counters import platform_counters
+from services.job_feed import job_feed
+from services.job_fanout import job_fanout
+from services.job_search import job_search
+from services.job_facets import job_facets
+from services.response_cache import response_cache, ResponseCacheMiddleware
+from services.etag import ETagMiddleware
+from auth.config import get_current_admin
+from routes import projects, services, stats, testimonials, auth, users, job_requests, quotes, messages, notifications, public_job_requests, public, reviews, xl, pro_leads
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -20,7 +35,8 @@ load_dotenv(ROOT_DIR / '.env')
 app = FastAPI(
     title="BuildConnect API",
     description="Construction Services Marketplace Platform API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Create a router with the /api prefix
@@ -44,6 +60,24 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
+@api_router.get("/metrics", dependencies=[Depends(get_current_admin)])
+async def get_metrics():
+    """Internal performance counters (admin only)"""
+    return {
+        "view_counter": view_counter.metrics(),
+        "document_cache": document_cache.metrics(),
+        "queries": query_monitor.metrics(),
+        "quote_acceptance": quote_acceptance.metrics(),
+        "quote_admission": quote_admission.metrics(),
+        "platform_counters": platform_counters.metrics(),
+        "job_feed": job_feed.metrics(),
+        "job_fanout": job_fanout.metrics(),
+        "job_search": job_search.metrics(),
+        "job_facets": job_facets.metrics(),
+        "response_cache": response_cache.metrics(),
+        "id_resolution": db_service.id_resolution_stats()
+    }
+
 # Legacy status routes for backward compatibility
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
@@ -58,6 +92,7 @@ async def get_status_checks():
     return [StatusCheck(**status_check) for status_check in status_checks]
 
 # Include all route modules
+api_router.include_router(users.router)
 api_router.include_router(auth.router)
 api_router.include_router(job_requests.router)
 api_router.include_router(public_job_requests.router)
@@ -76,6 +111,20 @@ api_router.include_router(pro_leads.router)
 # Include the main API router
 app.include_router(api_router)
 
+# Anonymous, read-mostly routes served stale-while-revalidate (ttl, stale window in seconds)
+response_cache.cache_route("/api/services", ttl=3600, stale_ttl=86400, tags=["services"])
+response_cache.cache_route("/api/stats", ttl=30, stale_ttl=300, tags=["stats"])
+response_cache.cache_route("/api/testimonials", ttl=60, stale_ttl=600, tags=["testimonials", "reviews"])
+response_cache.cache_route("/api/testimonials/featured", ttl=60, stale_ttl=600, tags=["testimonials", "reviews"])
+response_cache.cache_route("/api/reviews", ttl=60, stale_ttl=600, tags=["reviews"])
+response_cache.cache_route("/api/public/vehicle-lookup", ttl=3600, stale_ttl=86400, tags=["vehicle-lookup"])
+
+# Response cache sits inside CORS so cached bytes never carry another origin's headers
+app.add_middleware(ResponseCacheMiddleware)
+
+# Strong ETags and 304s for catalog, stats and review reads (job details tag themselves)
+app.add_middleware(ETagMiddleware, prefixes=["/api/services", "/api/stats", "/api/reviews"])
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -83,8 +132,12 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Server-Timing header and per-request database usage log
+app.add_middleware(QueryTimingMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -98,6 +151,12 @@ async def startup_db_client():
     """Initialize database connection on startup"""
     try:
         await db_service.connect_to_database()
+        await response_cache.backend.setup()
+        view_counter.start()
+        await platform_counters.start()
+        job_feed.start()
+        job_fanout.start()
+        job_search.start()
         logger.info("BuildConnect API started successfully")
     except Exception as e:
         logger.error(f"Failed to start database connection: {e}")
@@ -107,5 +166,10 @@ async def startup_db_client():
 @app.on_event("shutdown")
 async def shutdown_db_client():
     """Close database connection on shutdown"""
+    await view_counter.stop()
+    await platform_counters.stop()
+    await job_feed.stop()
+    await job_fanout.stop()
+    await job_search.stop()
     await db_service.close_database_connection()
     logger.info("BuildConnect API shutdown completed")
@@ -0,0 +1,59 @@
+"""
+Batch reads by id.
+
+Dashboards that show many jobs or quotes used to fetch them one request at a
+time. The batch endpoints take ``?ids=a,b,c`` (or repeated ``ids=``), resolve
+every id with one ``$in`` query and answer with one ``BatchItem`` per
+requested id, in request order. Each document goes through the same checks
+as its single-item route; a missing or forbidden id gets its own 404/403
+item instead of failing the whole batch.
+"""
+
+from typing import Callable, Dict, Generic, Iterable, List, Optional, TypeVar
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+# Matches the largest page the list endpoints serve
+MAX_BATCH_IDS = 100
+
+
+class BatchItem(BaseModel, Generic[T]):
+    """Outcome for one requested id"""
+    id: str
+    status: int
+    data: Optional[T] = None
+    error: Optional[str] = None
+
+
+def parse_ids(values: Iterable[str], limit: int = MAX_BATCH_IDS) -> List[str]:
+    """Split repeated and comma-separated ids, keeping request order"""
+    ids = [part.strip() for value in values for part in value.split(",") if part.strip()]
+    if not ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No ids given")
+    if len(set(ids)) > limit:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {limit} ids per batch"
+        )
+    return ids
+
+
+def batch_items(ids: List[str], documents: Dict[str, dict], build: Callable[[dict], dict],
+                not_found: str = "Not found") -> List[dict]:
+    """Build one item per requested id; build raises HTTPException to refuse a document"""
+    outcomes: Dict[str, dict] = {}
+    for document_id in ids:
+        if document_id in outcomes:
+            continue
+        document = documents.get(document_id)
+        if document is None:
+            outcomes[document_id] = {"id": document_id, "status": status.HTTP_404_NOT_FOUND, "error": not_found}
+            continue
+        try:
+            outcomes[document_id] = {"id": document_id, "status": status.HTTP_200_OK, "data": build(document)}
+        except HTTPException as e:
+            outcomes[document_id] = {"id": document_id, "status": e.status_code, "error": e.detail}
+    return [outcomes[document_id] for document_id in ids]
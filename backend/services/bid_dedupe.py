@@ -0,0 +1,107 @@
+"""
+One-off cleanup of duplicate live bids.
+
+The quotes collection declares a partial unique index on (job_request_id,
+professional_id) over pending and accepted bids. Before that index existed,
+duplicates were only checked in Python and racing submissions could store two
+live bids from the same professional on one job, which makes the unique build
+fail. This tool keeps one live bid per pair (the accepted one if there is one,
+otherwise the newest), marks the others withdrawn and gives their quote slots
+back to the job, so the index can then be built.
+
+Run from the backend directory before deploying the index:
+
+    python -m services.bid_dedupe            # report duplicate bids
+    python -m services.bid_dedupe --apply    # withdraw the extra ones
+
+The partial filter uses ``$in``, which needs MongoDB 6.0 or later.
+"""
+
+import argparse
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+LIVE_STATUSES = ["pending", "accepted"]
+
+# Live bids grouped per job and professional, newest first, where there is more than one
+DUPLICATES_PIPELINE = [
+    {"$match": {"status": {"$in": LIVE_STATUSES}}},
+    {"$sort": {"submitted_at": -1, "_id": -1}},
+    {"$group": {
+        "_id": {"job_request_id": "$job_request_id", "professional_id": "$professional_id"},
+        "bids": {"$push": {"_id": "$_id", "status": "$status"}},
+        "count": {"$sum": 1}
+    }},
+    {"$match": {"count": {"$gt": 1}}}
+]
+
+
+def extra_bids(bids: List[dict]) -> List[dict]:
+    """The bids to withdraw from one group, keeping the accepted bid or else the newest"""
+    keep = next((bid for bid in bids if bid["status"] == "accepted"), bids[0])
+    return [bid for bid in bids if bid is not keep]
+
+
+async def find_duplicates(db) -> List[dict]:
+    """Groups of live bids that share a job and professional"""
+    return await db.quotes.aggregate(DUPLICATES_PIPELINE).to_list(None)
+
+
+async def dedupe_bids(db) -> Dict[str, int]:
+    """Withdraw the extra live bids and release the slots of the pending ones"""
+    result = {"groups": 0, "withdrawn": 0, "released": 0}
+    released: Counter = Counter()
+    now = datetime.utcnow()
+    for group in await find_duplicates(db):
+        extra = extra_bids(group["bids"])
+        # Guard on the status so a bid changed since the scan is left alone
+        for bid in extra:
+            update = await db.quotes.update_one(
+                {"_id": bid["_id"], "status": bid["status"]},
+                {"$set": {"status": "withdrawn", "withdrawn_at": now, "updated_at": now}}
+            )
+            if update.modified_count and bid["status"] == "pending":
+                released[group["_id"]["job_request_id"]] += 1
+            result["withdrawn"] += update.modified_count
+        result["groups"] += 1
+
+    for job_request_id, slots in released.items():
+        await db.job_requests.update_one(
+            {"$or": [{"_id": job_request_id}, {"id": job_request_id}]},
+            [{"$set": {
+                "quotes_count": {"$max": [0, {"$subtract": [{"$ifNull": ["$quotes_count", 0]}, slots]}]},
+                "updated_at": now
+            }}]
+        )
+        result["released"] += slots
+    return result
+
+
+async def _main(apply: bool) -> int:
+    from services.database import db_service
+
+    await db_service.connect_client()
+    try:
+        if not apply:
+            groups = await find_duplicates(db_service.db)
+            extra = sum(len(extra_bids(group["bids"])) for group in groups)
+            print(f"{len(groups)} job/professional pairs with duplicate live bids, {extra} bids to withdraw")
+            return 0 if not groups else 1
+        result = await dedupe_bids(db_service.db)
+        print(f"Withdrew {result['withdrawn']} duplicate bids in {result['groups']} pairs, "
+              f"released {result['released']} quote slots")
+        return 0
+    finally:
+        await db_service.close_database_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Withdraw duplicate live bids before building the unique bid index")
+    parser.add_argument("--apply", action="store_true", help="Withdraw the duplicate bids")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.apply)))
@@ -0,0 +1,60 @@
+"""
+Structured fan-out of independent awaits inside a handler.
+
+``gather`` runs awaitables concurrently so a handler waits for the slowest of
+them rather than their sum. Unlike ``asyncio.gather`` it never leaves work
+running behind the caller: as soon as one awaitable fails, or the caller is
+cancelled, the rest are cancelled and awaited before the error propagates.
+Failures surface the way handlers already report them: an ``HTTPException``
+passes through unchanged, exception types listed in ``errors`` become the
+mapped HTTP status, and anything else is re-raised for the handler's own
+``except Exception`` to turn into a 500.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Dict, List, Optional, Type
+
+from fastapi import HTTPException
+
+
+async def _cancel_all(tasks: List[asyncio.Future]):
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+    # Let cancelled tasks unwind before the caller moves on
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _map_error(error: BaseException, errors: Optional[Dict[Type[BaseException], int]]) -> BaseException:
+    if isinstance(error, HTTPException) or not errors:
+        return error
+    for error_type, status_code in errors.items():
+        if isinstance(error, error_type):
+            return HTTPException(status_code=status_code, detail=str(error))
+    return error
+
+
+async def gather(*awaitables: Awaitable[Any], errors: Optional[Dict[Type[BaseException], int]] = None,
+                 timeout: Optional[float] = None) -> List[Any]:
+    """Await independent calls concurrently, returning results in input order
+
+    The first failure cancels the remaining calls and is raised, mapped
+    through ``errors``. With a timeout, calls still running when it expires
+    are cancelled and a 504 is raised.
+    """
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_EXCEPTION)
+        # Report the earliest failed call in input order, not whichever finished first
+        for task in tasks:
+            if task in done and not task.cancelled() and task.exception() is not None:
+                error = task.exception()
+                mapped = _map_error(error, errors)
+                if mapped is error:
+                    raise error
+                raise mapped from error
+        if pending:
+            raise HTTPException(status_code=504, detail="Timed out waiting for a dependent service")
+        return [task.result() for task in tasks]
+    finally:
+        await _cancel_all(tasks)
@@ -1,10 +1,16 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
+from pymongo import ReturnDocument
+from contextlib import asynccontextmanager
 import os
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple
 import logging
 from dotenv import load_dotenv
 from pathlib import Path
+from services.pagination import SortSpec, with_tiebreaker, decode_cursor, cursor_for, keyset_filter
+from services.projection import Projection, resolve_projection, apply_projection
+from services.document_cache import document_cache
+from services.query_monitor import query_monitor
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent.parent
@@ -12,37 +18,79 @@ load_dotenv(ROOT_DIR / '.env')
 
 logger = logging.getLogger(__name__)
 
+# How get/update/delete resolve a document id:
+# - "rollout": one query matching either the canonical _id or the legacy id field
+# - "canonical": _id only, once every collection has been migrated
+#   with `python -m services.id_migration`
+ID_RESOLUTION_MODES = ("rollout", "canonical")
+
+# Oldest MongoDB the declared indexes build on ($in in the quotes bid index partial filter)
+MIN_SERVER_VERSION = (6, 0)
+
 class DatabaseService:
     def __init__(self):
         self.client = None
         self.db = None
+        self.id_resolution = os.environ.get('DB_ID_RESOLUTION', 'rollout')
+        if self.id_resolution not in ID_RESOLUTION_MODES:
+            raise ValueError(f"DB_ID_RESOLUTION must be one of {ID_RESOLUTION_MODES}")
+        # Lookups served from the legacy id field, per collection
+        self.id_fallbacks: Dict[str, int] = {}
+        # Only replica sets and sharded clusters can run multi-document transactions
+        self.transactions_supported = False
+        self.server_version: Tuple[int, ...] = ()
+        # Cache invalidations to replay once a transaction commits, keyed by session
+        self._transaction_invalidations: Dict[int, List[Tuple[str, Optional[str]]]] = {}
+        document_cache.load_config(os.environ.get('DOC_CACHE_CONFIG', ''))
+        query_monitor.slow_query_ms = float(os.environ.get('SLOW_QUERY_MS', '100'))
+    
+    def document_models(self) -> list:
+        """Get all Beanie document models managed by this service"""
+        from models.user import User
+        from models.job_request import JobRequest
+        from models.quote import Quote
+        from models.message import JobMessage
+        from models.notification import Notification
+        from models.review import Review
+        from models.xl_lead import XLLead
+        from models.pro_lead import ProLead
+        
+        return [User, JobRequest, Quote, JobMessage, Notification, Review, XLLead, ProLead]
+    
+    async def connect_client(self):
+        """Create the Motor client and verify the connection"""
+        mongo_url = os.environ.get('MONGO_URL')
+        db_name = os.environ.get('DB_NAME', 'buildconnect')
+        
+        # The listener sees commands from both this service and Beanie
+        self.client = AsyncIOMotorClient(mongo_url, event_listeners=[query_monitor])
+        self.db = self.client[db_name]
+        
+        # Test connection and learn the topology
+        hello = await self.client.admin.command('hello')
+        self.transactions_supported = bool(hello.get('setName') or hello.get('msg') == 'isdbgrid')
+        build_info = await self.client.admin.command('buildInfo')
+        self.server_version = tuple(build_info.get('versionArray', [0, 0])[:2])
+        if self.server_version < MIN_SERVER_VERSION:
+            logger.error(f"MongoDB {build_info.get('version')} is older than "
+                         f"{'.'.join(map(str, MIN_SERVER_VERSION))}; some declared indexes will not build")
+        logger.info("Successfully connected to MongoDB")
     
-    async def connect_to_database(self):
-        """Create database connection and initialize Beanie"""
+    async def connect_to_database(self, reconcile_indexes: bool = True):
+        """Create database connection, reconcile indexes and initialize Beanie"""
         try:
-            mongo_url = os.environ.get('MONGO_URL')
-            db_name = os.environ.get('DB_NAME', 'buildconnect')
+            await self.connect_client()
             
-            self.client = AsyncIOMotorClient(mongo_url)
-            self.db = self.client[db_name]
+            document_models = self.document_models()
             
-            # Test connection
-            await self.client.admin.command('ping')
-            logger.info("Successfully connected to MongoDB")
+            # Build missing indexes (and handle drifted ones) before Beanie so its own index pass is a no-op
+            if reconcile_indexes:
+                from services.indexes import index_manager
+                rebuild = os.environ.get('INDEX_REBUILD_ON_STARTUP', 'false').lower() == 'true'
+                await index_manager.reconcile(self.db, document_models, rebuild=rebuild)
             
             # Initialize Beanie with all models
-            from models.user import User
-            from models.job_request import JobRequest
-            from models.quote import Quote
-            from models.message import JobMessage
-            from models.notification import Notification
-            from models.review import Review
-            from models.xl_lead import XLLead
-            from models.pro_lead import ProLead
-            
-            await init_beanie(database=self.db, document_models=[
-                User, JobRequest, Quote, JobMessage, Notification, Review, XLLead, ProLead
-            ])
+            await init_beanie(database=self.db, document_models=document_models)
             logger.info("Initialized Beanie with all marketplace models")
             
         except Exception as e:
@@ -51,69 +99,309 @@ class DatabaseService:
     
     async def close_database_connection(self):
         """Close database connection"""
+        if self.id_fallbacks:
+            logger.info(f"Legacy id fallbacks served this run: {self.id_fallbacks}")
         if self.client:
             self.client.close()
             logger.info("Closed MongoDB connection")
     
+    # Id resolution
+    def id_filter(self, document_id: Any) -> dict:
+        """Build a single-query filter matching a document id or id condition"""
+        if self.id_resolution == "canonical":
+            return {"_id": document_id}
+        # Both branches are indexed, so MongoDB answers the $or with an index union
+        return {"$or": [{"_id": document_id}, {"id": document_id}]}
+    
+    def _record_id_resolution(self, collection: str, document: dict, document_id: str):
+        """Count lookups that only matched through the legacy id field"""
+        if document.get('_id') != document_id:
+            self.id_fallbacks[collection] = self.id_fallbacks.get(collection, 0) + 1
+    
+    def id_resolution_stats(self) -> dict:
+        """Report the id resolution mode and legacy fallbacks served so far"""
+        return {
+            "mode": self.id_resolution,
+            "fallbacks": dict(self.id_fallbacks),
+            "total_fallbacks": sum(self.id_fallbacks.values())
+        }
+    
     # Generic CRUD operations
+    def _to_db(self, document: dict) -> dict:
+        """Store the application id as the canonical _id, the same shape Beanie writes"""
+        if 'id' in document and '_id' not in document:
+            document = dict(document)
+            document['_id'] = document.pop('id')
+        return document
+    
     async def create_document(self, collection: str, document: dict) -> str:
         """Create a new document"""
-        result = await self.db[collection].insert_one(document)
+        result = await self.db[collection].insert_one(self._to_db(document))
+        document_cache.invalidate(collection, str(result.inserted_id))
         return str(result.inserted_id)
     
-    async def get_document(self, collection: str, document_id: str) -> Optional[dict]:
-        """Get document by ID"""
-        # Try both _id and id fields for compatibility
-        document = await self.db[collection].find_one({"_id": document_id})
-        if not document:
-            document = await self.db[collection].find_one({"id": document_id})
+    async def get_document(self, collection: str, document_id: str,
+                           projection: Optional[Projection] = None) -> Optional[dict]:
+        """Get document by ID, optionally limited to a projection or response model's fields
+        
+        Collections configured in the document cache are read through it:
+        whole documents are cached and the projection is applied in process.
+        """
+        projection = resolve_projection(projection)
+        if document_cache.is_cached(collection):
+            document = document_cache.get(collection, document_id)
+            if document is None:
+                token = document_cache.begin_read()
+                try:
+                    document = await self.db[collection].find_one(self.id_filter(document_id))
+                finally:
+                    document_cache.end_read(collection, {document_id: document} if document else {}, token)
+            if document:
+                document = apply_projection(document, projection)
+        else:
+            document = await self.db[collection].find_one(self.id_filter(document_id), projection)
         if document:
-            # Ensure we have an id field for API responses
-            if '_id' in document and 'id' not in document:
-                document['id'] = document['_id']
-            document.pop('_id', None)
+            self._record_id_resolution(collection, document, document_id)
+            self._to_api(document)
+        return document
+    
+    def _to_api(self, document: dict) -> dict:
+        """Ensure we have an id field for API responses"""
+        if '_id' in document and 'id' not in document:
+            document['id'] = document['_id']
+        document.pop('_id', None)
         return document
     
-    async def get_documents(self, collection: str, filter_dict: dict = None, limit: int = 100, skip: int = 0) -> List[dict]:
+    async def get_documents(self, collection: str, filter_dict: dict = None, limit: int = 100, skip: int = 0,
+                            sort: Optional[SortSpec] = None, projection: Optional[Projection] = None) -> List[dict]:
         """Get multiple documents with optional filtering"""
         filter_dict = filter_dict or {}
-        cursor = self.db[collection].find(filter_dict).skip(skip).limit(limit)
+        cursor = self.db[collection].find(filter_dict, resolve_projection(projection))
+        if sort:
+            cursor = cursor.sort(sort)
+        cursor = cursor.skip(skip).limit(limit)
         documents = []
         async for document in cursor:
-            # Ensure we have an id field for API responses
-            if '_id' in document and 'id' not in document:
-                document['id'] = document['_id']
-            document.pop('_id', None)
-            documents.append(document)
+            documents.append(self._to_api(document))
         return documents
     
+    async def iter_documents(self, collection: str, filter_dict: dict = None,
+                             projection: Optional[Projection] = None, batch_size: int = 1000) -> AsyncIterator[dict]:
+        """Stream every matching document without holding the whole result in memory"""
+        cursor = self.db[collection].find(filter_dict or {}, resolve_projection(projection), batch_size=batch_size)
+        async for document in cursor:
+            yield self._to_api(document)
+    
+    async def find_one(self, collection: str, filter_dict: dict,
+                       projection: Optional[Projection] = None) -> Optional[dict]:
+        """Get the first document matching a filter"""
+        document = await self.db[collection].find_one(filter_dict, resolve_projection(projection))
+        return self._to_api(document) if document else None
+    
+    async def get_page(self, collection: str, filter_dict: dict = None, sort: Optional[SortSpec] = None,
+                       limit: int = 20, cursor: Optional[str] = None, page: int = 1,
+                       projection: Optional[Projection] = None) -> Tuple[List[dict], Optional[str]]:
+        """Get one page of documents using keyset pagination
+        
+        Returns the documents and the cursor for the next page (None on the
+        last page). Without a cursor the page number is honoured with skip,
+        so page-based clients keep working on the same stable order.
+        """
+        sort = with_tiebreaker(sort)
+        projection = resolve_projection(projection)
+        if projection:
+            # The cursor is built from the sort keys, so they must come back
+            projection = {**projection, **{field: 1 for field, _ in sort}}
+        query = filter_dict or {}
+        skip = 0
+        if cursor:
+            after = keyset_filter(sort, decode_cursor(cursor, sort))
+            query = {"$and": [query, after]} if query else after
+        else:
+            skip = (page - 1) * limit
+        
+        # Fetch one extra document to learn whether another page exists
+        raw = await self.db[collection].find(query, projection).sort(sort).skip(skip).limit(limit + 1).to_list(limit + 1)
+        next_cursor = cursor_for(raw[limit - 1], sort) if len(raw) > limit else None
+        return [self._to_api(document) for document in raw[:limit]], next_cursor
+    
+    async def get_documents_by_ids(self, collection: str, document_ids: List[str],
+                                   projection: Optional[Projection] = None) -> Dict[str, dict]:
+        """Get many documents by ID in one query, keyed by their id"""
+        ids = list(dict.fromkeys(document_ids))
+        if not ids:
+            return {}
+        projection = resolve_projection(projection)
+        if not document_cache.is_cached(collection):
+            cursor = self.db[collection].find(self.id_filter({"$in": ids}), projection)
+            documents = {}
+            async for document in cursor:
+                document = self._to_api(document)
+                documents[document['id']] = document
+            return documents
+        
+        # Serve what the cache holds and fetch only the rest, as whole documents
+        cached = {}
+        for document_id in ids:
+            document = document_cache.get(collection, document_id)
+            if document is not None:
+                cached[document_id] = document
+        missing = [document_id for document_id in ids if document_id not in cached]
+        if missing:
+            token = document_cache.begin_read()
+            fetched = {}
+            try:
+                async for document in self.db[collection].find(self.id_filter({"$in": missing})):
+                    fetched[document.get('id', document['_id'])] = document
+            finally:
+                document_cache.end_read(collection, fetched, token)
+            cached.update(fetched)
+        return {
+            document_id: self._to_api(apply_projection(document, projection))
+            for document_id, document in cached.items()
+        }
+    
     async def update_document(self, collection: str, document_id: str, update_dict: dict) -> bool:
         """Update document by ID"""
-        # Try both _id and id fields for compatibility
         result = await self.db[collection].update_one(
-            {"_id": document_id}, 
+            self.id_filter(document_id),
             {"$set": update_dict}
         )
-        if result.modified_count == 0:
-            result = await self.db[collection].update_one(
-                {"id": document_id}, 
-                {"$set": update_dict}
-            )
+        document_cache.invalidate(collection, document_id)
         return result.modified_count > 0
     
     async def delete_document(self, collection: str, document_id: str) -> bool:
         """Delete document by ID"""
-        # Try both _id and id fields for compatibility
-        result = await self.db[collection].delete_one({"_id": document_id})
-        if result.deleted_count == 0:
-            result = await self.db[collection].delete_one({"id": document_id})
+        result = await self.db[collection].delete_one(self.id_filter(document_id))
+        document_cache.invalidate(collection, document_id)
         return result.deleted_count > 0
     
+    # Bulk operations
+    def _update_spec(self, update_dict: Any) -> Any:
+        """Treat plain field dicts as $set, pass update operators and pipelines through"""
+        if isinstance(update_dict, list):
+            return update_dict
+        if update_dict and all(key.startswith('$') for key in update_dict):
+            return update_dict
+        return {"$set": update_dict}
+    
+    async def update_many(self, collection: str, filter_dict: dict, update_dict: dict,
+                          session=None) -> Dict[str, int]:
+        """Update every document matching a filter in one round trip"""
+        result = await self.db[collection].update_many(filter_dict, self._update_spec(update_dict), session=session)
+        self._invalidate(collection, None, session)
+        return {"matched": result.matched_count, "modified": result.modified_count}
+    
+    async def find_one_and_update(self, collection: str, filter_dict: dict, update_dict: Any,
+                                  projection: Optional[Projection] = None, return_updated: bool = True,
+                                  upsert: bool = False, session=None) -> Optional[dict]:
+        """Atomically update the first document matching a guard filter
+        
+        Returns the document as it is after the update (or before it with
+        return_updated=False), or None when nothing matched the filter.
+        """
+        projection = resolve_projection(projection)
+        if projection:
+            # The id is needed to invalidate the cached copy
+            projection = {**projection, "id": 1}
+        document = await self.db[collection].find_one_and_update(
+            filter_dict,
+            self._update_spec(update_dict),
+            projection=projection,
+            return_document=ReturnDocument.AFTER if return_updated else ReturnDocument.BEFORE,
+            upsert=upsert,
+            session=session
+        )
+        if document:
+            self._to_api(document)
+            self._invalidate(collection, document['id'], session)
+        return document
+    
+    # Transactions
+    @asynccontextmanager
+    async def transaction(self):
+        """Run the block in a multi-document transaction when the server supports it
+        
+        Yields the session to pass to write methods, or None on a standalone
+        server, where callers must tolerate the writes landing one by one.
+        """
+        if not self.transactions_supported:
+            yield None
+            return
+        async with await self.client.start_session() as session:
+            self._transaction_invalidations[id(session)] = []
+            try:
+                async with session.start_transaction():
+                    yield session
+            finally:
+                pending = self._transaction_invalidations.pop(id(session), [])
+            # Reads during the transaction may have cached pre-commit data
+            for collection, document_id in pending:
+                self._invalidate(collection, document_id)
+    
+    def _invalidate(self, collection: str, document_id: Optional[str], session=None):
+        """Drop written documents from the cache, again after commit inside a transaction"""
+        if document_id is None:
+            document_cache.invalidate_collection(collection)
+        else:
+            document_cache.invalidate(collection, document_id)
+        if session is not None and id(session) in self._transaction_invalidations:
+            self._transaction_invalidations[id(session)].append((collection, document_id))
+    
+    async def insert_many(self, collection: str, documents: List[dict], ordered: bool = True) -> List[str]:
+        """Insert many documents in one round trip
+        
+        With ordered=False the server keeps going past individual failures
+        and a BulkWriteError reports them after the batch.
+        """
+        if not documents:
+            return []
+        try:
+            result = await self.db[collection].insert_many(
+                [self._to_db(document) for document in documents], ordered=ordered
+            )
+        finally:
+            document_cache.invalidate_collection(collection)
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+    
+    async def bulk_write(self, collection: str, operations: list, ordered: bool = True,
+                         invalidate_ids: Optional[List[str]] = None) -> Dict[str, int]:
+        """Send a batch of pymongo write operations in one round trip
+        
+        Pass invalidate_ids when the operations only touch known documents so
+        just those leave the document cache; otherwise the whole collection does.
+        """
+        if not operations:
+            return {"inserted": 0, "matched": 0, "modified": 0, "deleted": 0, "upserted": 0}
+        try:
+            result = await self.db[collection].bulk_write(operations, ordered=ordered)
+        finally:
+            if invalidate_ids is None:
+                document_cache.invalidate_collection(collection)
+            else:
+                for document_id in invalidate_ids:
+                    document_cache.invalidate(collection, document_id)
+        return {
+            "inserted": result.inserted_count,
+            "matched": result.matched_count,
+            "modified": result.modified_count,
+            "deleted": result.deleted_count,
+            "upserted": result.upserted_count
+        }
+    
     async def count_documents(self, collection: str, filter_dict: dict = None) -> int:
         """Count documents in collection"""
         filter_dict = filter_dict or {}
         return await self.db[collection].count_documents(filter_dict)
     
+    async def distinct(self, collection: str, field: str, filter_dict: dict = None) -> list:
+        """Get the distinct values of a field, computed server-side"""
+        return await self.db[collection].distinct(field, filter_dict or {})
+    
+    async def aggregate(self, collection: str, pipeline: List[dict], limit: Optional[int] = None) -> List[dict]:
+        """Run an aggregation pipeline and return its results"""
+        return await self.db[collection].aggregate(pipeline).to_list(limit)
+    
     # Specialized queries
     async def get_user_by_email(self, email: str) -> Optional[dict]:
         """Get user by email"""
@@ -141,20 +429,75 @@ class DatabaseService:
         """Get reviews for a professional"""
         return await self.get_documents('reviews', {"professionalId": professional_id})
     
+    async def get_conversations(self, job_filter: dict, user_id: str) -> List[dict]:
+        """Get job conversations with their latest message and unread count
+        
+        One aggregation over job_requests: each matched job looks up its
+        newest message and counts the messages still unread by the user,
+        both through the job_messages indexes, and the result is sorted by
+        latest activity on the server.
+        """
+        pipeline = [
+            {"$match": job_filter},
+            {"$addFields": {"job_id": {"$ifNull": ["$id", "$_id"]}}},
+            {"$lookup": {
+                "from": "job_messages",
+                "let": {"job_id": "$job_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$job_request_id", "$$job_id"]}}},
+                    {"$sort": {"sent_at": -1, "_id": -1}},
+                    {"$limit": 1},
+                    {"$addFields": {"id": {"$ifNull": ["$id", "$_id"]}}},
+                    {"$project": {"_id": 0}}
+                ],
+                "as": "latest"
+            }},
+            {"$lookup": {
+                "from": "job_messages",
+                "let": {"job_id": "$job_id"},
+                "pipeline": [
+                    {"$match": {
+                        "recipient_id": user_id,
+                        "status": {"$in": ["sent", "delivered"]},
+                        "$expr": {"$eq": ["$job_request_id", "$$job_id"]}
+                    }},
+                    {"$count": "n"}
+                ],
+                "as": "unread"
+            }},
+            {"$project": {
+                "_id": 0,
+                "job_id": 1,
+                "job_title": "$title",
+                "job_status": "$status",
+                "latest_message": {"$ifNull": [{"$arrayElemAt": ["$latest", 0]}, None]},
+                "unread_count": {"$ifNull": [{"$arrayElemAt": ["$unread.n", 0]}, 0]},
+                "updated_at": {"$ifNull": [{"$arrayElemAt": ["$latest.sent_at", 0]}, "$posted_at"]}
+            }},
+            {"$sort": {"updated_at": -1}}
+        ]
+        return await self.aggregate("job_requests", pipeline)
+    
     async def get_platform_stats(self) -> dict:
-        """Get platform statistics"""
+        """Get platform statistics from the materialised counters document"""
+        from services.platform_counters import platform_counters
+        return await platform_counters.get()
+    
+    async def compute_platform_stats(self) -> dict:
+        """Recompute platform statistics with full scans (used for reconciliation)"""
         stats = {}
         stats['totalProjects'] = await self.count_documents('projects')
         stats['verifiedProfessionals'] = await self.count_documents('professionals', {"isVerified": True})
         stats['totalUsers'] = await self.count_documents('users')
         stats['completedProjects'] = await self.count_documents('projects', {"status": "completed"})
         
-        # Calculate average rating
+        # Rating sum and count rather than the average, so reviews can be added incrementally
         pipeline = [
-            {"$group": {"_id": None, "avgRating": {"$avg": "$rating"}}}
+            {"$group": {"_id": None, "ratingSum": {"$sum": "$rating"}, "ratingCount": {"$sum": {"$cond": [{"$isNumber": "$rating"}, 1, 0]}}}}
         ]
         result = await self.db['reviews'].aggregate(pipeline).to_list(1)
-        stats['averageRating'] = round(result[0]['avgRating'], 1) if result else 4.8
+        stats['ratingSum'] = result[0]['ratingSum'] if result else 0
+        stats['ratingCount'] = result[0]['ratingCount'] if result else 0
         
         return stats
 
@@ -0,0 +1,204 @@
+"""
+Read-through document cache for DatabaseService.
+
+Caches whole documents by (collection, id) with a TTL and an LRU bound on both
+entry count and encoded bytes, configured per collection. Collections that
+are not configured bypass the cache entirely. Every write path in
+DatabaseService and every Beanie save/insert/replace/delete invalidates the
+affected entries, and reads that raced a write are never stored, so a process
+never serves data older than its own last write.
+
+Configure with DOC_CACHE_CONFIG, a JSON object keyed by collection name:
+
+    {"job_requests": {"ttl": 30, "max_entries": 5000, "max_bytes": 16777216}}
+"""
+
+import copy
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import bson
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 30.0
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+# Invalidation marks kept for in-flight reads before falling back to a full epoch bump
+MAX_INVALIDATION_MARKS = 10000
+
+
+class CollectionCache:
+    """TTL + LRU store for one collection"""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self._entries: "OrderedDict[Any, Tuple[float, int, dict]]" = OrderedDict()
+        self.size_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Any) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, _, document = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return document
+
+    def put(self, key: Any, document: dict):
+        size = len(bson.encode(document))
+        if size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, document)
+        self.size_bytes += size
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key: Any):
+        if self._remove(key):
+            self.invalidations += 1
+
+    def clear(self):
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def _remove(self, key: Any) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.size_bytes -= entry[1]
+        return True
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self.size_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+
+class DocumentCache:
+    """Per-collection read-through cache with write invalidation"""
+
+    def __init__(self):
+        self._collections: Dict[str, CollectionCache] = {}
+        # Logical clock used to reject stores from reads that raced a write
+        self._clock = 0
+        self._invalidated_at: Dict[Tuple[str, Any], int] = {}
+        self._epoch: Dict[str, int] = {}
+        self._inflight = 0
+
+    def load_config(self, raw: str):
+        """Configure collections from a DOC_CACHE_CONFIG JSON string"""
+        if not raw.strip():
+            return
+        try:
+            config = json.loads(raw)
+        except ValueError as e:
+            logger.error(f"Ignoring invalid DOC_CACHE_CONFIG: {e}")
+            return
+        for collection, options in config.items():
+            self.configure(collection, **options)
+
+    def configure(self, collection: str, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES,
+                  max_bytes: int = DEFAULT_MAX_BYTES, enabled: bool = True):
+        """Enable caching for a collection"""
+        cache = CollectionCache(ttl, max_entries, max_bytes)
+        cache.enabled = enabled
+        self._collections[collection] = cache
+
+    def set_enabled(self, collection: str, enabled: bool):
+        """Turn caching on or off for a configured collection"""
+        cache = self._collections.get(collection)
+        if cache:
+            cache.enabled = enabled
+            if not enabled:
+                cache.clear()
+
+    def is_cached(self, collection: str) -> bool:
+        cache = self._collections.get(collection)
+        return bool(cache and cache.enabled)
+
+    def get(self, collection: str, document_id: Any) -> Optional[dict]:
+        """Get a private copy of a cached document, or None on a miss"""
+        document = self._collections[collection].get(document_id)
+        return copy.deepcopy(document) if document is not None else None
+
+    def begin_read(self) -> int:
+        """Start a read-through miss; the token guards the later store"""
+        self._inflight += 1
+        return self._clock
+
+    def end_read(self, collection: str, documents: Dict[Any, dict], token: int):
+        """Store documents fetched after begin_read, skipping any a write raced"""
+        self._inflight -= 1
+        try:
+            if not documents or not self.is_cached(collection):
+                return
+            if self._epoch.get(collection, 0) > token:
+                return
+            cache = self._collections[collection]
+            for document_id, document in documents.items():
+                if self._invalidated_at.get((collection, document_id), 0) <= token:
+                    cache.put(document_id, copy.deepcopy(document))
+        finally:
+            if self._inflight == 0:
+                self._invalidated_at.clear()
+
+    def invalidate(self, collection: str, document_id: Any):
+        """Drop one document after a write"""
+        if collection not in self._collections:
+            return
+        self._clock += 1
+        self._collections[collection].invalidate(document_id)
+        if self._inflight:
+            if len(self._invalidated_at) >= MAX_INVALIDATION_MARKS:
+                self.invalidate_collection(collection)
+                return
+            self._invalidated_at[(collection, document_id)] = self._clock
+
+    def invalidate_collection(self, collection: str):
+        """Drop every document of a collection after a multi-document write"""
+        if collection not in self._collections:
+            return
+        self._clock += 1
+        self._epoch[collection] = self._clock
+        self._collections[collection].clear()
+
+    def metrics(self) -> dict:
+        return {name: cache.metrics() for name, cache in self._collections.items()}
+
+
+# Global document cache instance, configured by DatabaseService from DOC_CACHE_CONFIG
+document_cache = DocumentCache()
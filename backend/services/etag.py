@@ -0,0 +1,118 @@
+"""
+Entity tags and conditional GET.
+
+``ETagMiddleware`` gives every 200 GET response under the registered path
+prefixes a strong ETag hashed from its body, unless the handler (or the
+response cache) already set one, and answers a matching ``If-None-Match``
+with a bodiless 304. Handlers that can derive a tag from a version stamp
+such as ``updated_at`` check it themselves with ``is_not_modified`` before
+doing the expensive part of their work.
+"""
+
+import hashlib
+from typing import Any, Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+ETAG_HEADER = b"etag"
+
+# Headers a 304 keeps; everything describing the omitted body is dropped
+NOT_MODIFIED_HEADERS = {b"etag", b"cache-control", b"vary", b"expires", b"content-location"}
+
+
+def content_etag(body: bytes) -> str:
+    """Strong ETag from a hash of the response bytes"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def version_etag(*parts: Any, weak: bool = False) -> str:
+    """ETag from version stamps such as an id and updated_at"""
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 7232)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Whether a conditional request already holds this representation"""
+    return etag_matches(request.headers.get("if-none-match"), etag)
+
+
+def not_modified(etag: str) -> Response:
+    """Bodiless 304 response for a matching conditional request"""
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def with_etag(headers: List[Tuple[bytes, bytes]], body: bytes) -> List[Tuple[bytes, bytes]]:
+    """Add a content ETag to response headers that lack one"""
+    if _header(headers, ETAG_HEADER) is not None:
+        return headers
+    return headers + [(ETAG_HEADER, content_etag(body).encode())]
+
+
+class ETagMiddleware:
+    """ASGI middleware adding ETags and answering conditional GETs with 304"""
+
+    def __init__(self, app, prefixes: Iterable[str] = ()):
+        self.app = app
+        self.prefixes = tuple(prefix.rstrip("/") for prefix in prefixes)
+
+    def _applies(self, scope) -> bool:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return False
+        path = scope["path"]
+        return any(path == prefix or path.startswith(prefix + "/") for prefix in self.prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if not self._applies(scope):
+            await self.app(scope, receive, send)
+            return
+
+        started = {}
+        body = []
+
+        async def buffer(message):
+            if message["type"] == "http.response.start":
+                started.update(message)
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+
+        await self.app(scope, receive, buffer)
+        status = started.get("status", 500)
+        headers = list(started.get("headers", []))
+        content = b"".join(body)
+
+        if status == 200:
+            headers = with_etag(headers, content)
+            if_none_match = None
+            for name, value in scope.get("headers", []):
+                if name == b"if-none-match":
+                    if_none_match = value.decode("latin-1")
+                    break
+            if etag_matches(if_none_match, _header(headers, ETAG_HEADER).decode("latin-1")):
+                status, content = 304, b""
+                headers = [(name, value) for name, value in headers if name.lower() in NOT_MODIFIED_HEADERS]
+
+        await send({**started, "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": content})
@@ -0,0 +1,126 @@
+"""
+Canonical id migration.
+
+Documents written through Beanie store the application id as ``_id``. Older
+documents written through ``DatabaseService.create_document`` carry the
+application id in an ``id`` field next to a generated ObjectId ``_id``, which
+is why lookups had to try both keys. This tool rewrites every legacy document
+so its application id becomes ``_id`` and the ``id`` field is dropped.
+
+Run from the backend directory:
+
+    python -m services.id_migration            # report what would change
+    python -m services.id_migration --apply    # migrate all collections
+
+Once the report shows no legacy documents, set ``DB_ID_RESOLUTION=canonical``
+so DatabaseService resolves ids against ``_id`` only.
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from pymongo import DeleteOne, InsertOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Documents whose _id differs from their legacy id field
+LEGACY_FILTER = {"id": {"$exists": True}, "$expr": {"$ne": ["$_id", "$id"]}}
+
+# Documents already keyed correctly that still carry a duplicate id field
+DUPLICATE_FILTER = {"id": {"$exists": True}, "$expr": {"$eq": ["$_id", "$id"]}}
+
+
+async def count_legacy(db, collection: str) -> Dict[str, int]:
+    """Count documents that still need migrating in one collection"""
+    return {
+        "legacy": await db[collection].count_documents(LEGACY_FILTER),
+        "duplicate_id_field": await db[collection].count_documents(DUPLICATE_FILTER),
+    }
+
+
+async def migrate_collection(db, collection: str, batch_size: int = 500) -> Dict[str, int]:
+    """Re-key legacy documents of one collection onto _id"""
+    coll = db[collection]
+    result = {"migrated": 0, "conflicts": 0, "cleaned": 0}
+    skipped = []
+
+    # _id is immutable, so each legacy document is re-inserted under its
+    # application id and the old copy is removed in the same batch
+    while True:
+        query = {**LEGACY_FILTER, "_id": {"$nin": skipped}} if skipped else LEGACY_FILTER
+        batch = await coll.find(query).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+
+        existing = await coll.find(
+            {"_id": {"$in": [doc["id"] for doc in batch]}}, {"_id": 1}
+        ).to_list(None)
+        taken = {doc["_id"] for doc in existing}
+
+        operations = []
+        conflicts: List[str] = []
+        for doc in batch:
+            if doc["id"] in taken:
+                conflicts.append(doc["id"])
+                skipped.append(doc["_id"])
+                continue
+            new_doc = {k: v for k, v in doc.items() if k not in ("_id", "id")}
+            new_doc["_id"] = doc["id"]
+            operations.append(InsertOne(new_doc))
+            operations.append(DeleteOne({"_id": doc["_id"]}))
+
+        if conflicts:
+            # Leave both copies in place for manual review
+            result["conflicts"] += len(conflicts)
+            logger.warning(f"{collection}: {len(conflicts)} ids already exist as _id, skipped: {conflicts[:10]}")
+
+        if not operations:
+            continue
+
+        try:
+            write = await coll.bulk_write(operations, ordered=True)
+        except BulkWriteError as e:
+            logger.error(f"{collection}: migration batch failed: {e.details.get('writeErrors', [])[:3]}")
+            raise
+        result["migrated"] += write.inserted_count
+
+    cleaned = await coll.update_many(DUPLICATE_FILTER, {"$unset": {"id": ""}})
+    result["cleaned"] = cleaned.modified_count
+    return result
+
+
+async def _main(apply: bool, collections: Optional[List[str]] = None) -> int:
+    from services.database import db_service
+
+    await db_service.connect_client()
+    try:
+        names = collections or sorted(await db_service.db.list_collection_names())
+        remaining = 0
+        for name in names:
+            counts = await count_legacy(db_service.db, name)
+            pending = counts["legacy"] + counts["duplicate_id_field"]
+            if not apply:
+                print(f"{name}: {counts['legacy']} legacy, {counts['duplicate_id_field']} with duplicate id field")
+                remaining += pending
+                continue
+            if not pending:
+                print(f"{name}: already canonical")
+                continue
+            result = await migrate_collection(db_service.db, name)
+            print(f"{name}: migrated {result['migrated']}, cleaned {result['cleaned']}, conflicts {result['conflicts']}")
+            remaining += result["conflicts"]
+        print(f"\n{remaining} documents not on the canonical _id key")
+        return 0 if remaining == 0 else 1
+    finally:
+        await db_service.close_database_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Normalise every collection onto the canonical _id key")
+    parser.add_argument("--apply", action="store_true", help="Rewrite legacy documents")
+    parser.add_argument("collections", nargs="*", help="Collections to process (default: all)")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.apply, args.collections)))
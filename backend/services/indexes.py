@@ -0,0 +1,278 @@
+"""
+Index registry and reconciliation for the Beanie document models.
+
+Every document model declares the indexes its queries rely on in
+``Settings.indexes``. The IndexManager compares those declarations with the
+indexes that exist in MongoDB, creates the missing ones and flags indexes that
+are undeclared, redundant (a prefix of another index) or unused according to
+``$indexStats``.
+
+An index whose live name or options (unique, sparse, partial filter, TTL)
+differ from its declaration has drifted. Beanie's own index pass would fail
+on it with IndexOptionsConflict, so drifted indexes are either rebuilt (drop
+and create as declared) or, when rebuilding is off, logged and left out of
+Beanie's pass for this run. Startup only rebuilds with
+INDEX_REBUILD_ON_STARTUP set; otherwise nothing is dropped automatically.
+
+Run ``python -m services.indexes`` from the backend directory to print the plan
+and the diff against the live database, or add ``--apply`` to create the
+missing indexes and rebuild the drifted ones.
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+IndexKey = Tuple[Tuple[str, Any], ...]
+
+# Index options that change what an index enforces or keeps
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def collection_name(model) -> str:
+    """Resolve the collection name Beanie uses for a document model"""
+    settings = getattr(model, "Settings", None)
+    return getattr(settings, "name", None) or model.__name__
+
+
+def declared_indexes(model) -> List[Dict[str, Any]]:
+    """Get the index specs declared in a model's Settings.indexes"""
+    settings = getattr(model, "Settings", None)
+    specs = []
+    for index in getattr(settings, "indexes", None) or []:
+        document = dict(index.document)
+        specs.append({
+            "name": document.pop("name"),
+            "key": tuple(document.pop("key").items()),
+            "options": document,
+        })
+    return specs
+
+
+def _live_spec(name: str, info: Dict[str, Any]) -> Dict[str, Any]:
+    options = {k: v for k, v in info.items() if k in COMPARED_OPTIONS}
+    return {"name": name, "key": tuple((f, d) for f, d in info["key"]), "options": options}
+
+
+def _plain(value: Any) -> Any:
+    """Turn SON and numeric variants into plain values so option comparison ignores them"""
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _compared_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    # unique=False and sparse=False are the defaults the server does not report
+    return {k: _plain(v) for k, v in options.items() if k in COMPARED_OPTIONS and v is not False}
+
+
+def option_drift(declared: Dict[str, Any], live: Dict[str, Any]) -> List[str]:
+    """Names of the settings where a live index differs from its declaration"""
+    drift = [] if declared["name"] == live["name"] else ["name"]
+    declared_options, live_options = _compared_options(declared["options"]), _compared_options(live["options"])
+    drift += [
+        option for option in COMPARED_OPTIONS
+        if declared_options.get(option) != live_options.get(option)
+    ]
+    return drift
+
+
+def _is_prefix(shorter: IndexKey, longer: IndexKey) -> bool:
+    return len(shorter) < len(longer) and longer[:len(shorter)] == shorter
+
+
+class CollectionIndexPlan:
+    """Diff between declared and live indexes for one collection"""
+
+    def __init__(self, collection: str, declared: List[Dict[str, Any]], live: List[Dict[str, Any]],
+                 usage: Optional[Dict[str, int]] = None, model: Any = None):
+        self.collection = collection
+        self.declared = declared
+        self.live = live
+        self.usage = usage
+        self.model = model
+
+        live_by_key = {spec["key"]: spec for spec in live}
+        live_keys = set(live_by_key)
+        declared_keys = {spec["key"] for spec in declared}
+
+        self.missing = [spec for spec in declared if spec["key"] not in live_keys]
+        # (declared, live, differing settings) for indexes whose key exists with other options
+        self.drifted = []
+        for spec in declared:
+            if spec["key"] in live_keys:
+                drift = option_drift(spec, live_by_key[spec["key"]])
+                if drift:
+                    self.drifted.append((spec, live_by_key[spec["key"]], drift))
+        self.undeclared = [
+            spec for spec in live
+            if spec["name"] != "_id_" and spec["key"] not in declared_keys
+        ]
+
+        # A non-unique index whose key is a prefix of another index can be
+        # served by the longer one and only costs write amplification
+        all_keys = live_keys | declared_keys
+        self.redundant = [
+            spec for spec in live + self.missing
+            if not spec["options"].get("unique")
+            and any(_is_prefix(spec["key"], other) for other in all_keys)
+        ]
+
+        # $indexStats counters reset on restart, so this is only a hint
+        self.unused = [
+            spec for spec in live
+            if usage is not None and spec["name"] != "_id_" and usage.get(spec["name"], 0) == 0
+        ]
+
+    def format(self) -> str:
+        """Render the plan as human-readable text"""
+        lines = [f"{self.collection}:"]
+        drifted = {declared["name"]: (live, drift) for declared, live, drift in self.drifted}
+        for spec in self.declared:
+            marker = "+" if spec in self.missing else "~" if spec["name"] in drifted else " "
+            lines.append(f"  {marker} {spec['name']} {_format_options(spec['options'])}".rstrip())
+            if spec["name"] in drifted:
+                live, drift = drifted[spec["name"]]
+                lines.append(f"      live {live['name']} {_format_options(live['options'])} "
+                             f"(drifted: {', '.join(drift)})".rstrip())
+        for spec in self.undeclared:
+            lines.append(f"  ? {spec['name']} (live, not declared)")
+        for spec in self.redundant:
+            lines.append(f"  ! {spec['name']} (redundant: prefix of another index)")
+        for spec in self.unused:
+            lines.append(f"  - {spec['name']} (no recorded accesses)")
+        return "\n".join(lines)
+
+
+def _format_options(options: Dict[str, Any]) -> str:
+    return " ".join(f"{k}={v}" for k, v in sorted(options.items()))
+
+
+class IndexManager:
+    """Builds and applies index plans for a set of document models"""
+
+    async def _index_usage(self, collection) -> Optional[Dict[str, int]]:
+        try:
+            stats = await collection.aggregate([{"$indexStats": {}}]).to_list(None)
+        except Exception as e:
+            logger.debug(f"$indexStats unavailable for {collection.name}: {e}")
+            return None
+        return {s["name"]: int(s.get("accesses", {}).get("ops", 0)) for s in stats}
+
+    async def plan(self, db, models: List[Any], include_usage: bool = True) -> List[CollectionIndexPlan]:
+        """Compare the declared indexes of each model with the live database"""
+        plans = []
+        for model in models:
+            name = collection_name(model)
+            collection = db[name]
+            info = await collection.index_information()
+            live = [_live_spec(index_name, index_info) for index_name, index_info in info.items()]
+            usage = await self._index_usage(collection) if include_usage and live else None
+            plans.append(CollectionIndexPlan(name, declared_indexes(model), live, usage, model=model))
+        return plans
+
+    async def _create(self, db, collection: str, spec: Dict[str, Any]):
+        await db[collection].create_index(list(spec["key"]), name=spec["name"], **spec["options"])
+
+    async def _rebuild(self, db, plan: CollectionIndexPlan, declared: Dict[str, Any], live: Dict[str, Any]) -> bool:
+        """Replace a drifted index with its declaration, restoring the live one if the build fails"""
+        await db[plan.collection].drop_index(live["name"])
+        try:
+            await self._create(db, plan.collection, declared)
+        except Exception as e:
+            logger.error(f"Failed to rebuild index {plan.collection}.{declared['name']}, restoring the live one: {e}")
+            await self._create(db, plan.collection, live)
+            return False
+        logger.info(f"Rebuilt index {plan.collection}.{declared['name']}")
+        return True
+
+    def _skip_in_beanie(self, plan: CollectionIndexPlan, name: str):
+        """Leave a declared index out of Beanie's index pass for this process"""
+        settings = getattr(plan.model, "Settings", None)
+        if settings is not None:
+            settings.indexes = [index for index in settings.indexes if index.document["name"] != name]
+
+    async def apply(self, db, plans: List[CollectionIndexPlan], rebuild: bool = False) -> int:
+        """Create missing indexes and, with rebuild, rebuild drifted ones, returning how many were built
+        
+        A drifted index that is not rebuilt, or a missing one that fails to
+        build, is logged and left out of Beanie's index pass, so startup
+        keeps going instead of failing.
+        """
+        created = 0
+        for plan in plans:
+            for spec in plan.missing:
+                try:
+                    await self._create(db, plan.collection, spec)
+                    created += 1
+                    logger.info(f"Created index {plan.collection}.{spec['name']}")
+                except Exception as e:
+                    # e.g. existing duplicates under a unique index; Beanie would fail on it too
+                    logger.error(f"Failed to create index {plan.collection}.{spec['name']}: {e}")
+                    self._skip_in_beanie(plan, spec["name"])
+            for declared, live, drift in plan.drifted:
+                rebuilt = False
+                if rebuild:
+                    try:
+                        rebuilt = await self._rebuild(db, plan, declared, live)
+                    except Exception as e:
+                        logger.error(f"Failed to rebuild index {plan.collection}.{declared['name']}: {e}")
+                else:
+                    logger.error(f"Index {plan.collection}.{live['name']} differs from its declaration in "
+                                 f"{', '.join(drift)}; keeping the live index "
+                                 f"(run python -m services.indexes --apply to rebuild it)")
+                if rebuilt:
+                    created += 1
+                else:
+                    self._skip_in_beanie(plan, declared["name"])
+        return created
+
+    async def reconcile(self, db, models: List[Any], rebuild: bool = False) -> List[CollectionIndexPlan]:
+        """Create missing indexes and log any that look drifted, undeclared, redundant or unused"""
+        plans = await self.plan(db, models)
+        await self.apply(db, plans, rebuild=rebuild)
+        for plan in plans:
+            for spec in plan.undeclared:
+                logger.warning(f"Index {plan.collection}.{spec['name']} exists but is not declared")
+            for spec in plan.redundant:
+                logger.warning(f"Index {plan.collection}.{spec['name']} is redundant with a longer index")
+            for spec in plan.unused:
+                logger.info(f"Index {plan.collection}.{spec['name']} has no recorded accesses")
+        return plans
+
+
+# Global index manager instance
+index_manager = IndexManager()
+
+
+async def _main(apply: bool) -> int:
+    from services.database import db_service
+
+    await db_service.connect_client()
+    try:
+        plans = await index_manager.plan(db_service.db, db_service.document_models())
+        for plan in plans:
+            print(plan.format())
+        missing = sum(len(plan.missing) + len(plan.drifted) for plan in plans)
+        if apply:
+            created = await index_manager.apply(db_service.db, plans, rebuild=True)
+            print(f"\nBuilt {created} of {missing} missing or drifted indexes")
+        else:
+            print(f"\n{missing} missing or drifted indexes (run with --apply to build them)")
+        return 0 if apply or not missing else 1
+    finally:
+        await db_service.close_database_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show or apply the index plan for all document models")
+    parser.add_argument("--apply", action="store_true", help="Create missing indexes and rebuild drifted ones")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.apply)))
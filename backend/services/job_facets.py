@@ -0,0 +1,143 @@
+"""
+Faceted filter counts for the job board.
+
+One ``$facet`` aggregation counts the visible jobs per category, status,
+priority and postcode region (the first digit of the postcode), instead of a
+``count_documents`` call per filter value. Counts are disjunctive: each facet
+applies every selected filter except its own, so the category counts still
+show the other categories while one is selected.
+
+Results are cached per filter signature (visibility filter plus selections)
+for JOB_FACETS_TTL_SECONDS; professionals with the same service areas share
+entries. Concurrent misses on one signature share a single aggregation.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from bson import json_util
+
+from services.database import db_service
+from services.postcodes import POSTCODE_REGIONS
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "job_requests"
+
+# Facet name -> grouped expression; each facet ignores the selection of the same name
+FACETS = {
+    "category": "$category",
+    "status": "$status",
+    "priority": "$priority",
+    "region": {"$substrCP": ["$postcode", 0, 1]},
+}
+
+
+class JobFacets:
+    """Short-lived cache of job board facet counts"""
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.aggregations = 0
+        self.aggregation_seconds = 0.0
+
+    @staticmethod
+    def signature(visibility: dict, selections: dict) -> str:
+        return json_util.dumps([visibility, selections], sort_keys=True)
+
+    @staticmethod
+    def pipeline(visibility: dict, selections: dict) -> List[dict]:
+        """The visibility match, then one group per facet under the other selections"""
+        facets = {"total": [{"$match": selections}, {"$count": "count"}]}
+        for name, expression in FACETS.items():
+            others = {field: value for field, value in selections.items() if field != name}
+            facets[name] = [
+                {"$match": others},
+                {"$group": {"_id": expression, "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}}
+            ]
+        return [{"$match": visibility}, {"$facet": facets}]
+
+    @staticmethod
+    def _shape(result: dict) -> dict:
+        counts = {"total": result["total"][0]["count"] if result["total"] else 0}
+        for name in FACETS:
+            counts[name] = [
+                {"value": bucket["_id"], "count": bucket["count"],
+                 "label": POSTCODE_REGIONS.get(bucket["_id"]) if name == "region" else None}
+                for bucket in result[name] if bucket["_id"] is not None
+            ]
+        return counts
+
+    async def _aggregate(self, visibility: dict, selections: dict) -> dict:
+        started = time.perf_counter()
+        results = await db_service.aggregate(COLLECTION, self.pipeline(visibility, selections), limit=1)
+        self.aggregations += 1
+        self.aggregation_seconds += time.perf_counter() - started
+        return self._shape(results[0])
+
+    def _cached(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _store(self, key: str, counts: dict):
+        self._entries[key] = (time.monotonic() + self.ttl, counts)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def counts(self, visibility: dict, selections: dict) -> dict:
+        """Facet counts for the jobs matching visibility, with the selected filters"""
+        key = self.signature(visibility, selections)
+        counts = self._cached(key)
+        if counts is not None:
+            self.hits += 1
+            return counts
+        self.misses += 1
+        if key in self._pending:
+            return await asyncio.shield(self._pending[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            counts = await self._aggregate(visibility, selections)
+            self._store(key, counts)
+            future.set_result(counts)
+            return counts
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; don't warn about an unretrieved exception
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+
+    def metrics(self) -> dict:
+        """Report cache and aggregation counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "aggregations": self.aggregations,
+            "avg_aggregation_ms": round(self.aggregation_seconds / self.aggregations * 1000, 2)
+            if self.aggregations else 0.0
+        }
+
+
+# Global job facet counts
+job_facets = JobFacets(ttl=float(os.environ.get("JOB_FACETS_TTL_SECONDS", "30")))
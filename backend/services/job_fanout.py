@@ -0,0 +1,206 @@
+"""
+Fan-out of new-job notifications to professionals in the job's area.
+
+Posting or submitting a job only queues it; a background worker finds the
+active professionals whose ``profile.service_areas`` include the job's
+postcode and writes their ``new_job_request`` notifications with unordered
+``insert_many`` calls of FANOUT_CHUNK_SIZE, so the request path does the same
+work whether one professional matches or thousands do.
+
+Each professional gets at most FANOUT_MAX_PER_PROFESSIONAL new-job
+notifications per FANOUT_RATE_WINDOW_SECONDS; jobs beyond the cap still reach
+them through the job feed. The cap is counted per worker process. Fan-out
+lag (time from queueing a job to its last notification being written) is
+reported in the metrics, along with the age of the oldest queued job.
+
+Each notification's id is derived from the job and the professional, so a
+job fanned out again (shutdown drains a job whose chunks were partly
+written) skips the notifications that already exist instead of duplicating them.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+from pymongo.errors import BulkWriteError
+
+from models.notification import Notification, NotificationType
+from services.database import db_service
+
+logger = logging.getLogger(__name__)
+
+# Job fields a queued fan-out keeps
+FANOUT_JOB_FIELDS = ("id", "customer_id", "title", "category", "postcode")
+
+# Namespace for the deterministic ids of new-job notifications
+FANOUT_NOTIFICATION_NAMESPACE = uuid.UUID("6f1d3c52-8a4e-4b7f-9c21-5e0a7d94b3f8")
+
+DUPLICATE_KEY = 11000
+
+
+def notification_id(job_id: str, professional_id: str) -> str:
+    """Id of a professional's notification about a job, the same on every fan-out attempt"""
+    return str(uuid.uuid5(FANOUT_NOTIFICATION_NAMESPACE, f"{job_id}:{professional_id}"))
+
+
+class JobFanout:
+    """Queue new jobs and notify matching professionals off the request path"""
+
+    def __init__(self, chunk_size: int = 500, max_per_professional: int = 20,
+                 rate_window: float = 3600.0, max_queued: int = 10000):
+        self.chunk_size = chunk_size
+        self.max_per_professional = max_per_professional
+        self.rate_window = rate_window
+        self.max_queued = max_queued
+        self._queue: Deque[Tuple[dict, float]] = deque()
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._window = 0
+        self._sent_in_window: Dict[str, int] = {}
+
+        self.fanned_out_jobs = 0
+        self.notifications = 0
+        self.rate_limited = 0
+        self.dropped_jobs = 0
+        self.failed_jobs = 0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+        self.total_lag_seconds = 0.0
+        self.last_fanout_at: Optional[datetime] = None
+
+    def enqueue(self, job: dict):
+        """Queue a newly opened job for fan-out without touching the database"""
+        if len(self._queue) >= self.max_queued:
+            self.dropped_jobs += 1
+            logger.error(f"Job fan-out queue full, not notifying professionals about job {job.get('id')}")
+            return
+        self._queue.append(({field: job.get(field) for field in FANOUT_JOB_FIELDS}, time.monotonic()))
+        if self._ready is not None:
+            self._ready.set()
+
+    async def _professionals_for(self, job: dict) -> List[str]:
+        professionals = await db_service.get_documents("users", {
+            "role": "professional",
+            "is_active": True,
+            "profile.service_areas": job["postcode"]
+        }, limit=0, projection={"id": 1})
+        return [professional["id"] for professional in professionals if professional["id"] != job.get("customer_id")]
+
+    def _admit(self, professional_ids: List[str]) -> List[str]:
+        """Apply the per-professional cap for the current window"""
+        window = int(time.time() // self.rate_window)
+        if window != self._window:
+            self._window, self._sent_in_window = window, {}
+        admitted = []
+        for professional_id in professional_ids:
+            sent = self._sent_in_window.get(professional_id, 0)
+            if sent >= self.max_per_professional:
+                self.rate_limited += 1
+                continue
+            self._sent_in_window[professional_id] = sent + 1
+            admitted.append(professional_id)
+        return admitted
+
+    def _template(self, job: dict) -> dict:
+        title = job.get("title") or job.get("category", "").replace("_", " ").capitalize()
+        notification = Notification(
+            user_id="",
+            type=NotificationType.NEW_JOB_REQUEST,
+            title="New job in your area",
+            message=f"{title} in {job['postcode']}",
+            job_request_id=job["id"],
+            data={"category": job.get("category"), "postcode": job["postcode"]}
+        )
+        return notification.model_dump(exclude={"id", "revision_id", "user_id"})
+
+    async def fan_out(self, job: dict) -> int:
+        """Write the job's notifications, returning how many were sent"""
+        professional_ids = self._admit(await self._professionals_for(job))
+        template = self._template(job)
+        sent = 0
+        for start in range(0, len(professional_ids), self.chunk_size):
+            chunk = professional_ids[start:start + self.chunk_size]
+            try:
+                await db_service.insert_many("notifications", [
+                    {**template, "id": notification_id(job["id"], professional_id), "user_id": professional_id}
+                    for professional_id in chunk
+                ], ordered=False)
+                sent += len(chunk)
+            except BulkWriteError as e:
+                # Notifications written by an earlier attempt are skipped, anything else fails the job
+                if any(error.get("code") != DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+                    raise
+                sent += e.details.get("nInserted", 0)
+        return sent
+
+    async def _drain(self):
+        while self._queue:
+            job, queued_at = self._queue[0]
+            try:
+                self.notifications += await self.fan_out(job)
+                self.fanned_out_jobs += 1
+            except Exception as e:
+                self.failed_jobs += 1
+                logger.error(f"Failed to notify professionals about job {job.get('id')}: {e}")
+            self._queue.popleft()
+            lag = time.monotonic() - queued_at
+            self.last_lag_seconds = lag
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+            self.total_lag_seconds += lag
+            self.last_fanout_at = datetime.utcnow()
+
+    async def _run(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            await self._drain()
+
+    def start(self):
+        """Start the fan-out worker"""
+        if self._task is None:
+            self._ready = asyncio.Event()
+            if self._queue:
+                self._ready.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker and fan out whatever is still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._ready = None
+        await self._drain()
+
+    def metrics(self) -> dict:
+        """Report queue, fan-out and lag counters"""
+        processed = self.fanned_out_jobs + self.failed_jobs
+        return {
+            "queued_jobs": len(self._queue),
+            "oldest_queued_seconds": round(time.monotonic() - self._queue[0][1], 3) if self._queue else 0.0,
+            "fanned_out_jobs": self.fanned_out_jobs,
+            "notifications": self.notifications,
+            "rate_limited": self.rate_limited,
+            "dropped_jobs": self.dropped_jobs,
+            "failed_jobs": self.failed_jobs,
+            "last_lag_seconds": round(self.last_lag_seconds, 3),
+            "avg_lag_seconds": round(self.total_lag_seconds / processed, 3) if processed else 0.0,
+            "max_lag_seconds": round(self.max_lag_seconds, 3),
+            "last_fanout_at": self.last_fanout_at
+        }
+
+
+# Global new-job fan-out
+job_fanout = JobFanout(
+    chunk_size=int(os.environ.get("FANOUT_CHUNK_SIZE", "500")),
+    max_per_professional=int(os.environ.get("FANOUT_MAX_PER_PROFESSIONAL", "20")),
+    rate_window=float(os.environ.get("FANOUT_RATE_WINDOW_SECONDS", "3600"))
+)
@@ -0,0 +1,293 @@
+"""
+Ranked job feed for professionals.
+
+Listing jobs for a professional used to be a ``postcode: {$in: service_areas}``
+query in posting order. The feed instead keeps an in-memory inverted index
+from postcode, category and the pair of both to the jobs still taking quotes (open or quoted
+with a free slot), each list pre-sorted by a static rank score. Serving a
+feed is a k-way merge of the professional's postcode lists, so matching and
+ranking never touch Mongo; only the page of ids that comes out is hydrated.
+Deeper pages resume from the previous page's last (-score, id) key, found
+with a bisect in each posting list, so every page costs the same.
+
+The score is fixed per job, so lists never need re-sorting as time passes:
+recency counts one point per day since posting and priority, budget and the
+share of quote slots left add bonus points on top.
+
+The index is loaded on startup and kept current by a sync loop that re-reads
+jobs whose ``updated_at`` moved (every job write bumps it), every
+JOB_FEED_SYNC_SECONDS or as soon as a write on this worker calls ``touch``.
+Deleted jobs are dropped with ``remove``, or when hydration no longer finds
+them.
+"""
+
+import asyncio
+import bisect
+import heapq
+import logging
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from services.database import db_service
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "job_requests"
+
+# Job statuses that still take new quotes, as in quote admission
+FEED_STATUSES = ("open", "quoted")
+
+# Fields the index ranks and files jobs by
+FEED_PROJECTION = {
+    "id": 1, "category": 1, "postcode": 1, "status": 1, "priority": 1, "posted_at": 1,
+    "budget_max": 1, "max_quotes": 1, "quotes_count": 1, "updated_at": 1
+}
+
+DEFAULT_MAX_QUOTES = 10
+
+SECONDS_PER_DAY = 86400.0
+
+# Rank bonuses, in days of recency
+PRIORITY_POINTS = {"low": 0.0, "medium": 0.5, "high": 1.5, "urgent": 3.0}
+BUDGET_POINTS_PER_DECADE = 0.5  # each tenfold budget_max
+SLOTS_POINTS = 1.0  # all quote slots free vs. the last one left
+
+# Writes that commit just before a sync starts may carry an older updated_at
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# (-score, job id): ascending order is best first, ties broken by id
+FeedKey = Tuple[float, str]
+
+
+def _slots_left(job: dict) -> int:
+    max_quotes = job.get("max_quotes")
+    max_quotes = DEFAULT_MAX_QUOTES if max_quotes is None else max_quotes
+    return max_quotes - (job.get("quotes_count") or 0)
+
+
+def is_feed_job(job: dict) -> bool:
+    """Whether a job belongs in the feed"""
+    return job.get("status") in FEED_STATUSES and job.get("posted_at") is not None and _slots_left(job) > 0
+
+
+def rank_score(job: dict) -> float:
+    """Static rank of a job; higher ranks first"""
+    score = job["posted_at"].timestamp() / SECONDS_PER_DAY
+    score += PRIORITY_POINTS.get(job.get("priority"), 0.0)
+    budget = job.get("budget_max") or 0
+    if budget > 0:
+        score += BUDGET_POINTS_PER_DECADE * math.log10(1 + budget)
+    max_quotes = job.get("max_quotes") or DEFAULT_MAX_QUOTES
+    score += SLOTS_POINTS * _slots_left(job) / max_quotes
+    return score
+
+
+class _Entry:
+    __slots__ = ("key", "postcode", "category")
+
+    def __init__(self, key: FeedKey, postcode: str, category: str):
+        self.key = key
+        self.postcode = postcode
+        self.category = category
+
+
+def _tail(keys: List[FeedKey], start: int) -> Iterable[FeedKey]:
+    """Iterate a posting list from start without copying it"""
+    return (keys[position] for position in range(start, len(keys)))
+
+
+class JobFeedIndex:
+    """Postcode and category posting lists of feed jobs, sorted by rank"""
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._by_postcode: Dict[str, List[FeedKey]] = {}
+        self._by_category: Dict[str, List[FeedKey]] = {}
+        self._by_postcode_category: Dict[Tuple[str, str], List[FeedKey]] = {}
+        self._ranked: List[FeedKey] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._entries
+
+    def upsert(self, job: dict):
+        """File a job under its postcode and category, or drop it if it left the feed"""
+        job_id = job["id"]
+        self.remove(job_id)
+        if not is_feed_job(job):
+            return
+        entry = _Entry((-rank_score(job), job_id), job.get("postcode"), job.get("category"))
+        self._entries[job_id] = entry
+        bisect.insort(self._by_postcode.setdefault(entry.postcode, []), entry.key)
+        bisect.insort(self._by_category.setdefault(entry.category, []), entry.key)
+        bisect.insort(self._by_postcode_category.setdefault((entry.postcode, entry.category), []), entry.key)
+        bisect.insort(self._ranked, entry.key)
+
+    def remove(self, job_id: str) -> bool:
+        """Drop a job from every posting list"""
+        entry = self._entries.pop(job_id, None)
+        if entry is None:
+            return False
+        self._discard(self._by_postcode, entry.postcode, entry.key)
+        self._discard(self._by_category, entry.category, entry.key)
+        self._discard(self._by_postcode_category, (entry.postcode, entry.category), entry.key)
+        del self._ranked[bisect.bisect_left(self._ranked, entry.key)]
+        return True
+
+    @staticmethod
+    def _discard(lists: Dict[Hashable, List[FeedKey]], name: Hashable, key: FeedKey):
+        keys = lists[name]
+        position = bisect.bisect_left(keys, key)
+        del keys[position]
+        if not keys:
+            del lists[name]
+
+    def match(self, postcodes: Optional[Iterable[str]] = None, category: Optional[str] = None,
+              offset: int = 0, limit: int = 20,
+              after: Optional[FeedKey] = None) -> Tuple[List[str], Optional[FeedKey]]:
+        """Ids of the best-ranked jobs in any of the postcodes and the category
+
+        No postcodes means every postcode. Each posting list is already in
+        rank order, so a page costs one k-way merge over the postcodes,
+        starting just past ``after`` (the previous page's last key) when given.
+        Also returns the key to resume from, or None on the last page.
+        """
+        if postcodes is None:
+            lists = [self._ranked if category is None else self._by_category.get(category, [])]
+        elif category is None:
+            lists = [self._by_postcode[postcode] for postcode in set(postcodes) if postcode in self._by_postcode]
+        else:
+            lists = [
+                self._by_postcode_category[(postcode, category)]
+                for postcode in set(postcodes) if (postcode, category) in self._by_postcode_category
+            ]
+        if after is not None:
+            lists = [_tail(keys, bisect.bisect_right(keys, after)) for keys in lists]
+        ranked = lists[0] if len(lists) == 1 else heapq.merge(*lists)
+        # One extra key tells whether another page follows
+        keys = list(islice(ranked, offset, offset + limit + 1))
+        next_key = keys[limit - 1] if len(keys) > limit else None
+        return [job_id for _, job_id in keys[:limit]], next_key
+
+
+class JobFeed:
+    """Keeps a JobFeedIndex in step with job_requests and serves ranked feeds"""
+
+    def __init__(self, sync_interval: float = 2.0):
+        self.sync_interval = sync_interval
+        self.index = JobFeedIndex()
+        self.ready = False
+        self._synced_from: Optional[datetime] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.rebuilds = 0
+        self.syncs = 0
+        self.synced_jobs = 0
+        self.evictions = 0
+        self.matches = 0
+        self.match_seconds = 0.0
+        self.last_synced_at: Optional[datetime] = None
+
+    async def _load(self, filter_dict: dict) -> List[dict]:
+        return await db_service.get_documents(COLLECTION, filter_dict, limit=0, projection=FEED_PROJECTION)
+
+    async def rebuild(self):
+        """Load every feed job into a fresh index"""
+        started = datetime.utcnow()
+        index = JobFeedIndex()
+        for job in await self._load({"status": {"$in": list(FEED_STATUSES)}}):
+            index.upsert(job)
+        self.index = index
+        self._synced_from = started - SYNC_OVERLAP
+        self.ready = True
+        self.rebuilds += 1
+        self.last_synced_at = started
+        logger.info(f"Job feed index built with {len(index)} jobs")
+
+    async def sync(self):
+        """Re-file every job written since the previous sync"""
+        if self._synced_from is None:
+            await self.rebuild()
+            return
+        started = datetime.utcnow()
+        jobs = await self._load({"updated_at": {"$gte": self._synced_from}})
+        for job in jobs:
+            self.index.upsert(job)
+        self._synced_from = started - SYNC_OVERLAP
+        self.syncs += 1
+        self.synced_jobs += len(jobs)
+        self.last_synced_at = started
+
+    def touch(self):
+        """Ask for a sync now; call after writing a job"""
+        if self._wake is not None:
+            self._wake.set()
+
+    def remove(self, job_id: str):
+        """Drop a job that no longer belongs in the feed"""
+        if self.index.remove(job_id):
+            self.evictions += 1
+
+    def match(self, postcodes: Optional[Iterable[str]], category: Optional[str] = None,
+              offset: int = 0, limit: int = 20,
+              after: Optional[FeedKey] = None) -> Tuple[List[str], Optional[FeedKey]]:
+        """Ranked job ids for a feed page, and the key the next page resumes from"""
+        started = time.perf_counter()
+        page = self.index.match(postcodes, category, offset, limit, after)
+        self.matches += 1
+        self.match_seconds += time.perf_counter() - started
+        return page
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Failed to sync job feed index: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.sync_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self):
+        """Start building and syncing the index"""
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the sync task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wake = None
+
+    def metrics(self) -> dict:
+        """Report index size, sync and match counters"""
+        return {
+            "ready": self.ready,
+            "jobs": len(self.index),
+            "rebuilds": self.rebuilds,
+            "syncs": self.syncs,
+            "synced_jobs": self.synced_jobs,
+            "evictions": self.evictions,
+            "matches": self.matches,
+            "avg_match_ms": round(self.match_seconds / self.matches * 1000, 4) if self.matches else 0.0,
+            "last_synced_at": self.last_synced_at
+        }
+
+
+# Global job feed
+job_feed = JobFeed(sync_interval=float(os.environ.get("JOB_FEED_SYNC_SECONDS", "2")))
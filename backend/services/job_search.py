@@ -0,0 +1,362 @@
+"""
+Full-text search over job requests.
+
+An in-process inverted index over the title, description, subcategory and
+vehicle fields of every posted (non-draft) job. Text is folded before it is
+tokenised, so Icelandic letters match their ASCII spellings in both
+directions: þ → th, ð → d, æ → ae, ö → o, and accents are dropped
+(á → a, í → i). A search for "thak" finds "þak" and "Þakviðgerð" is indexed
+as "thakvidgerd".
+
+Ranking is BM25 (k1=1.2, b=0.75) with title terms counted twice. Postings
+are flat arrays of job ordinals and precomputed length-normalised term
+weights, so a query is a handful of vectorised numpy passes: scale each
+term's weights by its idf, add them into a score per job, filter the matching
+jobs by status/category/postcode and the cursor, and partition out one page.
+``highlight`` marks the query terms in the hydrated text.
+
+The index is built on startup and kept current like the job feed: a sync
+loop re-reads jobs whose ``updated_at`` moved every JOB_SEARCH_SYNC_SECONDS.
+Re-indexed and removed jobs leave tombstones behind, and the index is
+rebuilt once they pass a quarter of its documents. Weights use the average
+document length at the time a job was indexed, which drifts little between
+rebuilds.
+"""
+
+import asyncio
+import html
+import logging
+import math
+import os
+import re
+import unicodedata
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from services.database import db_service
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "job_requests"
+
+# Fields the index reads; title is weighted double
+SEARCH_PROJECTION = {
+    "id": 1, "title": 1, "description": 1, "subcategory": 1, "vehicle_make": 1, "vehicle_model": 1,
+    "status": 1, "category": 1, "postcode": 1, "updated_at": 1
+}
+TITLE_WEIGHT = 2
+FILTER_FIELDS = ("status", "category", "postcode")
+TEXT_FIELDS = ("description", "subcategory", "vehicle_make", "vehicle_model")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Re-indexed jobs may have committed with an updated_at just before the previous sync
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# Rebuild once this share of the indexed documents are tombstones
+MAX_DEAD_RATIO = 0.25
+
+FOLDS = str.maketrans({"þ": "th", "ð": "d", "æ": "ae", "ö": "o", "ø": "o", "ß": "ss"})
+TOKEN = re.compile(r"[a-z0-9]+")
+WORD = re.compile(r"\w+")
+
+# Folded Icelandic and English words too common to rank on
+STOPWORDS = frozenset("""
+    a ad af alla allt am an and are as at be by eda eg ekki en er fra fyrir hann hja hun i in is it
+    med mer mig og of on or sem su sa th the thad thaer theirra thetta til to u um ur vid with
+""".split())
+
+
+def fold(text: str) -> str:
+    """Lowercase and fold Icelandic letters and accents to ASCII"""
+    text = text.lower().translate(FOLDS)
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+
+
+def tokenize(text: str) -> List[str]:
+    """Folded tokens of a text, stopwords included"""
+    return TOKEN.findall(fold(text))
+
+
+def query_terms(query: str) -> List[str]:
+    """Distinct searchable terms of a query, in query order"""
+    return list(dict.fromkeys(term for term in tokenize(query) if term not in STOPWORDS))
+
+
+def document_terms(job: dict) -> Counter:
+    """Term frequencies of a job's searchable text"""
+    counts = Counter()
+    if job.get("title"):
+        for term in tokenize(job["title"]):
+            counts[term] += TITLE_WEIGHT
+    for field in TEXT_FIELDS:
+        if job.get(field):
+            counts.update(tokenize(job[field]))
+    for term in STOPWORDS.intersection(counts):
+        del counts[term]
+    return counts
+
+
+def highlight(text: Optional[str], terms: Set[str], width: Optional[int] = None) -> Optional[str]:
+    """HTML-escaped text with matched words in <mark>, cut to a window around the first match"""
+    if not text:
+        return None
+    matches = [m for m in WORD.finditer(text) if terms.intersection(tokenize(m.group()))]
+    if not matches:
+        return None
+    start, end = 0, len(text)
+    if width and len(text) > width:
+        start = max(0, matches[0].start() - width // 4)
+        if start:
+            # Begin at a word boundary
+            space = text.find(" ", start)
+            start = space + 1 if 0 <= space < matches[0].start() else start
+        end = min(len(text), start + width)
+    pieces = ["…" if start else ""]
+    position = start
+    for match in matches:
+        if match.end() > end:
+            break
+        pieces.append(html.escape(text[position:match.start()]))
+        pieces.append(f"<mark>{html.escape(match.group())}</mark>")
+        position = match.end()
+    pieces.append(html.escape(text[position:end]))
+    pieces.append("…" if end < len(text) else "")
+    return "".join(pieces)
+
+
+class JobSearchIndex:
+    """Term postings over job ordinals with precomputed BM25 term weights"""
+
+    def __init__(self):
+        self._ids: List[Optional[str]] = []  # None marks a tombstone
+        self._ordinals: Dict[str, int] = {}
+        self._lengths = array("I")
+        self._alive = array("B")
+        # Filter fields as small integer codes, so filtering is vectorised
+        self._codes: Dict[str, Dict[Optional[str], int]] = {field: {} for field in FILTER_FIELDS}
+        self._columns: Dict[str, array] = {field: array("H") for field in FILTER_FIELDS}
+        # term -> (ascending job ordinals, BM25 term weights)
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._total_length = 0
+        self.dead = 0
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    @property
+    def terms(self) -> int:
+        return len(self._postings)
+
+    @property
+    def dead_ratio(self) -> float:
+        return self.dead / len(self._ids) if self._ids else 0.0
+
+    def _code(self, field: str, value: Optional[str]) -> int:
+        codes = self._codes[field]
+        if value not in codes:
+            codes[value] = len(codes)
+        return codes[value]
+
+    def upsert(self, job: dict):
+        """Index a job's current text, replacing any earlier version"""
+        self.remove(job["id"])
+        if job.get("status") in (None, "draft"):
+            return
+        counts = document_terms(job)
+        length = sum(counts.values())
+        ordinal = len(self._ids)
+        self._ids.append(job["id"])
+        self._ordinals[job["id"]] = ordinal
+        self._lengths.append(length)
+        self._alive.append(1)
+        for field in FILTER_FIELDS:
+            self._columns[field].append(self._code(field, job.get(field)))
+        self._total_length += length
+
+        average_length = self._total_length / len(self._ordinals)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length) if average_length else BM25_K1
+        for term, frequency in counts.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = (array("I"), array("f"))
+            posting[0].append(ordinal)
+            posting[1].append(frequency * (BM25_K1 + 1) / (frequency + norm))
+
+    def remove(self, job_id: str) -> bool:
+        """Tombstone a job; its postings are skipped until the next rebuild"""
+        ordinal = self._ordinals.pop(job_id, None)
+        if ordinal is None:
+            return False
+        self._ids[ordinal] = None
+        self._alive[ordinal] = 0
+        self._total_length -= self._lengths[ordinal]
+        self.dead += 1
+        return True
+
+    def _idf(self, document_frequency: int) -> float:
+        # Posting lengths still count tombstoned jobs until the next rebuild
+        documents = len(self._ordinals)
+        document_frequency = min(document_frequency, documents)
+        return math.log(1 + (documents - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def _allowed(self, field: str, values: Iterable[Optional[str]], ordinals: np.ndarray) -> np.ndarray:
+        """Mask of the jobs at ordinals with one of values in field"""
+        codes = self._codes[field]
+        wanted = np.zeros(len(codes), dtype=bool)
+        wanted[[codes[value] for value in values if value in codes]] = True
+        return wanted[np.frombuffer(self._columns[field], dtype=np.uint16)[ordinals]]
+
+    def search(self, terms: Iterable[str], limit: int = 20, after: Optional[Tuple[float, str]] = None,
+               statuses: Optional[Iterable[str]] = None, category: Optional[str] = None,
+               postcodes: Optional[Iterable[str]] = None) -> Tuple[List[Tuple[str, float]], bool]:
+        """One page of (job id, score), best first, and whether more follow
+
+        ``after`` is the (score, job id) of the previous page's last hit.
+        Ties are broken by indexing order, so pages never overlap.
+        """
+        postings = [self._postings[term] for term in terms if term in self._postings]
+        if not postings:
+            return [], False
+
+        if len(postings) == 1:
+            ordinals, weights = postings[0]
+            candidates = np.frombuffer(ordinals, dtype=np.uint32)
+            candidate_scores = np.float32(self._idf(len(ordinals))) * np.frombuffer(weights, dtype=np.float32)
+        else:
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            for ordinals, weights in postings:
+                np.add.at(scores, np.frombuffer(ordinals, dtype=np.uint32),
+                          np.float32(self._idf(len(ordinals))) * np.frombuffer(weights, dtype=np.float32))
+            candidates = np.flatnonzero(scores)
+            candidate_scores = scores[candidates]
+
+        # Filter the matching jobs only, never the whole index, most selective field first
+        filters = [("postcode", postcodes), ("category", None if category is None else [category]),
+                   ("status", statuses)]
+        for field, values in filters:
+            if values is not None:
+                keep = self._allowed(field, values, candidates)
+                candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+        if self.dead:
+            keep = np.frombuffer(self._alive, dtype=np.bool_)[candidates]
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+        if after is not None:
+            after_score, after_ordinal = np.float32(after[0]), np.int64(self._ordinals.get(after[1], -1))
+            keep = (candidate_scores < after_score) | ((candidate_scores == after_score) & (candidates > after_ordinal))
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+
+        wanted = limit + 1
+        if len(candidates) > wanted:
+            top = np.argpartition(candidate_scores, len(candidates) - wanted)[len(candidates) - wanted:]
+            # Keep every job tied with the (limit + 1)th best, then sort just those
+            tied = candidate_scores >= candidate_scores[top].min()
+            candidates, candidate_scores = candidates[tied], candidate_scores[tied]
+        order = np.lexsort((candidates, -candidate_scores))[:wanted]
+        hits = [
+            (self._ids[ordinal], score)
+            for ordinal, score in zip(candidates[order[:limit]].tolist(), candidate_scores[order[:limit]].tolist())
+        ]
+        return hits, len(order) > limit
+
+
+class JobSearch:
+    """Keeps a JobSearchIndex in step with job_requests"""
+
+    def __init__(self, sync_interval: float = 5.0):
+        self.sync_interval = sync_interval
+        self.index = JobSearchIndex()
+        self.ready = False
+        self._synced_from: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.rebuilds = 0
+        self.syncs = 0
+        self.synced_jobs = 0
+        self.searches = 0
+        self.last_synced_at: Optional[datetime] = None
+
+    async def rebuild(self):
+        """Index every posted job into a fresh index"""
+        started = datetime.utcnow()
+        index = JobSearchIndex()
+        async for job in db_service.iter_documents(COLLECTION, {"status": {"$ne": "draft"}}, SEARCH_PROJECTION):
+            index.upsert(job)
+        self.index = index
+        self._synced_from = started - SYNC_OVERLAP
+        self.ready = True
+        self.rebuilds += 1
+        self.last_synced_at = started
+        logger.info(f"Job search index built with {len(index)} jobs")
+
+    async def sync(self):
+        """Re-index every job written since the previous sync"""
+        if self._synced_from is None or self.index.dead_ratio > MAX_DEAD_RATIO:
+            await self.rebuild()
+            return
+        started = datetime.utcnow()
+        synced = 0
+        async for job in db_service.iter_documents(COLLECTION, {"updated_at": {"$gte": self._synced_from}},
+                                                   SEARCH_PROJECTION):
+            self.index.upsert(job)
+            synced += 1
+        self._synced_from = started - SYNC_OVERLAP
+        self.syncs += 1
+        self.synced_jobs += synced
+        self.last_synced_at = started
+
+    def remove(self, job_id: str):
+        """Drop a deleted job"""
+        self.index.remove(job_id)
+
+    def search(self, terms: List[str], limit: int = 20, after: Optional[Tuple[float, str]] = None,
+               **filters) -> Tuple[List[Tuple[str, float]], bool]:
+        """One ranked page of job ids; see JobSearchIndex.search"""
+        self.searches += 1
+        return self.index.search(terms, limit, after, **filters)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Failed to sync job search index: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    def start(self):
+        """Start building and syncing the index"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the sync task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def metrics(self) -> dict:
+        """Report index size, sync and search counters"""
+        return {
+            "ready": self.ready,
+            "jobs": len(self.index),
+            "terms": self.index.terms,
+            "dead_ratio": round(self.index.dead_ratio, 3),
+            "rebuilds": self.rebuilds,
+            "syncs": self.syncs,
+            "synced_jobs": self.synced_jobs,
+            "searches": self.searches,
+            "last_synced_at": self.last_synced_at
+        }
+
+
+# Global job search index
+job_search = JobSearch(sync_interval=float(os.environ.get("JOB_SEARCH_SYNC_SECONDS", "5")))
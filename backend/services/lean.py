@@ -0,0 +1,95 @@
+"""
+Lean reads that skip Beanie Document construction.
+
+Hydrating a Beanie Document runs full pydantic validation, default factories
+and Beanie's own state tracking for every document a query returns, which is
+wasted on paths that only read a few fields or copy them into a response
+model. ``find``, ``find_one`` and ``get`` return the stored documents as
+plain dicts, or as ``model_construct`` instances of ``as_model``; pass
+``validate=True`` where the stored data cannot be trusted as-is.
+``from_document`` builds a response model from a Document already in memory
+without the ``.dict()`` round trip.
+
+Constructed models are not validated: enum fields are coerced so they
+serialize cleanly, but nested models stay as dicts. ``model_construct`` runs
+in Python, so it only beats validation on models with costly validators such
+as User's EmailStr; flat response models are cheaper to build by validating
+the dict (see benchmarks/bench_hydration.py).
+"""
+
+from enum import Enum
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple, Type, TypeVar, Union, get_args, get_origin
+
+from beanie import Document
+from pydantic import BaseModel
+
+from services.database import db_service
+from services.pagination import SortSpec
+from services.projection import Projection
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def _enum_type(annotation: Any) -> Optional[Type[Enum]]:
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return annotation
+    if get_origin(annotation) is Union:
+        for arg in get_args(annotation):
+            if isinstance(arg, type) and issubclass(arg, Enum):
+                return arg
+    return None
+
+
+@lru_cache(maxsize=None)
+def _enum_fields(model: Type[BaseModel]) -> Tuple[Tuple[str, Type[Enum]], ...]:
+    fields = ((name, _enum_type(info.annotation)) for name, info in model.model_fields.items())
+    return tuple((name, enum) for name, enum in fields if enum is not None)
+
+
+def construct(model: Type[ModelT], document: dict, validate: bool = False) -> ModelT:
+    """Build a model from a stored document, validating only on request"""
+    if validate:
+        return model.model_validate(document)
+    values = {name: document[name] for name in model.model_fields if name in document}
+    for name, enum in _enum_fields(model):
+        value = values.get(name)
+        if value is not None and not isinstance(value, enum):
+            values[name] = enum(value)
+    return model.model_construct(**values)
+
+
+def from_document(model: Type[ModelT], document: BaseModel) -> ModelT:
+    """Build a response model from an in-memory Document without dumping it first"""
+    # The field values are already typed, so validating them is a fast pass
+    return model.model_validate(document.__dict__)
+
+
+async def find(document_model: Type[Document], filter_dict: Optional[dict] = None,
+               sort: Optional[SortSpec] = None, limit: int = 100, projection: Optional[Projection] = None,
+               as_model: Optional[Type[ModelT]] = None, validate: bool = False) -> List[Union[dict, ModelT]]:
+    """Query a Document's collection, returning dicts or constructed models"""
+    documents = await db_service.get_documents(
+        document_model.get_collection_name(), filter_dict, limit=limit, sort=sort, projection=projection
+    )
+    if as_model is None:
+        return documents
+    return [construct(as_model, document, validate) for document in documents]
+
+
+async def find_one(document_model: Type[Document], filter_dict: dict, projection: Optional[Projection] = None,
+                   as_model: Optional[Type[ModelT]] = None, validate: bool = False) -> Optional[Union[dict, ModelT]]:
+    """Fetch one document as a dict or a constructed model"""
+    document = await db_service.find_one(document_model.get_collection_name(), filter_dict, projection)
+    if document is None or as_model is None:
+        return document
+    return construct(as_model, document, validate)
+
+
+async def get(document_model: Type[Document], document_id: str, projection: Optional[Projection] = None,
+              as_model: Optional[Type[ModelT]] = None, validate: bool = False) -> Optional[Union[dict, ModelT]]:
+    """Fetch a document by id, through the document cache where configured"""
+    document = await db_service.get_document(document_model.get_collection_name(), document_id, projection)
+    if document is None or as_model is None:
+        return document
+    return construct(as_model, document, validate)
@@ -0,0 +1,97 @@
+"""
+Request-scoped batching loaders.
+
+A loader collects every key requested during one event-loop tick and resolves
+them together with a single ``$in`` query, memoising results for the rest of
+the request. Handlers can then ask for related documents one at a time (or
+with ``load_many``) without paying a round trip per item.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from services.database import db_service
+
+logger = logging.getLogger(__name__)
+
+# Fields needed to label users in quotes, messages and reviews; id keys legacy documents
+USER_SUMMARY_PROJECTION = {"id": 1, "profile": 1, "role": 1}
+
+
+class BatchLoader:
+    """Coalesce loads issued in the same tick into one batch call"""
+
+    def __init__(self, batch_fn: Callable[[List[Any]], Awaitable[Dict[Any, Any]]]):
+        self._batch_fn = batch_fn
+        self._cache: Dict[Any, asyncio.Future] = {}
+        self._queue: List[Any] = []
+        # The loop only holds weak references to tasks, so in-flight dispatches are kept here
+        self._dispatches: Set[asyncio.Task] = set()
+        self.batches = 0
+
+    def load(self, key: Any) -> "asyncio.Future":
+        """Get a future for one key, scheduling a batch if needed"""
+        if key in self._cache:
+            return self._cache[key]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[key] = future
+        self._queue.append(key)
+        if len(self._queue) == 1:
+            # Dispatch once everything awaiting in this tick has queued its key
+            loop.call_soon(self._start_dispatch)
+        return future
+
+    async def load_many(self, keys: Iterable[Any]) -> List[Optional[Any]]:
+        """Load several keys, returning results in input order"""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _start_dispatch(self):
+        task = asyncio.get_running_loop().create_task(self._dispatch())
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self):
+        keys, self._queue = self._queue, []
+        self.batches += 1
+        try:
+            results = await self._batch_fn(keys)
+            for key in keys:
+                future = self._cache[key]
+                if not future.done():
+                    future.set_result(results.get(key))
+        except asyncio.CancelledError:
+            for key in keys:
+                self._cache.pop(key).cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Batch load of {len(keys)} keys failed: {e}")
+            for key in keys:
+                future = self._cache.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+
+    def prime(self, key: Any, value: Any):
+        """Seed the cache with a value the handler already has"""
+        if key not in self._cache:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._cache[key] = future
+
+
+class UserLoader(BatchLoader):
+    """Batching loader for user summaries keyed by user id"""
+
+    def __init__(self, projection: Optional[dict] = None):
+        self.projection = projection or USER_SUMMARY_PROJECTION
+        super().__init__(self._load_users)
+
+    async def _load_users(self, user_ids: List[str]) -> Dict[str, dict]:
+        return await db_service.get_documents_by_ids("users", user_ids, projection=self.projection)
+
+
+async def get_user_loader() -> UserLoader:
+    """Dependency providing a fresh user loader for each request"""
+    return UserLoader()
@@ -0,0 +1,113 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is an opaque, URL-safe token holding the sort-key values of the last
+document on a page. The next page is fetched with a range filter on those
+values instead of ``skip``, so every page costs the same index walk no matter
+how deep the client has scrolled.
+
+The range filter follows MongoDB's sort order rather than plain ``$gt``/``$lt``:
+null or missing sort values come before every other value, and ``_id`` string
+uuids before legacy ObjectIds, so pages never skip or repeat those rows.
+"""
+
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from bson import ObjectId, json_util
+from pymongo import ASCENDING
+
+SortSpec = List[Tuple[str, int]]
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Types a sort-key value can have; anything else (an operator document, an array)
+# would be spliced into the range filter as a query
+CURSOR_VALUE_TYPES = (str, int, float, datetime, ObjectId)
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor that cannot be decoded"""
+
+
+def with_tiebreaker(sort: Optional[SortSpec]) -> SortSpec:
+    """Append _id to a sort so every document has a unique position"""
+    sort = list(sort or [])
+    if not sort or sort[-1][0] != "_id":
+        direction = sort[-1][1] if sort else ASCENDING
+        sort.append(("_id", direction))
+    return sort
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode sort-key values as an opaque token"""
+    raw = json_util.dumps(list(values)).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort: SortSpec) -> List[Any]:
+    """Decode a token produced by encode_cursor for the given sort"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise InvalidCursor("Invalid pagination cursor")
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise InvalidCursor("Pagination cursor does not match this listing")
+    for value in values:
+        if value is not None and (isinstance(value, bool) or not isinstance(value, CURSOR_VALUE_TYPES)):
+            raise InvalidCursor("Invalid pagination cursor")
+    return values
+
+
+def cursor_for(document: dict, sort: SortSpec) -> str:
+    """Build the cursor pointing just past a raw Mongo document"""
+    return encode_cursor([document.get(field) for field, _ in sort])
+
+
+def _after(field: str, direction: int, value: Any) -> Optional[dict]:
+    """Condition matching values of one sort key strictly after value, or None if nothing follows"""
+    ascending = direction == ASCENDING
+    if field == "_id":
+        # Legacy documents have ObjectId ids and newer ones string uuids; MongoDB sorts
+        # every string before every ObjectId but $gt/$lt only compare within one type
+        condition = {field: {"$gt" if ascending else "$lt": value}}
+        if isinstance(value, str) and ascending:
+            return {"$or": [condition, {field: {"$type": "objectId"}}]}
+        if isinstance(value, ObjectId) and not ascending:
+            return {"$or": [condition, {field: {"$type": "string"}}]}
+        return condition
+    # Null and missing values sort before every other value
+    if value is None:
+        return {field: {"$ne": None}} if ascending else None
+    if ascending:
+        return {field: {"$gt": value}}
+    return {"$or": [{field: {"$lt": value}}, {field: None}]}
+
+
+def keyset_filter(sort: SortSpec, values: Sequence[Any]) -> dict:
+    """Build the range filter selecting documents after the cursor position"""
+    # For sort (a, b, c) this is: a > va OR (a == va AND b > vb) OR ...
+    branches = []
+    for i, (field, direction) in enumerate(sort):
+        after = _after(field, direction, values[i])
+        if after is None:
+            continue
+        # A null value matches null and missing alike, as the sort treats them
+        branch = {sort[j][0]: values[j] for j in range(i)}
+        if "$or" in after:
+            branch["$or"] = after["$or"]
+        else:
+            branch.update(after)
+        branches.append(branch)
+    if not branches:
+        # Nothing sorts after the cursor
+        return {"_id": {"$exists": False}}
+    return branches[0] if len(branches) == 1 else {"$or": branches}
+
+
+def set_next_cursor(response, next_cursor: Optional[str]) -> None:
+    """Expose the next-page cursor on a list response"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,160 @@
+"""
+Materialised platform statistics.
+
+The homepage stats live in one ``platform_counters`` document that the write
+paths keep current with ``$inc`` (projects created or completed, users
+registered or deleted, reviews submitted), so reading them is a single
+document fetch instead of four collection counts and a ``$avg`` scan. Reads
+are served from memory for up to PLATFORM_STATS_MAX_STALENESS_SECONDS.
+
+Counters can drift (a crash between a write and its increment, writes made
+outside the API), so a periodic reconciliation recomputes them with the full
+scans and overwrites the document, logging any correction. It also runs once
+at startup, and a read reconciles when the document is missing a counter (a
+fresh collection where an increment upserted only its own deltas).
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Optional
+
+from services.database import db_service
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "platform_counters"
+COUNTERS_ID = "platform"
+
+COUNTER_FIELDS = ("totalProjects", "completedProjects", "verifiedProfessionals", "totalUsers",
+                  "ratingSum", "ratingCount")
+
+# Shown until the first review exists, as before
+DEFAULT_AVERAGE_RATING = 4.8
+
+
+class PlatformCounters:
+    """Incrementally maintained platform statistics"""
+
+    def __init__(self, max_staleness: float = 10.0, reconcile_interval: float = 3600.0):
+        self.max_staleness = max_staleness
+        self.reconcile_interval = reconcile_interval
+        self._cached: Optional[dict] = None
+        self._cached_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+        self.reads = 0
+        self.cached_reads = 0
+        self.reconciliations = 0
+        self.corrections = 0
+        self.last_reconciled_at: Optional[datetime] = None
+
+    async def increment(self, **deltas: float):
+        """Apply counter deltas, e.g. increment(totalProjects=1)"""
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        try:
+            await db_service.find_one_and_update(
+                COLLECTION, {"_id": COUNTERS_ID}, {"$inc": deltas}, projection={"_id": 1}, upsert=True
+            )
+        except Exception as e:
+            # A lost increment is repaired by the next reconciliation
+            logger.error(f"Failed to increment platform counters {deltas}: {e}")
+
+    async def get(self, max_staleness: Optional[float] = None) -> dict:
+        """Get platform statistics, at most max_staleness seconds old"""
+        max_staleness = self.max_staleness if max_staleness is None else max_staleness
+        if self._cached is not None and time.monotonic() - self._cached_at <= max_staleness:
+            self.cached_reads += 1
+            return self._stats(self._cached)
+
+        self.reads += 1
+        counters = await db_service.get_document(COLLECTION, COUNTERS_ID)
+        if not counters or any(field not in counters for field in COUNTER_FIELDS):
+            counters = await self.reconcile()
+        self._cached, self._cached_at = counters, time.monotonic()
+        return self._stats(counters)
+
+    def _stats(self, counters: dict) -> dict:
+        rating_count = counters.get('ratingCount', 0)
+        return {
+            'totalProjects': counters.get('totalProjects', 0),
+            'verifiedProfessionals': counters.get('verifiedProfessionals', 0),
+            'totalUsers': counters.get('totalUsers', 0),
+            'completedProjects': counters.get('completedProjects', 0),
+            'averageRating': round(counters['ratingSum'] / rating_count, 1) if rating_count else DEFAULT_AVERAGE_RATING
+        }
+
+    async def reconcile(self) -> dict:
+        """Recompute every counter from the source collections and store the result"""
+        computed = await db_service.compute_platform_stats()
+        previous = await db_service.find_one_and_update(
+            COLLECTION,
+            {"_id": COUNTERS_ID},
+            {**computed, "reconciled_at": datetime.utcnow()},
+            return_updated=False,
+            upsert=True
+        )
+        if previous:
+            drift = {
+                field: computed[field] - previous.get(field, 0)
+                for field in COUNTER_FIELDS
+                if previous.get(field, 0) != computed[field]
+            }
+            if drift:
+                self.corrections += 1
+                logger.warning(f"Platform counters drifted, corrected by {drift}")
+
+        self.reconciliations += 1
+        self.last_reconciled_at = datetime.utcnow()
+        self._cached = None
+        return computed
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Failed to reconcile platform counters: {e}")
+
+    async def start(self):
+        """Reconcile once, then start the periodic reconciliation task"""
+        if self._task is not None:
+            return
+        try:
+            await self.reconcile()
+        except Exception as e:
+            # Reads reconcile on demand while the document is incomplete
+            logger.error(f"Failed to reconcile platform counters at startup: {e}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the reconciliation task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def metrics(self) -> dict:
+        """Report read and reconciliation counters"""
+        return {
+            "reads": self.reads,
+            "cached_reads": self.cached_reads,
+            "reconciliations": self.reconciliations,
+            "corrections": self.corrections,
+            "last_reconciled_at": self.last_reconciled_at
+        }
+
+
+# Global platform counters
+platform_counters = PlatformCounters(
+    max_staleness=float(os.environ.get("PLATFORM_STATS_MAX_STALENESS_SECONDS", "10")),
+    reconcile_interval=float(os.environ.get("PLATFORM_COUNTERS_RECONCILE_SECONDS", "3600"))
+)
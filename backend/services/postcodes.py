@@ -0,0 +1,162 @@
+"""
+Icelandic postcode locations and radius lookups.
+
+Jobs, service areas and reviews only carry a postcode, so "within 20 km of
+101" is answered by turning the radius into the set of postcodes it covers
+and filtering on those with the existing postcode indexes. The bundled
+table gives an approximate centre for every Icelandic postcode (the main
+settlement; rural codes sit near the town they are served from). Postcodes
+are bucketed into a grid of GRID_CELL_KM squares, so a lookup only measures
+the distance to postcodes in the cells the radius touches.
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Query, status
+
+EARTH_RADIUS_KM = 6371.0088
+GRID_CELL_KM = 25.0
+
+# Largest radius the API accepts; covers the whole country from anywhere
+MAX_RADIUS_KM = 500.0
+DEFAULT_RADIUS_KM = 10.0
+
+# Grid coordinates are an equirectangular projection at this latitude; east-west
+# distances are off by under 7% across Iceland, covered by GRID_MARGIN
+GRID_LATITUDE = 65.0
+GRID_MARGIN = 1.1
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# postcode -> (latitude, longitude)
+POSTCODE_COORDINATES: Dict[str, Tuple[float, float]] = {
+    # Reykjavík
+    "101": (64.147, -21.940), "102": (64.132, -21.930), "103": (64.130, -21.890),
+    "104": (64.141, -21.860), "105": (64.140, -21.900), "107": (64.146, -21.960),
+    "108": (64.127, -21.870), "109": (64.108, -21.840), "110": (64.117, -21.790),
+    "111": (64.104, -21.820), "112": (64.139, -21.790), "113": (64.123, -21.750),
+    "116": (64.220, -21.750),
+    # Capital region
+    "170": (64.153, -21.990), "200": (64.112, -21.910), "201": (64.101, -21.885),
+    "203": (64.087, -21.830), "210": (64.088, -21.920), "220": (64.067, -21.950),
+    "221": (64.050, -21.980), "225": (64.100, -22.000), "270": (64.167, -21.700),
+    "271": (64.180, -21.600), "276": (64.300, -21.450),
+    # Suðurnes
+    "190": (63.980, -22.360), "230": (64.000, -22.560), "233": (63.930, -22.680),
+    "235": (63.970, -22.600), "240": (63.840, -22.430), "245": (64.040, -22.710),
+    "250": (64.070, -22.650), "260": (63.970, -22.530), "262": (63.960, -22.570),
+    # West
+    "300": (64.320, -22.080), "301": (64.350, -21.950), "310": (64.540, -21.920),
+    "311": (64.600, -21.700), "320": (64.660, -21.290), "340": (65.070, -22.730),
+    "345": (65.370, -22.920), "350": (64.920, -23.260), "355": (64.890, -23.710),
+    "356": (64.850, -23.600), "360": (64.920, -23.880), "370": (65.110, -21.770),
+    "371": (65.200, -21.800), "380": (65.450, -22.200),
+    # Westfjords
+    "400": (66.070, -23.130), "401": (66.050, -23.200), "410": (66.110, -23.120),
+    "415": (66.160, -23.250), "420": (66.030, -22.990), "425": (66.050, -23.510),
+    "430": (66.130, -23.530), "450": (65.600, -23.990), "451": (65.550, -23.900),
+    "460": (65.630, -23.820), "465": (65.690, -23.600), "470": (65.870, -23.490),
+    "471": (65.900, -23.400), "500": (65.200, -21.080), "510": (65.710, -21.680),
+    "512": (65.700, -21.700), "520": (65.690, -21.440), "524": (66.020, -21.500),
+    # Northwest
+    "530": (65.400, -20.940), "531": (65.350, -20.800), "540": (65.660, -20.280),
+    "541": (65.600, -20.200), "545": (65.830, -20.320), "550": (65.750, -19.640),
+    "551": (65.700, -19.600), "560": (65.550, -19.450), "565": (65.900, -19.410),
+    "566": (65.900, -19.300), "570": (66.050, -19.100), "580": (66.150, -18.910),
+    # Northeast
+    "600": (65.680, -18.090), "601": (65.650, -18.100), "603": (65.690, -18.120),
+    "604": (65.700, -18.150), "605": (65.650, -18.050), "606": (65.550, -18.100),
+    "607": (65.500, -18.200), "610": (65.950, -18.180), "611": (66.540, -18.000),
+    "616": (65.900, -18.100), "620": (65.970, -18.530), "621": (65.950, -18.600),
+    "625": (66.070, -18.650), "630": (66.000, -18.380), "640": (66.040, -17.340),
+    "641": (65.950, -17.300), "645": (65.700, -17.550), "650": (65.720, -17.370),
+    "660": (65.640, -16.910), "670": (66.300, -16.450), "671": (66.200, -16.400),
+    "675": (66.450, -15.950), "680": (66.200, -15.330), "681": (66.150, -15.400),
+    "685": (66.030, -14.810), "690": (65.760, -14.830),
+    # East
+    "700": (65.260, -14.400), "701": (65.300, -14.500), "710": (65.260, -14.000),
+    "715": (65.200, -13.800), "720": (65.530, -13.810), "730": (65.030, -14.220),
+    "735": (65.070, -14.020), "740": (65.150, -13.690), "750": (64.930, -14.010),
+    "755": (64.830, -13.870), "760": (64.790, -14.010), "765": (64.660, -14.280),
+    "780": (64.250, -15.210), "781": (64.300, -15.300), "785": (63.990, -16.650),
+    # South
+    "800": (63.930, -21.000), "801": (64.000, -20.900), "810": (64.000, -21.190),
+    "815": (63.860, -21.380), "816": (63.950, -21.300), "820": (63.860, -21.150),
+    "825": (63.840, -21.060), "840": (64.210, -20.730), "845": (64.130, -20.310),
+    "846": (64.100, -20.300), "850": (63.840, -20.390), "851": (63.800, -20.300),
+    "860": (63.750, -20.230), "861": (63.700, -20.100), "870": (63.420, -19.010),
+    "871": (63.450, -18.900), "880": (63.790, -18.060), "881": (63.800, -18.000),
+    "900": (63.440, -20.270),
+}
+
+
+# First postcode digit -> postal region
+POSTCODE_REGIONS: Dict[str, str] = {
+    "1": "Reykjavík", "2": "Capital region and Suðurnes", "3": "West", "4": "Westfjords",
+    "5": "Northwest", "6": "Northeast", "7": "East", "8": "South", "9": "Westman Islands",
+}
+
+
+class UnknownPostcode(ValueError):
+    """Raised for a postcode missing from the bundled table"""
+
+
+def distance_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Great-circle distance between two (latitude, longitude) points"""
+    lat_a, lon_a, lat_b, lon_b = map(math.radians, (*a, *b))
+    h = (math.sin((lat_b - lat_a) / 2) ** 2
+         + math.cos(lat_a) * math.cos(lat_b) * math.sin((lon_b - lon_a) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+class PostcodeGrid:
+    """Postcodes bucketed by location for radius lookups"""
+
+    def __init__(self, coordinates: Dict[str, Tuple[float, float]], cell_km: float = GRID_CELL_KM):
+        self.coordinates = coordinates
+        self.cell_km = cell_km
+        self._cells: Dict[Tuple[int, int], List[str]] = {}
+        for postcode, point in coordinates.items():
+            self._cells.setdefault(self._cell(point), []).append(postcode)
+
+    def _cell(self, point: Tuple[float, float]) -> Tuple[int, int]:
+        latitude, longitude = point
+        x = longitude * KM_PER_DEGREE * math.cos(math.radians(GRID_LATITUDE))
+        y = latitude * KM_PER_DEGREE
+        return math.floor(y / self.cell_km), math.floor(x / self.cell_km)
+
+    def within(self, postcode: str, radius_km: float) -> List[str]:
+        """Postcodes within radius_km of postcode, nearest first, itself included"""
+        centre = self.coordinates.get(postcode)
+        if centre is None:
+            raise UnknownPostcode(f"Unknown postcode: {postcode}")
+        row, column = self._cell(centre)
+        reach = math.ceil(radius_km * GRID_MARGIN / self.cell_km)
+        found = []
+        for cell_row in range(row - reach, row + reach + 1):
+            for cell_column in range(column - reach, column + reach + 1):
+                for candidate in self._cells.get((cell_row, cell_column), ()):
+                    distance = distance_km(centre, self.coordinates[candidate])
+                    if distance <= radius_km:
+                        found.append((distance, candidate))
+        return [candidate for _, candidate in sorted(found)]
+
+
+# Bundled Icelandic postcode grid
+postcode_grid = PostcodeGrid(POSTCODE_COORDINATES)
+
+# Postcodes a near= filter covers; None when the request has no near=
+NearPostcodes = Optional[List[str]]
+
+
+def near_postcodes(
+    near: Optional[str] = Query(None, description="Only jobs within radius_km of this postcode"),
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM, description="Radius around near, in km")
+) -> NearPostcodes:
+    """Dependency resolving near= and radius_km= to the postcodes in range"""
+    if not near:
+        return None
+    try:
+        return postcode_grid.within(near.strip(), radius_km)
+    except UnknownPostcode as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
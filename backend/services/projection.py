@@ -0,0 +1,110 @@
+"""
+Mongo projections derived from Pydantic response models.
+
+List endpoints only return the fields of their response model, so there is no
+point shipping the rest of each document over the wire and decoding it.
+``projection_for(JobRequestResponse)`` builds the matching inclusion
+projection once per model and caches it.
+
+Clients can narrow that further with a ``fields=`` sparse fieldset:
+``sparse_fields(Model)`` is a dependency that checks the requested names
+against the response model, and ``fields_projection`` turns them into the
+projection sent to Mongo.
+"""
+
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple, Type, Union
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+
+Projection = Union[Dict[str, int], Type[BaseModel]]
+
+
+@lru_cache(maxsize=None)
+def _model_projection(model: Type[BaseModel], extra: Tuple[str, ...]) -> Dict[str, int]:
+    fields = {info.alias or name for name, info in model.model_fields.items()}
+    fields.update(extra)
+    # _id is always returned; id is kept for documents still on the legacy key
+    fields.add("id")
+    return {field: 1 for field in sorted(fields)}
+
+
+def projection_for(model: Type[BaseModel], *extra: str) -> Dict[str, int]:
+    """Build an inclusion projection covering a response model's fields"""
+    return dict(_model_projection(model, tuple(sorted(extra))))
+
+
+def resolve_projection(projection: Optional[Projection]) -> Optional[Dict[str, int]]:
+    """Accept either an explicit projection or a response model class"""
+    if projection is None or isinstance(projection, dict):
+        return projection
+    return projection_for(projection)
+
+
+def apply_projection(document: dict, projection: Optional[Dict[str, int]]) -> dict:
+    """Apply an inclusion projection in process, for documents served from cache"""
+    if not projection:
+        return document
+    projected = {"_id": document["_id"]} if "_id" in document else {}
+    for field in projection:
+        source, target = document, projected
+        parts = field.split(".")
+        for part in parts[:-1]:
+            source = source.get(part) if isinstance(source, dict) else None
+            if not isinstance(source, dict):
+                break
+            target = target.setdefault(part, {})
+        else:
+            if parts[-1] in source:
+                target[parts[-1]] = source[parts[-1]]
+    return projected
+
+
+# Parsed fields= value: response model field names in model order, or None for all fields
+SparseFields = Optional[Tuple[str, ...]]
+
+
+class InvalidFields(ValueError):
+    """Raised when a fields= parameter names fields the response model lacks"""
+
+
+def parse_fields(model: Type[BaseModel], fields: Optional[str]) -> SparseFields:
+    """Check a comma-separated fields= value against a response model
+
+    The id is always included so clients can key the items they get back.
+    """
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = sorted(requested - set(model.model_fields))
+    if unknown:
+        raise InvalidFields(
+            f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(model.model_fields)}"
+        )
+    if "id" in model.model_fields:
+        requested.add("id")
+    return tuple(name for name in model.model_fields if name in requested)
+
+
+def sparse_fields(model: Type[BaseModel]) -> Callable[..., SparseFields]:
+    """Dependency parsing a fields= query parameter for a response model"""
+    def dependency(
+        fields: Optional[str] = Query(
+            None, description=f"Comma-separated {model.__name__} fields to return (default: all)"
+        )
+    ) -> SparseFields:
+        try:
+            return parse_fields(model, fields)
+        except InvalidFields as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return dependency
+
+
+def fields_projection(model: Type[BaseModel], fields: SparseFields, *extra: str) -> Dict[str, int]:
+    """Projection for a sparse fieldset, plus fields the handler itself reads"""
+    if fields is None:
+        return projection_for(model, *extra)
+    included = set(fields) | set(extra)
+    included.add("id")
+    return {field: 1 for field in sorted(included)}
@@ -0,0 +1,212 @@
+"""
+Per-request MongoDB round-trip accounting.
+
+``QueryMonitor`` is a pymongo command listener registered on the Motor client
+that DatabaseService and Beanie share, so every command is seen no matter which
+layer issued it. Motor runs commands with a copy of the caller's context, which
+lets the listener attribute each one to the HTTP request that caused it.
+
+``QueryTimingMiddleware`` opens that per-request scope and reports the totals
+as a ``Server-Timing`` header and one log line per request. Commands slower
+than SLOW_QUERY_MS are logged with their filter shape (values replaced by
+``?``), which is enough to spot a missing index without logging user data.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Commands that carry no application work
+IGNORED_COMMANDS = {"ping", "endSessions", "hello", "isMaster", "ismaster", "buildInfo", "saslStart", "saslContinue"}
+
+# Where each command keeps the filter worth logging
+FILTER_KEYS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+}
+
+
+def filter_shape(value: Any) -> Any:
+    """Replace literal values with ? while keeping field names and operators"""
+    if isinstance(value, dict):
+        return {key: filter_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)) and value and all(isinstance(item, dict) for item in value):
+        return [filter_shape(item) for item in value]
+    return "?"
+
+
+def command_shape(command_name: str, command: dict) -> Any:
+    """Extract the query shape of a command for the slow-query log"""
+    if command_name in FILTER_KEYS:
+        return filter_shape(command.get(FILTER_KEYS[command_name], {}))
+    if command_name == "aggregate":
+        return [
+            {name: filter_shape(spec) if name == "$match" else "..." for name, spec in stage.items()}
+            for stage in command.get("pipeline", [])
+        ]
+    if command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes", [])
+        return [filter_shape(statement.get("q", {})) for statement in statements[:3]]
+    return None
+
+
+def documents_returned(command_name: str, reply: dict) -> int:
+    """Count the documents a command sent back"""
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") else 0
+    return 0
+
+
+class RequestDbStats:
+    """Database work attributed to one HTTP request"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.operations = 0
+        self.documents = 0
+        self.duration_ms = 0.0
+        self.by_command: Dict[str, int] = {}
+
+    def record(self, command_name: str, documents: int, duration_ms: float):
+        # Commands of one request may finish on different executor threads
+        with self._lock:
+            self.operations += 1
+            self.documents += documents
+            self.duration_ms += duration_ms
+            self.by_command[command_name] = self.by_command.get(command_name, 0) + 1
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestDbStats]] = contextvars.ContextVar(
+    "request_db_stats", default=None
+)
+
+
+def current_request_stats() -> Optional[RequestDbStats]:
+    """Stats for the request being handled, if any"""
+    return _request_stats.get()
+
+
+class QueryMonitor(monitoring.CommandListener):
+    """Count, time and log every command sent through the Motor client"""
+
+    def __init__(self, slow_query_ms: float = 100.0):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._started: Dict[Tuple[Any, int], dict] = {}
+
+        self.operations = 0
+        self.documents = 0
+        self.failures = 0
+        self.slow_queries = 0
+        self.duration_ms = 0.0
+        self.by_command: Dict[str, int] = {}
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = event.command
+
+    def succeeded(self, event):
+        reply = event.reply if isinstance(event.reply, dict) else {}
+        self._finish(event, documents_returned(event.command_name, reply), failed=False)
+
+    def failed(self, event):
+        self._finish(event, 0, failed=True)
+
+    def _finish(self, event, documents: int, failed: bool):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        with self._lock:
+            command = self._started.pop((event.connection_id, event.request_id), {})
+            duration_ms = event.duration_micros / 1000
+            self.operations += 1
+            self.documents += documents
+            self.duration_ms += duration_ms
+            self.by_command[event.command_name] = self.by_command.get(event.command_name, 0) + 1
+            if failed:
+                self.failures += 1
+            slow = duration_ms >= self.slow_query_ms
+            if slow:
+                self.slow_queries += 1
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.record(event.command_name, documents, duration_ms)
+
+        if slow:
+            # getMore names its collection separately; other commands use their own key
+            collection = command.get("collection" if event.command_name == "getMore" else event.command_name)
+            logger.warning(
+                f"Slow query: command={event.command_name} collection={collection} "
+                f"duration_ms={duration_ms:.1f} documents={documents} failed={failed} "
+                f"shape={command_shape(event.command_name, command)}"
+            )
+
+    def metrics(self) -> dict:
+        """Report process-wide command counters"""
+        return {
+            "operations": self.operations,
+            "documents": self.documents,
+            "failures": self.failures,
+            "slow_queries": self.slow_queries,
+            "slow_query_ms": self.slow_query_ms,
+            "duration_ms": round(self.duration_ms, 1),
+            "by_command": dict(self.by_command)
+        }
+
+
+class QueryTimingMiddleware:
+    """ASGI middleware reporting each request's database work"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDbStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                timing = (
+                    f'db;dur={stats.duration_ms:.1f};desc="{stats.operations} ops, {stats.documents} docs", '
+                    f'app;dur={(time.perf_counter() - started) * 1000:.1f}'
+                )
+                headers.append((b"server-timing", timing.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            if stats.operations:
+                logger.info(
+                    f"db_usage method={scope['method']} path={scope['path']} status={status_code} "
+                    f"ops={stats.operations} docs={stats.documents} db_ms={stats.duration_ms:.1f} "
+                    f"total_ms={(time.perf_counter() - started) * 1000:.1f} commands={stats.by_command}"
+                )
+
+
+# Global listener, registered on the Motor client and configured by DatabaseService
+query_monitor = QueryMonitor()
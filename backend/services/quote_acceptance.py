@@ -0,0 +1,173 @@
+"""
+Atomic quote acceptance.
+
+Accepting a quote is three guarded writes, whatever the number of bids:
+
+1. flip the quote from pending to accepted, with ownership, status and expiry
+   all in the filter, so only one request can ever win it;
+2. claim the job, guarded on it still being open for quotes, so two different
+   quotes on one job cannot both be accepted;
+3. decline every other pending quote for the job with one update_many.
+
+On a replica set the writes share a transaction. Concurrent accepts can abort
+it with a write conflict (TransientTransactionError); it is retried a few
+times and then reported as a 409. On a standalone server a lost race on the
+job rolls the quote back to pending. The outcome is built from
+the documents the guarded updates return, so nothing is read back afterwards.
+"""
+
+import os
+from datetime import datetime
+from typing import Optional
+
+from pymongo.errors import PyMongoError
+
+from services.database import db_service
+from services.job_feed import job_feed
+
+# Job statuses that can still take an accepted quote
+ACCEPTING_JOB_STATUSES = ["open", "quoted"]
+
+# Attempts at the acceptance transaction before a write conflict is reported
+TRANSACTION_ATTEMPTS = 3
+
+
+class AcceptanceRejected(Exception):
+    """Raised when a quote cannot be accepted, carrying the HTTP status to report"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class QuoteAcceptance:
+    """Accept quotes with guarded conditional updates"""
+
+    def __init__(self, use_transactions: bool = True):
+        self.use_transactions = use_transactions
+        self.accepted = 0
+        self.lost_races = 0
+        self.transaction_retries = 0
+
+    async def accept(self, quote_id: str, customer_id: Optional[str]) -> dict:
+        """Accept a pending quote; customer_id=None skips the ownership guard (admins)"""
+        if self.use_transactions:
+            outcome = await self._accept_in_transaction(quote_id, customer_id)
+        else:
+            outcome = await self._accept(quote_id, customer_id, None)
+        self.accepted += 1
+        job_feed.touch()
+        return outcome
+
+    async def _accept_in_transaction(self, quote_id: str, customer_id: Optional[str]) -> dict:
+        for attempt in range(1, TRANSACTION_ATTEMPTS + 1):
+            try:
+                async with db_service.transaction() as session:
+                    return await self._accept(quote_id, customer_id, session)
+            except PyMongoError as e:
+                if not e.has_error_label("TransientTransactionError"):
+                    raise
+                if attempt == TRANSACTION_ATTEMPTS:
+                    self.lost_races += 1
+                    raise AcceptanceRejected(409, "Quote was modified concurrently, please retry")
+                self.transaction_retries += 1
+
+    async def _accept(self, quote_id: str, customer_id: Optional[str], session) -> dict:
+        now = datetime.utcnow()
+
+        # Quotes without an expiry never expire
+        quote_guard = {"$and": [
+            db_service.id_filter(quote_id),
+            {"status": "pending"},
+            {"$or": [{"expires_at": {"$gte": now}}, {"expires_at": None}]}
+        ]}
+        if customer_id is not None:
+            quote_guard["$and"].append({"customer_id": customer_id})
+        quote = await db_service.find_one_and_update(
+            "quotes",
+            quote_guard,
+            {"status": "accepted", "accepted_at": now, "updated_at": now},
+            projection={"job_request_id": 1, "professional_id": 1, "customer_id": 1},
+            session=session
+        )
+        if not quote:
+            raise await self._explain_rejection(quote_id, customer_id, now)
+
+        job = await db_service.find_one_and_update(
+            "job_requests",
+            {"$and": [
+                db_service.id_filter(quote["job_request_id"]),
+                {"status": {"$in": ACCEPTING_JOB_STATUSES}}
+            ]},
+            {
+                "status": "accepted",
+                "accepted_quote_id": quote_id,
+                "assigned_professional_id": quote["professional_id"],
+                "updated_at": now
+            },
+            projection={"status": 1},
+            session=session
+        )
+        if not job:
+            self.lost_races += 1
+            if session is None:
+                # No transaction to abort, so hand the quote back
+                await db_service.update_many(
+                    "quotes",
+                    {"$and": [db_service.id_filter(quote_id), {"status": "accepted", "accepted_at": now}]},
+                    {"$set": {"status": "pending", "updated_at": now}, "$unset": {"accepted_at": ""}}
+                )
+            raise AcceptanceRejected(409, "This job is no longer accepting quotes")
+
+        declined = await db_service.update_many(
+            "quotes",
+            {
+                "job_request_id": quote["job_request_id"],
+                "status": "pending",
+                "$nor": [db_service.id_filter(quote_id)]
+            },
+            {"status": "declined", "declined_at": now, "updated_at": now},
+            session=session
+        )
+
+        return {
+            "quote_id": quote_id,
+            "job_request_id": quote["job_request_id"],
+            "professional_id": quote["professional_id"],
+            "job_status": job["status"],
+            "declined_count": declined["modified"],
+            "accepted_at": now
+        }
+
+    async def _explain_rejection(self, quote_id: str, customer_id: Optional[str],
+                                 now: datetime) -> AcceptanceRejected:
+        """Work out why the guarded update matched nothing (failure path only)"""
+        quote = await db_service.get_document(
+            "quotes", quote_id, projection={"customer_id": 1, "status": 1, "expires_at": 1}
+        )
+        if not quote:
+            return AcceptanceRejected(404, "Quote not found")
+        if customer_id is not None and quote["customer_id"] != customer_id:
+            return AcceptanceRejected(403, "You can only accept quotes for your own jobs")
+        if quote.get("status") != "pending":
+            return AcceptanceRejected(400, "Can only accept pending quotes")
+        expires_at = quote.get("expires_at")
+        if expires_at is not None and expires_at < now:
+            return AcceptanceRejected(400, "Quote has expired")
+        self.lost_races += 1
+        return AcceptanceRejected(409, "Quote was modified concurrently, please retry")
+
+    def metrics(self) -> dict:
+        return {
+            "accepted": self.accepted,
+            "lost_races": self.lost_races,
+            "transaction_retries": self.transaction_retries,
+            "transactions": self.use_transactions and db_service.transactions_supported
+        }
+
+
+# Global acceptance engine
+quote_acceptance = QuoteAcceptance(
+    use_transactions=os.environ.get("QUOTE_ACCEPT_TRANSACTIONS", "true").lower() == "true"
+)
@@ -0,0 +1,99 @@
+"""
+Quote admission against a job's bid cap.
+
+A job takes at most ``max_quotes`` bids. Admission reserves a slot with one
+conditional ``find_one_and_update`` that only matches while the job is open
+and ``quotes_count`` is under the cap, so a burst of bids can never
+over-admit. Withdrawing or declining a bid gives the slot back with the
+symmetric guarded decrement. Duplicate bids are stopped by the partial unique
+index on quotes (job_request_id, professional_id).
+"""
+
+from datetime import datetime
+
+from services.database import db_service
+from services.job_feed import job_feed
+
+# Job statuses that still take new quotes
+ADMITTING_JOB_STATUSES = ["open", "quoted"]
+
+DEFAULT_MAX_QUOTES = 10
+
+
+class AdmissionRejected(Exception):
+    """Raised when a job cannot take another quote, carrying the HTTP status to report"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class QuoteAdmission:
+    """Reserve and release quote slots on job requests"""
+
+    def __init__(self):
+        self.admitted = 0
+        self.rejected_full = 0
+        self.released = 0
+
+    async def admit(self, job_request_id: str) -> dict:
+        """Reserve a quote slot, returning the job's customer_id and status"""
+        now = datetime.utcnow()
+        job = await db_service.find_one_and_update(
+            "job_requests",
+            {"$and": [
+                db_service.id_filter(job_request_id),
+                {"status": {"$in": ADMITTING_JOB_STATUSES}},
+                {"$expr": {"$lt": [
+                    {"$ifNull": ["$quotes_count", 0]},
+                    {"$ifNull": ["$max_quotes", DEFAULT_MAX_QUOTES]}
+                ]}}
+            ]},
+            # Pipeline update so the first bid also moves the job from open to quoted
+            [{"$set": {
+                "quotes_count": {"$add": [{"$ifNull": ["$quotes_count", 0]}, 1]},
+                "status": {"$cond": [{"$eq": ["$status", "open"]}, "quoted", "$status"]},
+                "updated_at": now
+            }}],
+            projection={"customer_id": 1, "status": 1}
+        )
+        if job:
+            self.admitted += 1
+            job_feed.touch()
+            return job
+        raise await self._explain_rejection(job_request_id)
+
+    async def release(self, job_request_id: str) -> bool:
+        """Give a quote slot back, never taking the count below zero"""
+        job = await db_service.find_one_and_update(
+            "job_requests",
+            {"$and": [db_service.id_filter(job_request_id), {"quotes_count": {"$gt": 0}}]},
+            {"$inc": {"quotes_count": -1}, "$set": {"updated_at": datetime.utcnow()}},
+            projection={"_id": 1}
+        )
+        if job:
+            self.released += 1
+            job_feed.touch()
+        return job is not None
+
+    async def _explain_rejection(self, job_request_id: str) -> AdmissionRejected:
+        """Work out why the slot reservation matched nothing (failure path only)"""
+        job = await db_service.get_document("job_requests", job_request_id, projection={"status": 1})
+        if not job:
+            return AdmissionRejected(404, "Job request not found")
+        if job.get("status") not in ADMITTING_JOB_STATUSES:
+            return AdmissionRejected(400, "This job is no longer accepting quotes")
+        self.rejected_full += 1
+        return AdmissionRejected(400, "Maximum number of quotes reached for this job")
+
+    def metrics(self) -> dict:
+        return {
+            "admitted": self.admitted,
+            "rejected_full": self.rejected_full,
+            "released": self.released
+        }
+
+
+# Global admission controller
+quote_admission = QuoteAdmission()
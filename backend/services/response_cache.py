@@ -0,0 +1,342 @@
+"""
+Stale-while-revalidate response cache for public read endpoints.
+
+Registered GET routes are answered from pre-encoded response bytes keyed on
+path, normalised query string and locale. An entry is fresh for its TTL and
+then served stale for a further window while a single background request
+refreshes it, so callers never wait on Mongo once a key is warm. Concurrent
+misses on one key share a single render.
+
+Entries live in a pluggable backend: ``InMemoryResponseCacheBackend`` per
+process, or ``MongoResponseCacheBackend`` so every worker shares one store
+(``RESPONSE_CACHE_BACKEND=mongo``). Write paths drop entries by tag with
+``response_cache.invalidate(tag)``.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from services.database import db_service
+from services.etag import with_etag
+
+logger = logging.getLogger(__name__)
+
+CACHE_STATUS_HEADER = b"x-cache"
+
+# Response headers that belong to one exchange and must not be replayed
+UNCACHED_HEADERS = {b"set-cookie", b"server-timing", b"date"}
+
+
+class CachedResponse:
+    """Pre-encoded response stored in the cache"""
+
+    def __init__(self, status: int, headers: List[Tuple[bytes, bytes]], body: bytes,
+                 fresh_until: float = 0.0, stale_until: float = 0.0, tags: Iterable[str] = ()):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+        self.tags = list(tags)
+
+
+class ResponseCacheBackend(ABC):
+    """Storage for cached responses"""
+
+    async def setup(self):
+        """Prepare the store once the database is connected"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, entry: CachedResponse):
+        pass
+
+    @abstractmethod
+    async def invalidate_tag(self, tag: str) -> int:
+        """Drop every entry carrying a tag, returning how many were dropped"""
+        pass
+
+
+class InMemoryResponseCacheBackend(ResponseCacheBackend):
+    """Per-process LRU store"""
+
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CachedResponse):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def invalidate_tag(self, tag: str) -> int:
+        keys = [key for key, entry in self._entries.items() if tag in entry.tags]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+
+class MongoResponseCacheBackend(ResponseCacheBackend):
+    """Store shared by every worker, expired by a TTL index"""
+
+    def __init__(self, collection: str = "response_cache"):
+        self.collection = collection
+
+    async def setup(self):
+        coll = db_service.db[self.collection]
+        await coll.create_index("purge_at", expireAfterSeconds=0)
+        await coll.create_index("tags")
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        document = await db_service.db[self.collection].find_one({"_id": key})
+        if not document:
+            return None
+        return CachedResponse(
+            status=document["status"],
+            headers=[(bytes(name), bytes(value)) for name, value in document["headers"]],
+            body=bytes(document["body"]),
+            fresh_until=document["fresh_until"],
+            stale_until=document["stale_until"],
+            tags=document.get("tags", [])
+        )
+
+    async def set(self, key: str, entry: CachedResponse):
+        await db_service.db[self.collection].replace_one({"_id": key}, {
+            "status": entry.status,
+            "headers": [[name, value] for name, value in entry.headers],
+            "body": entry.body,
+            "fresh_until": entry.fresh_until,
+            "stale_until": entry.stale_until,
+            "tags": entry.tags,
+            "purge_at": datetime.utcfromtimestamp(entry.stale_until)
+        }, upsert=True)
+
+    async def invalidate_tag(self, tag: str) -> int:
+        result = await db_service.db[self.collection].delete_many({"tags": tag})
+        return result.deleted_count
+
+
+class CacheRule:
+    """Caching policy for one route"""
+
+    def __init__(self, path: str, ttl: float, stale_ttl: float, tags: Iterable[str]):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.tags = list(tags)
+
+
+class ResponseCache:
+    """Route registry, key scheme, refresh coordination and metrics"""
+
+    def __init__(self, backend: Optional[ResponseCacheBackend] = None):
+        self.backend = backend or InMemoryResponseCacheBackend()
+        self.rules: Dict[str, CacheRule] = {}
+        self._renders: Dict[str, asyncio.Future] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.failed_refreshes = 0
+        self.invalidations = 0
+        self.backend_errors = 0
+
+    def cache_route(self, path: str, ttl: float, stale_ttl: Optional[float] = None, tags: Iterable[str] = ()):
+        """Cache GET responses of a path, serving them stale for stale_ttl after ttl"""
+        path = path.rstrip("/")
+        self.rules[path] = CacheRule(path, ttl, ttl if stale_ttl is None else stale_ttl, tags)
+
+    def rule_for(self, scope) -> Optional[CacheRule]:
+        if scope["method"] != "GET":
+            return None
+        return self.rules.get(scope["path"].rstrip("/"))
+
+    def cache_key(self, scope) -> str:
+        """Key on path, sorted query parameters and the preferred request locale"""
+        query = urlencode(sorted(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)))
+        locale = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-language":
+                locale = value.decode("latin-1").split(",")[0].split(";")[0].strip().lower()
+                break
+        return f"{scope['path'].rstrip('/')}?{query}#{locale}"
+
+    async def invalidate(self, *tags: str):
+        """Drop cached responses carrying any of the tags"""
+        for tag in tags:
+            try:
+                self.invalidations += await self.backend.invalidate_tag(tag)
+            except Exception as e:
+                self.backend_errors += 1
+                logger.error(f"Failed to invalidate response cache tag {tag}: {e}")
+
+    async def lookup(self, key: str) -> Optional[CachedResponse]:
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.error(f"Response cache lookup failed: {e}")
+            return None
+
+    async def store(self, key: str, rule: CacheRule, response: CachedResponse):
+        if response.status != 200:
+            return
+        now = time.time()
+        response.fresh_until = now + rule.ttl
+        response.stale_until = response.fresh_until + rule.stale_ttl
+        response.tags = rule.tags
+        try:
+            await self.backend.set(key, response)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.error(f"Response cache store failed: {e}")
+
+    async def render_once(self, key: str, render) -> CachedResponse:
+        """Render a missed key, sharing the result with concurrent misses"""
+        if key in self._renders:
+            response = await asyncio.shield(self._renders[key])
+            # Errors such as rate limits are specific to the caller that hit them
+            return response if response.status == 200 else await render()
+        future = asyncio.get_running_loop().create_future()
+        self._renders[key] = future
+        try:
+            response = await render()
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; don't warn about an unretrieved exception
+            future.exception()
+            raise
+        finally:
+            del self._renders[key]
+
+    def refresh_in_background(self, key: str, render):
+        """Refresh a stale key once, however many requests saw it stale"""
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                await render()
+                self.refreshes += 1
+            except Exception as e:
+                self.failed_refreshes += 1
+                logger.error(f"Response cache refresh of {key} failed: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    def metrics(self) -> dict:
+        """Report hit and refresh counters"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "routes": sorted(self.rules),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 3) if lookups else None,
+            "refreshes": self.refreshes,
+            "failed_refreshes": self.failed_refreshes,
+            "invalidations": self.invalidations,
+            "backend_errors": self.backend_errors
+        }
+
+
+class ResponseCacheMiddleware:
+    """ASGI middleware serving registered routes through the response cache"""
+
+    def __init__(self, app, cache: Optional[ResponseCache] = None):
+        self.app = app
+        self.cache = cache or response_cache
+
+    async def __call__(self, scope, receive, send):
+        rule = self.cache.rule_for(scope) if scope["type"] == "http" else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = self.cache.cache_key(scope)
+        entry = await self.cache.lookup(key)
+        now = time.time()
+        if entry is not None and entry.fresh_until > now:
+            self.cache.hits += 1
+            await self._send(send, entry, b"HIT")
+            return
+        if entry is not None and entry.stale_until > now:
+            self.cache.stale_hits += 1
+            self.cache.refresh_in_background(key, lambda: self._render_and_store(dict(scope), key, rule))
+            await self._send(send, entry, b"STALE")
+            return
+
+        self.cache.misses += 1
+        response = await self.cache.render_once(key, lambda: self._render_and_store(scope, key, rule, receive))
+        await self._send(send, response, b"MISS")
+
+    async def _render_and_store(self, scope, key: str, rule: CacheRule, receive=None) -> CachedResponse:
+        response = await self._render(scope, receive)
+        if response.status == 200:
+            # Hash once at store time so conditional hits never rehash the body
+            response.headers = with_etag(response.headers, response.body)
+        await self.cache.store(key, rule, response)
+        return response
+
+    async def _render(self, scope, receive=None) -> CachedResponse:
+        """Run the route and capture its whole response"""
+        started = {}
+        body = []
+
+        async def empty_receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                started.update(message)
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+
+        await self.app(scope, receive or empty_receive, capture)
+        headers = [(name, value) for name, value in started.get("headers", []) if name.lower() not in UNCACHED_HEADERS]
+        return CachedResponse(started.get("status", 500), headers, b"".join(body))
+
+    async def _send(self, send, response: CachedResponse, cache_status: bytes):
+        await send({
+            "type": "http.response.start",
+            "status": response.status,
+            "headers": response.headers + [(CACHE_STATUS_HEADER, cache_status)]
+        })
+        await send({"type": "http.response.body", "body": response.body})
+
+
+def _backend_from_env() -> ResponseCacheBackend:
+    backend = os.environ.get("RESPONSE_CACHE_BACKEND", "memory")
+    if backend == "mongo":
+        return MongoResponseCacheBackend()
+    if backend != "memory":
+        logger.error(f"Unknown RESPONSE_CACHE_BACKEND {backend}, using memory")
+    return InMemoryResponseCacheBackend(max_entries=int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "2000")))
+
+
+# Global response cache
+response_cache = ResponseCache(_backend_from_env())
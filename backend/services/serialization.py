@@ -0,0 +1,74 @@
+"""
+Pre-built response serializers.
+
+Routes declared with ``response_model=List[Model]`` pay for their items twice:
+once when the handler builds each model from a Mongo document, and again when
+FastAPI re-validates the returned list against the response field and walks it
+into JSON-able Python before encoding. A ``ModelListSerializer`` holds one
+compiled ``TypeAdapter`` per response type: it validates the raw documents in
+a single pass and encodes the result straight to JSON bytes in pydantic-core,
+and the handler returns those bytes as a ready ``Response`` so FastAPI skips
+its own validation and encoding. The ``response_model`` stays on the route for
+the OpenAPI schema.
+
+``for_fields`` gives the serializer for a ``fields=`` sparse fieldset: a
+model holding only the requested fields, generated and compiled once per
+fieldset, so trimmed responses also validate and encode less.
+"""
+
+from functools import lru_cache
+from typing import Any, Generic, Iterable, List, Optional, Tuple, Type, TypeVar
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter, create_model
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _response(content: bytes, response: Optional[Response]) -> Response:
+    """Wrap encoded JSON, keeping headers a handler set on its injected Response"""
+    encoded = Response(content=content, media_type=JSON_MEDIA_TYPE)
+    if response is not None:
+        for name, value in response.headers.items():
+            if name != "content-length":
+                encoded.headers[name] = value
+    return encoded
+
+
+class ModelListSerializer(Generic[ModelT]):
+    """Compiled validator and JSON encoder for a list of one response model"""
+
+    def __init__(self, model: Type[ModelT]):
+        self.model = model
+        self.adapter = TypeAdapter(List[model])
+
+    def validate(self, documents: Iterable[Any]) -> List[ModelT]:
+        """Build response models from raw documents in one pass"""
+        return self.adapter.validate_python(list(documents))
+
+    def encode(self, items: List[ModelT]) -> bytes:
+        return self.adapter.dump_json(items)
+
+    def response(self, items: List[ModelT], response: Optional[Response] = None) -> Response:
+        """Encode already-built models as the final response"""
+        return _response(self.encode(items), response)
+
+    def for_fields(self, fields: Optional[Tuple[str, ...]]) -> "ModelListSerializer":
+        """Serializer limited to a sparse fieldset, or this one when all fields are wanted"""
+        if fields is None:
+            return self
+        return _fieldset_serializer(self.model, fields)
+
+
+@lru_cache(maxsize=256)
+def _fieldset_serializer(model: Type[BaseModel], fields: Tuple[str, ...]) -> ModelListSerializer:
+    definitions = {name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields}
+    subset = create_model(f"{model.__name__}Fields", __config__=model.model_config, **definitions)
+    return ModelListSerializer(subset)
+
+
+def model_response(item: BaseModel, response: Optional[Response] = None) -> Response:
+    """Encode a single model the handler built itself as the final response"""
+    return _response(item.model_dump_json().encode(), response)
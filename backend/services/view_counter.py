@@ -0,0 +1,132 @@
+"""
+Write-coalescing view counter for job requests.
+
+Views are buffered in memory per job id and flushed periodically as a single
+unordered bulk of ``$inc`` updates, so listing and detail requests do no write
+I/O of their own. ``$inc`` also means concurrent viewers never overwrite each
+other's increments. Pending views are flushed on shutdown.
+
+A flush is never retried wholesale: with an unordered bulk most updates may
+already be applied when an error comes back. Only the updates a
+BulkWriteError lists as failed are put back for the next flush; after any
+other error (e.g. a connection lost after the server applied the batch) the
+batch is dropped, preferring an undercount to counting views twice.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from services.database import db_service
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """Buffer view increments and flush them in bulk"""
+
+    def __init__(self, collection: str = "job_requests", flush_interval: float = 5.0):
+        self.collection = collection
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+        self.flushed_views = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.retried_views = 0
+        self.lost_views = 0
+        self.last_flush_at: Optional[datetime] = None
+
+    def record(self, document_id: str, count: int = 1):
+        """Count a view without touching the database"""
+        self._pending[document_id] = self._pending.get(document_id, 0) + count
+
+    def pending_for(self, document_id: str) -> int:
+        """Views recorded for a document that are not yet flushed"""
+        return self._pending.get(document_id, 0)
+
+    async def flush(self) -> int:
+        """Write all pending increments in one unordered bulk"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            document_ids = list(batch)
+            operations = [
+                UpdateOne(db_service.id_filter(document_id), {"$inc": {"views_count": batch[document_id]}})
+                for document_id in document_ids
+            ]
+            try:
+                await db_service.bulk_write(self.collection, operations, ordered=False, invalidate_ids=document_ids)
+            except BulkWriteError as e:
+                # The rest of the batch was applied; put back only the failed updates
+                write_errors = e.details.get("writeErrors", [])
+                failed = [document_ids[error["index"]] for error in write_errors]
+                for document_id in failed:
+                    self.record(document_id, batch[document_id])
+                retried = sum(batch[document_id] for document_id in failed)
+                self.retried_views += retried
+                self.failed_flushes += 1
+                logger.error(f"Failed to flush {len(failed)} of {len(batch)} view counts, retrying them: "
+                             f"{write_errors[:3]}")
+                views = sum(batch.values()) - retried
+                self.flushed_views += views
+                return views
+            except Exception as e:
+                # Unknown how much was applied; a retry could count views twice
+                views = sum(batch.values())
+                self.lost_views += views
+                self.failed_flushes += 1
+                logger.error(f"Failed to flush {len(batch)} view counts, dropping {views} views: {e}")
+                return 0
+
+            views = sum(batch.values())
+            self.flushed_views += views
+            self.flushes += 1
+            self.last_flush_at = datetime.utcnow()
+            return views
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """Start the periodic flush task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush task and write whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def metrics(self) -> dict:
+        """Report buffer and flush counters"""
+        return {
+            "pending_documents": len(self._pending),
+            "pending_views": sum(self._pending.values()),
+            "flushed_views": self.flushed_views,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "retried_views": self.retried_views,
+            "lost_views": self.lost_views,
+            "last_flush_at": self.last_flush_at
+        }
+
+
+# Global view counter for job requests
+view_counter = ViewCounter(flush_interval=float(os.environ.get("VIEW_COUNTER_FLUSH_SECONDS", "5")))
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+# The API modules import each other from the backend directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """Point db_service at an empty in-memory database; returns the sync mongomock handle for seeding"""
+    pytest.importorskip("mongomock")
+    from services.database import db_service
+    from services.document_cache import document_cache
+    from tests.mongo import AsyncDatabase
+
+    database = AsyncDatabase()
+    monkeypatch.setattr(db_service, "db", database)
+    # Documents cached by an earlier test belong to another database
+    for collection in document_cache.metrics():
+        document_cache.invalidate_collection(collection)
+    return database.database
@@ -0,0 +1,83 @@
+"""Motor-shaped async wrappers over mongomock, so DatabaseService runs its real queries in tests"""
+
+import mongomock
+
+
+class AsyncCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, count):
+        self._cursor = self._cursor.skip(count)
+        return self
+
+    def limit(self, count):
+        self._cursor = self._cursor.limit(count)
+        return self
+
+    async def to_list(self, length):
+        documents = list(self._cursor)
+        return documents if length is None else documents[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self._cursor:
+            yield document
+
+
+class AsyncCollection:
+    """The collection calls DatabaseService makes; sessions are accepted and ignored"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.name = collection.name
+
+    def find(self, filter_dict=None, projection=None, batch_size=None, session=None):
+        return AsyncCursor(self.collection.find(filter_dict or {}, projection))
+
+    def aggregate(self, pipeline, session=None):
+        return AsyncCursor(iter(list(self.collection.aggregate(pipeline))))
+
+    async def find_one(self, filter_dict=None, projection=None, session=None):
+        return self.collection.find_one(filter_dict or {}, projection)
+
+    async def find_one_and_update(self, filter_dict, update, projection=None, session=None, **kwargs):
+        return self.collection.find_one_and_update(filter_dict, update, projection, **kwargs)
+
+    async def update_one(self, filter_dict, update, session=None, **kwargs):
+        return self.collection.update_one(filter_dict, update, **kwargs)
+
+    async def update_many(self, filter_dict, update, session=None, **kwargs):
+        return self.collection.update_many(filter_dict, update, **kwargs)
+
+    async def insert_one(self, document, session=None):
+        return self.collection.insert_one(document)
+
+    async def insert_many(self, documents, ordered=True, session=None):
+        return self.collection.insert_many(documents, ordered=ordered)
+
+    async def bulk_write(self, operations, ordered=True, session=None):
+        return self.collection.bulk_write(operations, ordered=ordered)
+
+    async def distinct(self, field, filter_dict=None, session=None):
+        return self.collection.distinct(field, filter_dict or {})
+
+    async def count_documents(self, filter_dict, session=None, **kwargs):
+        return self.collection.count_documents(filter_dict, **kwargs)
+
+
+class AsyncDatabase:
+    def __init__(self, database=None):
+        self.database = database if database is not None else mongomock.MongoClient().db
+
+    def __getitem__(self, name):
+        return AsyncCollection(self.database[name])
+
+    def __getattr__(self, name):
+        return self[name]
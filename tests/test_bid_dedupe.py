@@ -0,0 +1,71 @@
+"""Duplicate live bids are withdrawn so the unique bid index can build"""
+
+import asyncio
+
+import pytest
+
+from services.bid_dedupe import dedupe_bids, find_duplicates
+
+mongomock = pytest.importorskip("mongomock")
+
+
+class AsyncCursor:
+    def __init__(self, results):
+        self.results = list(results)
+
+    async def to_list(self, length):
+        return self.results
+
+
+class AsyncCollection:
+    """The Motor calls the tool makes, over a mongomock collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def aggregate(self, pipeline):
+        return AsyncCursor(self.collection.aggregate(pipeline))
+
+    async def update_one(self, filter_dict, update):
+        return self.collection.update_one(filter_dict, update)
+
+
+class AsyncDatabase:
+    def __init__(self, database):
+        self.quotes = AsyncCollection(database.quotes)
+        self.job_requests = AsyncCollection(database.job_requests)
+
+
+def bid(quote_id, status, submitted_at, job="job-1", professional="pro-1"):
+    return {"_id": quote_id, "job_request_id": job, "professional_id": professional,
+            "status": status, "submitted_at": submitted_at}
+
+
+@pytest.fixture
+def db():
+    database = mongomock.MongoClient().db
+    database.job_requests.insert_many([{"_id": "job-1", "quotes_count": 4}, {"_id": "job-2", "quotes_count": 2}])
+    database.quotes.insert_many([
+        # Two pending bids from one professional: the newest stays
+        bid("a", "pending", 1), bid("b", "pending", 2),
+        # An accepted bid beats a newer pending one from the same professional
+        bid("c", "accepted", 1, job="job-2"), bid("d", "pending", 2, job="job-2"),
+        # Different professional, and a bid that is no longer live
+        bid("e", "pending", 3, professional="pro-2"), bid("f", "withdrawn", 4),
+    ])
+    return database
+
+
+def test_keeps_one_live_bid_per_pair_and_releases_slots(db):
+    result = asyncio.run(dedupe_bids(AsyncDatabase(db)))
+
+    statuses = {quote["_id"]: quote["status"] for quote in db.quotes.find()}
+    assert statuses == {"a": "withdrawn", "b": "pending", "c": "accepted", "d": "withdrawn",
+                        "e": "pending", "f": "withdrawn"}
+    assert result == {"groups": 2, "withdrawn": 2, "released": 2}
+    assert {job["_id"]: job["quotes_count"] for job in db.job_requests.find()} == {"job-1": 3, "job-2": 1}
+
+
+def test_nothing_left_to_dedupe_afterwards(db):
+    asyncio.run(dedupe_bids(AsyncDatabase(db)))
+    assert asyncio.run(find_duplicates(AsyncDatabase(db))) == []
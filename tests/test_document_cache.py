@@ -0,0 +1,89 @@
+"""The document cache never stores a read that raced a write"""
+
+import asyncio
+
+import pytest
+
+import services.database as database
+from services.database import db_service
+from services.document_cache import MAX_INVALIDATION_MARKS, DocumentCache
+from tests.mongo import AsyncCollection
+
+
+@pytest.fixture
+def cache():
+    cache = DocumentCache()
+    cache.configure("jobs")
+    return cache
+
+
+def test_read_stored_when_nothing_raced(cache):
+    token = cache.begin_read()
+    cache.end_read("jobs", {"job-1": {"title": "Tap"}}, token)
+    assert cache.get("jobs", "job-1") == {"title": "Tap"}
+
+
+def test_read_that_raced_a_write_is_not_stored(cache):
+    token = cache.begin_read()
+    cache.invalidate("jobs", "job-1")
+    cache.end_read("jobs", {"job-1": {"title": "Stale"}, "job-2": {"title": "Fresh"}}, token)
+
+    assert cache.get("jobs", "job-1") is None
+    assert cache.get("jobs", "job-2") == {"title": "Fresh"}
+
+
+def test_write_before_the_read_began_does_not_block_it(cache):
+    cache.begin_read()
+    cache.invalidate("jobs", "job-1")
+    token = cache.begin_read()
+    cache.end_read("jobs", {"job-1": {"title": "Fresh"}}, token)
+    assert cache.get("jobs", "job-1") == {"title": "Fresh"}
+
+
+def test_collection_write_bumps_the_epoch_for_every_inflight_read(cache):
+    token = cache.begin_read()
+    cache.invalidate_collection("jobs")
+    cache.end_read("jobs", {"job-1": {"title": "Stale"}}, token)
+    assert cache.get("jobs", "job-1") is None
+
+    token = cache.begin_read()
+    cache.end_read("jobs", {"job-1": {"title": "Fresh"}}, token)
+    assert cache.get("jobs", "job-1") == {"title": "Fresh"}
+
+
+def test_too_many_marks_fall_back_to_an_epoch_bump(cache):
+    token = cache.begin_read()
+    for number in range(MAX_INVALIDATION_MARKS + 1):
+        cache.invalidate("jobs", f"other-{number}")
+    cache.end_read("jobs", {"job-1": {"title": "Stale"}}, token)
+    assert cache.get("jobs", "job-1") is None
+
+
+def test_marks_are_dropped_once_no_read_is_in_flight(cache):
+    token = cache.begin_read()
+    cache.invalidate("jobs", "job-1")
+    cache.end_read("jobs", {}, token)
+    assert cache._invalidated_at == {}
+
+
+def test_cached_documents_are_private_copies(cache):
+    cache.end_read("jobs", {"job-1": {"photos": []}}, cache.begin_read())
+    cache.get("jobs", "job-1")["photos"].append("leak.jpg")
+    assert cache.get("jobs", "job-1") == {"photos": []}
+
+
+def test_write_during_a_read_through_miss_is_not_hidden(mongo, cache, monkeypatch):
+    monkeypatch.setattr(database, "document_cache", cache)
+    mongo.jobs.insert_one({"_id": "job-1", "title": "Old"})
+    find_one = AsyncCollection.find_one
+
+    async def racing_find_one(self, filter_dict=None, projection=None, session=None):
+        document = await find_one(self, filter_dict, projection)
+        # Another request updates the job while this read is on the wire
+        await db_service.update_document("jobs", "job-1", {"title": "New"})
+        return document
+
+    monkeypatch.setattr(AsyncCollection, "find_one", racing_find_one)
+    assert asyncio.run(db_service.get_document("jobs", "job-1"))["title"] == "Old"
+    monkeypatch.setattr(AsyncCollection, "find_one", find_one)
+    assert asyncio.run(db_service.get_document("jobs", "job-1"))["title"] == "New"
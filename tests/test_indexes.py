@@ -0,0 +1,139 @@
+"""Declared and live indexes are compared on their options, not only their keys"""
+
+import asyncio
+
+from bson import SON
+from pymongo import ASCENDING, IndexModel
+
+from services.indexes import CollectionIndexPlan, IndexManager, declared_indexes
+
+UNIQUE_LIVE_BID = IndexModel(
+    [("job_request_id", ASCENDING), ("professional_id", ASCENDING)],
+    unique=True,
+    partialFilterExpression={"status": {"$in": ["pending", "accepted"]}}
+)
+
+
+def make_model(*indexes):
+    class Quote:
+        class Settings:
+            name = "quotes"
+
+    Quote.Settings.indexes = list(indexes)
+    return Quote
+
+
+def live_index(key, **options):
+    """An entry as index_information() reports it"""
+    return {"key": list(key), "v": 2, **options}
+
+
+class FakeCollection:
+    """Index calls of a collection; $indexStats is unavailable, as on some deployments"""
+    name = "quotes"
+
+    def __init__(self, indexes):
+        self.indexes = indexes
+
+    async def index_information(self):
+        return {"_id_": live_index([("_id", 1)]), **self.indexes}
+
+    async def drop_index(self, name):
+        del self.indexes[name]
+
+    async def create_index(self, keys, name, **options):
+        self.indexes[name] = live_index(keys, **options)
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        return self.setdefault(name, FakeCollection({}))
+
+
+def plan_for(model, live):
+    return asyncio.run(IndexManager().plan(FakeDatabase(quotes=FakeCollection(live)), [model], include_usage=False))[0]
+
+
+def test_matching_options_are_in_sync():
+    model = make_model(UNIQUE_LIVE_BID)
+    name = declared_indexes(model)[0]["name"]
+    plan = plan_for(model, {name: live_index([("job_request_id", 1), ("professional_id", 1)], unique=True,
+                                             partialFilterExpression=SON([("status", {"$in": ["pending", "accepted"]})]))})
+    assert plan.missing == [] and plan.drifted == []
+
+
+def test_changed_partial_filter_is_drift():
+    model = make_model(UNIQUE_LIVE_BID)
+    name = declared_indexes(model)[0]["name"]
+    plan = plan_for(model, {name: live_index([("job_request_id", 1), ("professional_id", 1)], unique=True,
+                                             partialFilterExpression={"status": "pending"})})
+    assert [drift for _, _, drift in plan.drifted] == [["partialFilterExpression"]]
+    assert "~" in plan.format()
+
+
+def test_unique_and_ttl_changes_are_drift():
+    model = make_model(IndexModel([("created_at", ASCENDING)], expireAfterSeconds=3600),
+                       IndexModel([("email", ASCENDING)], unique=True))
+    plan = plan_for(model, {
+        "created_at_1": live_index([("created_at", 1)], expireAfterSeconds=60),
+        "email_1": live_index([("email", 1)])
+    })
+    assert sorted(drift for _, _, drift in plan.drifted) == [["expireAfterSeconds"], ["unique"]]
+
+
+def test_explicit_false_defaults_are_not_drift():
+    plan = CollectionIndexPlan(
+        "quotes",
+        [{"name": "email_1", "key": (("email", 1),), "options": {"unique": False, "sparse": False}}],
+        [{"name": "email_1", "key": (("email", 1),), "options": {}}]
+    )
+    assert plan.drifted == []
+
+
+def test_apply_rebuilds_drifted_indexes():
+    model = make_model(UNIQUE_LIVE_BID)
+    name = declared_indexes(model)[0]["name"]
+    collection = FakeCollection({name: live_index([("job_request_id", 1), ("professional_id", 1)],
+                                                  unique=True, partialFilterExpression={"status": "pending"})})
+    db = FakeDatabase(quotes=collection)
+    manager = IndexManager()
+
+    plans = asyncio.run(manager.reconcile(db, [model], rebuild=True))
+
+    assert plans[0].drifted
+    assert collection.indexes[name]["partialFilterExpression"] == {"status": {"$in": ["pending", "accepted"]}}
+    assert asyncio.run(manager.plan(db, [model], include_usage=False))[0].drifted == []
+
+
+def test_drift_that_is_not_rebuilt_is_kept_and_left_out_of_beanie():
+    model = make_model(UNIQUE_LIVE_BID, IndexModel([("status", ASCENDING)]))
+    name = declared_indexes(model)[0]["name"]
+    live = live_index([("job_request_id", 1), ("professional_id", 1)], unique=True)
+    collection = FakeCollection({name: dict(live)})
+
+    asyncio.run(IndexManager().reconcile(FakeDatabase(quotes=collection), [model]))
+
+    assert collection.indexes[name] == live
+    assert [index.document["name"] for index in model.Settings.indexes] == ["status_1"]
+
+
+def test_failed_rebuild_restores_the_live_index():
+    model = make_model(UNIQUE_LIVE_BID)
+    name = declared_indexes(model)[0]["name"]
+    live = live_index([("job_request_id", 1), ("professional_id", 1)], unique=True)
+    collection = FakeCollection({name: dict(live)})
+    created = []
+
+    async def create_index(keys, name, **options):
+        if options.get("partialFilterExpression"):
+            raise RuntimeError("E11000 duplicate key error")
+        created.append(name)
+        collection.indexes[name] = live_index(keys, **options)
+
+    collection.create_index = create_index
+    built = asyncio.run(IndexManager().apply(FakeDatabase(quotes=collection), [plan_for(model, {name: live})],
+                                             rebuild=True))
+
+    assert built == 0
+    assert created == [name] and collection.indexes[name] == live
+    assert model.Settings.indexes == []
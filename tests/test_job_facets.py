@@ -0,0 +1,104 @@
+"""Disjunctive facet counts from one $facet aggregation"""
+
+import asyncio
+import random
+from collections import Counter
+
+import pytest
+
+import services.job_facets as job_facets_module
+from services.database import db_service
+from services.job_facets import FACETS, JobFacets
+
+CATEGORIES = ["plumbing", "electrical", "painting"]
+STATUSES = ["open", "quoted", "accepted"]
+PRIORITIES = ["low", "medium", "urgent"]
+POSTCODES = ["101", "105", "200", "600", "900"]
+
+
+def test_each_facet_ignores_only_its_own_selection():
+    selections = {"category": "plumbing", "status": "open", "postcode": "101"}
+    match, facet = JobFacets.pipeline({"status": {"$ne": "draft"}}, selections)
+
+    assert match == {"$match": {"status": {"$ne": "draft"}}}
+    stages = facet["$facet"]
+    assert stages["total"][0] == {"$match": selections}
+    assert stages["category"][0] == {"$match": {"status": "open", "postcode": "101"}}
+    assert stages["status"][0] == {"$match": {"category": "plumbing", "postcode": "101"}}
+    assert stages["priority"][0] == {"$match": selections}
+    for name, expression in FACETS.items():
+        assert stages[name][1] == {"$group": {"_id": expression, "count": {"$sum": 1}}}
+
+
+def test_shape_drops_missing_values_and_labels_regions():
+    result = {
+        "total": [{"count": 4}],
+        "category": [{"_id": "plumbing", "count": 3}, {"_id": None, "count": 1}],
+        "status": [], "priority": [],
+        "region": [{"_id": "1", "count": 4}],
+    }
+    assert JobFacets._shape(result) == {
+        "total": 4,
+        "category": [{"value": "plumbing", "count": 3, "label": None}],
+        "status": [], "priority": [],
+        "region": [{"value": "1", "count": 4, "label": "Reykjavík"}],
+    }
+    assert JobFacets._shape({"total": [], **{name: [] for name in FACETS}})["total"] == 0
+
+
+@pytest.fixture
+def jobs(mongo, monkeypatch):
+    # mongomock has no $substrCP; postcodes are ASCII digits, so $substr groups them the same
+    monkeypatch.setitem(job_facets_module.FACETS, "region", {"$substr": ["$postcode", 0, 1]})
+    rng = random.Random(25)
+    documents = [{
+        "_id": f"job-{number}", "category": rng.choice(CATEGORIES), "status": rng.choice(STATUSES + ["draft"]),
+        "priority": rng.choice(PRIORITIES), "postcode": rng.choice(POSTCODES),
+    } for number in range(300)]
+    mongo.job_requests.insert_many(documents)
+    return documents
+
+
+def expected_counts(documents, visible, selections):
+    def matches(job, skip=None):
+        return visible(job) and all(job[field] == value for field, value in selections.items() if field != skip)
+
+    counts = {"total": sum(1 for job in documents if matches(job))}
+    for name in ("category", "status", "priority"):
+        counts[name] = Counter(job[name] for job in documents if matches(job, skip=name))
+    counts["region"] = Counter(job["postcode"][0] for job in documents if matches(job))
+    return counts
+
+
+@pytest.mark.parametrize("selections", [
+    {}, {"category": "plumbing"}, {"category": "painting", "status": "open"},
+    {"priority": "urgent", "postcode": "101"}
+])
+def test_counts_are_disjunctive(jobs, selections):
+    counts = asyncio.run(JobFacets().counts({"status": {"$ne": "draft"}}, selections))
+    expected = expected_counts(jobs, lambda job: job["status"] != "draft", selections)
+
+    assert counts["total"] == expected["total"]
+    for name in FACETS:
+        assert {bucket["value"]: bucket["count"] for bucket in counts[name]} == dict(expected[name])
+        assert [bucket["count"] for bucket in counts[name]] == sorted(expected[name].values(), reverse=True)
+
+
+def test_concurrent_misses_share_one_aggregation(jobs, monkeypatch):
+    facets = JobFacets()
+    aggregate = db_service.aggregate
+
+    async def slow_aggregate(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return await aggregate(*args, **kwargs)
+
+    monkeypatch.setattr(db_service, "aggregate", slow_aggregate)
+
+    async def count_concurrently():
+        return await asyncio.gather(*(facets.counts({}, {"category": "plumbing"}) for _ in range(5)))
+
+    results = asyncio.run(count_concurrently())
+    assert all(result == results[0] for result in results)
+    assert facets.aggregations == 1
+    asyncio.run(facets.counts({}, {"category": "plumbing"}))
+    assert (facets.aggregations, facets.hits) == (1, 1)
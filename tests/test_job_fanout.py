@@ -0,0 +1,84 @@
+"""New-job fan-out addresses professionals by their API id"""
+
+import asyncio
+import uuid
+
+import pytest
+from bson import ObjectId
+
+from services.database import db_service
+from services.job_fanout import JobFanout, notification_id
+
+mongomock = pytest.importorskip("mongomock")
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Users and notifications collections behind get_documents and insert_many"""
+    database = mongomock.MongoClient().db
+
+    async def get_documents(name, filter_dict=None, limit=100, skip=0, sort=None, projection=None):
+        return [db_service._to_api(document) for document in database[name].find(filter_dict or {}, projection)]
+
+    async def insert_many(name, documents, ordered=True):
+        result = database[name].insert_many([db_service._to_db(document) for document in documents], ordered=ordered)
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+    monkeypatch.setattr(db_service, "get_documents", get_documents)
+    monkeypatch.setattr(db_service, "insert_many", insert_many)
+    # The notification body comes from a Beanie document, which needs an initialised database
+    monkeypatch.setattr(JobFanout, "_template", lambda self, job: {"job_request_id": job["id"]})
+    return database
+
+
+def professional(postcode="101", legacy=False, **fields):
+    user_id = str(uuid.uuid4())
+    document = {"role": "professional", "is_active": True, "profile": {"service_areas": [postcode]}, **fields}
+    if legacy:
+        # Created before Beanie: ObjectId _id with the API id alongside it
+        return {**document, "_id": ObjectId(), "id": user_id}, user_id
+    return {**document, "_id": user_id}, user_id
+
+
+def job(customer_id=None):
+    return {"id": str(uuid.uuid4()), "customer_id": customer_id or str(uuid.uuid4()),
+            "title": "Fix a leaking tap", "category": "plumbing", "postcode": "101"}
+
+
+def test_legacy_professionals_are_notified_under_their_api_id(db):
+    legacy, legacy_id = professional(legacy=True)
+    current, current_id = professional()
+    db.users.insert_many([legacy, current, professional(postcode="600")[0]])
+
+    sent = asyncio.run(JobFanout().fan_out(job()))
+
+    assert sent == 2
+    assert {notification["user_id"] for notification in db.notifications.find()} == {legacy_id, current_id}
+
+
+def test_a_legacy_customer_is_not_notified_about_their_own_job(db):
+    legacy, legacy_id = professional(legacy=True)
+    db.users.insert_one(legacy)
+
+    assert asyncio.run(JobFanout().fan_out(job(customer_id=legacy_id))) == 0
+    assert db.notifications.count_documents({}) == 0
+
+
+def test_fanning_a_job_out_again_skips_notifications_already_written(db):
+    professional_ids = []
+    for _ in range(7):
+        document, professional_id = professional()
+        db.users.insert_one(document)
+        professional_ids.append(professional_id)
+    new_job = job()
+    # An earlier attempt wrote the first chunk before shutdown
+    db.notifications.insert_many([
+        {"_id": notification_id(new_job["id"], professional_id), "user_id": professional_id}
+        for professional_id in professional_ids[:3]
+    ])
+
+    sent = asyncio.run(JobFanout(chunk_size=3).fan_out(new_job))
+
+    assert sent == 4
+    user_ids = [notification["user_id"] for notification in db.notifications.find()]
+    assert sorted(user_ids) == sorted(professional_ids)
@@ -0,0 +1,162 @@
+"""Ranked feed matching, cursor paging and the index-loading fallback"""
+
+import asyncio
+import random
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import server
+from auth.config import get_current_professional
+from services.database import db_service
+from services.job_feed import JobFeedIndex, is_feed_job, job_feed, rank_score
+from services.pagination import NEXT_CURSOR_HEADER
+
+NOW = datetime(2026, 6, 1, 12, 0)
+POSTCODES = ["101", "105", "200", "600"]
+CATEGORIES = ["plumbing", "electrical", "painting"]
+
+# The rest of a stored job that the feed response needs
+RESPONSE_FIELDS = {"customer_id": "customer-1", "title": "Fix a leaking tap", "description": None, "address": None,
+                   "budget_min": None, "budget_currency": "ISK", "deadline": None, "photos": [],
+                   "is_featured": False, "views_count": 0}
+
+
+def feed_job(rng, **fields):
+    return {
+        "id": str(uuid.uuid4()),
+        "category": rng.choice(CATEGORIES),
+        "postcode": rng.choice(POSTCODES),
+        "status": rng.choice(["open", "quoted"]),
+        "priority": rng.choice(["low", "medium", "high", "urgent"]),
+        # Whole days only, so many jobs tie on score and the id decides
+        "posted_at": NOW - timedelta(days=rng.randrange(5)),
+        "budget_max": None,
+        "max_quotes": 10,
+        "quotes_count": 0,
+        **fields
+    }
+
+
+@pytest.fixture
+def jobs():
+    rng = random.Random(21)
+    return [feed_job(rng) for _ in range(250)]
+
+
+@pytest.fixture
+def index(jobs):
+    index = JobFeedIndex()
+    for job in jobs:
+        index.upsert(job)
+    return index
+
+
+def expected(jobs, postcodes=None, category=None):
+    matching = [
+        job for job in jobs
+        if (postcodes is None or job["postcode"] in postcodes) and (category is None or job["category"] == category)
+    ]
+    return [job["id"] for job in sorted(matching, key=lambda job: (-rank_score(job), job["id"]))]
+
+
+def page_by_cursor(index, postcodes=None, category=None, limit=7):
+    seen, after = [], None
+    while True:
+        job_ids, after = index.match(postcodes, category, limit=limit, after=after)
+        seen.extend(job_ids)
+        if after is None:
+            return seen
+
+
+@pytest.mark.parametrize("postcodes,category", [
+    (None, None), (None, "plumbing"), (["101"], None), (["101", "200", "600"], None), (["105", "200"], "painting")
+])
+def test_cursor_pages_cover_the_ranking_once(index, jobs, postcodes, category):
+    assert page_by_cursor(index, postcodes, category) == expected(jobs, postcodes, category)
+
+
+def test_cursor_and_offset_pages_agree(index):
+    first, after = index.match(["101", "105"], limit=10)
+    assert index.match(["101", "105"], limit=10, after=after)[0] == index.match(["101", "105"], offset=10, limit=10)[0]
+    assert first == index.match(["101", "105"], limit=10)[0]
+
+
+def test_last_page_has_no_next_key(index, jobs):
+    total = len(expected(jobs, ["600"]))
+    job_ids, next_key = index.match(["600"], limit=total)
+    assert len(job_ids) == total and next_key is None
+    assert index.match(["600"], limit=total - 1)[1] is not None
+
+
+def test_resuming_after_a_job_that_left_the_feed(index, jobs):
+    first, after = index.match(None, limit=10)
+    # The cursor's own job closed before the next page was asked for
+    index.remove(first[-1])
+    assert index.match(None, limit=10, after=after)[0] == expected(jobs)[10:20]
+
+
+def test_jobs_without_a_free_slot_leave_the_feed(index, jobs):
+    job = dict(jobs[0], quotes_count=10)
+    assert not is_feed_job(job)
+    index.upsert(job)
+    assert job["id"] not in index
+
+
+@pytest.fixture
+def feed_route(monkeypatch):
+    professional = SimpleNamespace(id="pro-1", role="professional", profile=SimpleNamespace(service_areas=["101"]))
+    server.app.dependency_overrides[get_current_professional] = lambda: professional
+    monkeypatch.setattr(job_feed, "ready", True)
+    monkeypatch.setattr(job_feed, "index", JobFeedIndex())
+    yield
+    server.app.dependency_overrides.pop(get_current_professional, None)
+
+
+def get_feed(**params):
+    async def request():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/job-requests/feed", params=params)
+    return asyncio.run(request())
+
+
+def test_short_page_still_points_to_the_next_one(feed_route, monkeypatch):
+    rng = random.Random(3)
+    jobs = [feed_job(rng, postcode="101", status="open") for _ in range(5)]
+    for job in jobs:
+        job_feed.index.upsert(job)
+    ranked = expected(jobs)
+    # The best-ranked job closed after the index last synced
+    stored = {
+        job["id"]: dict(job, **RESPONSE_FIELDS, status="closed" if job["id"] == ranked[0] else "open") for job in jobs
+    }
+
+    async def get_documents_by_ids(collection, job_ids, projection=None):
+        return {job_id: stored[job_id] for job_id in job_ids}
+
+    monkeypatch.setattr(db_service, "get_documents_by_ids", get_documents_by_ids)
+    first = get_feed(limit=2)
+    assert [job["id"] for job in first.json()] == ranked[1:2]
+    second = get_feed(limit=2, cursor=first.headers[NEXT_CURSOR_HEADER])
+    assert [job["id"] for job in second.json()] == ranked[2:4]
+
+
+def test_bad_cursor_is_rejected(feed_route):
+    assert get_feed(cursor="not-a-cursor").status_code == 400
+
+
+def test_fallback_applies_the_free_slot_rule(feed_route, monkeypatch):
+    monkeypatch.setattr(job_feed, "ready", False)
+    filters = []
+
+    async def get_documents(collection, filter_dict=None, **kwargs):
+        filters.append(filter_dict)
+        return []
+
+    monkeypatch.setattr(db_service, "get_documents", get_documents)
+    assert get_feed().status_code == 200
+    assert filters[0]["$expr"] == {"$lt": [{"$ifNull": ["$quotes_count", 0]}, {"$ifNull": ["$max_quotes", 10]}]}
@@ -0,0 +1,62 @@
+"""The job detail ETag follows updated_at, so a write invalidates cached copies"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+import server
+from auth.config import current_active_user
+from services.database import db_service
+from services.projection import apply_projection, resolve_projection
+
+
+@pytest.fixture
+def job():
+    """A stored job served through a get_document that projects like MongoDB"""
+    posted_at = datetime(2026, 3, 1, 9, 0)
+    document = {
+        "_id": str(uuid.uuid4()), "customer_id": str(uuid.uuid4()), "category": "plumbing",
+        "title": "Replace leaking kitchen pipes", "description": "Water under the sink",
+        "postcode": "101", "address": "Laugavegur 1", "budget_min": None, "budget_max": None,
+        "budget_currency": "ISK", "priority": "medium", "status": "open", "posted_at": posted_at,
+        "deadline": None, "quotes_count": 0, "photos": [], "is_featured": False, "views_count": 0,
+        "created_at": posted_at, "updated_at": posted_at
+    }
+
+    async def get_document(collection, document_id, projection=None):
+        if collection != "job_requests" or document_id != document["_id"]:
+            return None
+        return db_service._to_api(apply_projection(dict(document), resolve_projection(projection)))
+
+    original = db_service.get_document
+    db_service.get_document = get_document
+    server.app.dependency_overrides[current_active_user] = lambda: None
+    yield document
+    server.app.dependency_overrides.pop(current_active_user, None)
+    db_service.get_document = original
+
+
+def fetch(job_id, headers=None):
+    async def request():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(f"/api/job-requests/{job_id}", headers=headers or {})
+    return asyncio.run(request())
+
+
+def test_etag_changes_after_a_write(job):
+    first = fetch(job["_id"])
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert fetch(job["_id"], {"If-None-Match": etag}).status_code == 304
+
+    job["title"] = "Replace leaking bathroom pipes"
+    job["updated_at"] += timedelta(minutes=5)
+
+    second = fetch(job["_id"], {"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != etag
+    assert second.json()["title"] == "Replace leaking bathroom pipes"
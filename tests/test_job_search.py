@@ -0,0 +1,136 @@
+"""BM25 ranking, Icelandic folding and paging in the job search index"""
+
+import math
+import random
+import uuid
+
+import pytest
+
+from services.job_search import (
+    BM25_B, BM25_K1, JobSearchIndex, document_terms, fold, highlight, query_terms
+)
+
+WORDS = ["pipar", "þak", "leki", "rafmagn", "gólf", "málning", "ofn", "hurð", "gluggi", "bílskúr"]
+
+
+@pytest.mark.parametrize("text,folded", [
+    ("Þakviðgerð", "thakvidgerd"), ("Æðarfugl", "aedarfugl"), ("Öryggi", "oryggi"),
+    ("Málning á íbúð", "malning a ibud"), ("Bílskúr", "bilskur")
+])
+def test_icelandic_letters_fold_to_ascii(text, folded):
+    assert fold(text) == folded
+
+
+def test_query_terms_are_folded_deduplicated_and_stopwords_dropped():
+    assert query_terms("Þak og ÞAK leki í eldhúsi") == ["thak", "leki", "eldhusi"]
+
+
+def test_ascii_query_finds_icelandic_text_and_back():
+    index = JobSearchIndex()
+    index.upsert({"id": "roof", "title": "Þakviðgerð", "description": "Leki í þaki", "status": "open"})
+    index.upsert({"id": "floor", "title": "Gólfefni", "status": "open"})
+
+    assert [job_id for job_id, _ in index.search(query_terms("thakvidgerd"))[0]] == ["roof"]
+    assert [job_id for job_id, _ in index.search(query_terms("GÓLFEFNI"))[0]] == ["floor"]
+    assert [job_id for job_id, _ in index.search(query_terms("golfefni"))[0]] == ["floor"]
+
+
+def random_jobs(count=200, seed=23):
+    rng = random.Random(seed)
+    return [{
+        "id": str(uuid.uuid4()),
+        "title": " ".join(rng.choices(WORDS, k=rng.randint(1, 3))),
+        "description": " ".join(rng.choices(WORDS, k=rng.randint(0, 12))),
+        "status": rng.choice(["open", "quoted", "closed"]),
+        "category": rng.choice(["plumbing", "electrical"]),
+        "postcode": rng.choice(["101", "200"]),
+    } for _ in range(count)]
+
+
+def reference_scores(jobs, terms):
+    """Textbook BM25, with each job normalised by the average length when it was indexed"""
+    counts = {job["id"]: document_terms(job) for job in jobs}
+    norms, total = {}, 0
+    for number, job in enumerate(jobs, 1):
+        length = sum(counts[job["id"]].values())
+        total += length
+        norms[job["id"]] = BM25_K1 * (1 - BM25_B + BM25_B * length / (total / number))
+    scores = {}
+    for term in terms:
+        frequency = sum(1 for job_counts in counts.values() if term in job_counts)
+        idf = math.log(1 + (len(jobs) - frequency + 0.5) / (frequency + 0.5))
+        for job_id, job_counts in counts.items():
+            if term in job_counts:
+                tf = job_counts[term]
+                scores[job_id] = scores.get(job_id, 0) + idf * tf * (BM25_K1 + 1) / (tf + norms[job_id])
+    return scores
+
+
+@pytest.mark.parametrize("query", ["þak", "leki rafmagn", "pipar ofn hurð gluggi"])
+def test_scores_match_textbook_bm25(query):
+    jobs = random_jobs()
+    index = JobSearchIndex()
+    for job in jobs:
+        index.upsert(job)
+    terms = query_terms(query)
+
+    hits, more = index.search(terms, limit=len(jobs))
+    expected = reference_scores(jobs, terms)
+    assert not more
+    assert {job_id for job_id, _ in hits} == set(expected)
+    for job_id, score in hits:
+        assert score == pytest.approx(expected[job_id], rel=1e-5)
+    assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+
+
+def test_title_terms_outrank_the_same_term_in_the_description():
+    index = JobSearchIndex()
+    index.upsert({"id": "body", "title": "Viðgerð", "description": "ofn", "status": "open"})
+    index.upsert({"id": "title", "title": "Ofn", "description": "viðgerð", "status": "open"})
+    assert [job_id for job_id, _ in index.search(["ofn"])[0]] == ["title", "body"]
+
+
+def test_pages_cover_every_hit_once_despite_ties():
+    jobs = random_jobs()
+    index = JobSearchIndex()
+    for job in jobs:
+        index.upsert(job)
+    terms = query_terms("leki")
+    everything = index.search(terms, limit=len(jobs))[0]
+
+    seen, after = [], None
+    while True:
+        hits, more = index.search(terms, limit=6, after=after)
+        seen.extend(hits)
+        if not more:
+            break
+        after = hits[-1][1], hits[-1][0]
+    assert seen == everything
+
+
+def test_filters_and_removed_jobs():
+    jobs = random_jobs()
+    index = JobSearchIndex()
+    for job in jobs:
+        index.upsert(job)
+    removed = jobs[0]["id"]
+    index.remove(removed)
+    by_id = {job["id"]: job for job in jobs}
+
+    hits = index.search(query_terms(" ".join(WORDS)), limit=len(jobs), statuses=["open"], category="plumbing",
+                        postcodes=["101"])[0]
+    assert hits and removed not in {job_id for job_id, _ in hits}
+    assert all((by_id[job_id]["status"], by_id[job_id]["category"], by_id[job_id]["postcode"])
+               == ("open", "plumbing", "101") for job_id, _ in hits)
+
+
+def test_drafts_are_not_indexed():
+    index = JobSearchIndex()
+    index.upsert({"id": "draft", "title": "Þak", "status": "draft"})
+    assert len(index) == 0 and index.search(["thak"]) == ([], False)
+
+
+def test_highlight_marks_folded_matches_and_escapes_the_rest():
+    text = "Leki <í> þaki yfir bílskúr"
+    assert highlight(text, {"thaki", "bilskur"}) == "Leki &lt;í&gt; <mark>þaki</mark> yfir <mark>bílskúr</mark>"
+    assert highlight(text, {"ofn"}) is None
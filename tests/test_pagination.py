@@ -0,0 +1,91 @@
+"""Keyset pagination across the id types and null sort values found in real collections"""
+
+import random
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from services.pagination import InvalidCursor, cursor_for, decode_cursor, encode_cursor, keyset_filter, with_tiebreaker
+
+mongomock = pytest.importorskip("mongomock")
+
+PAGE_SIZE = 7
+
+
+def make_collection(rows: int = 300, seed: int = 3):
+    """Legacy ObjectId and uuid string ids, with null, missing and tied sent_at values"""
+    rng = random.Random(seed)
+    collection = mongomock.MongoClient().db.messages
+    start = datetime(2026, 1, 1)
+    for number in range(rows):
+        document = {"_id": ObjectId() if number % 3 == 0 else str(uuid.uuid4()), "number": number}
+        roll = rng.random()
+        if roll < 0.15:
+            document["sent_at"] = None
+        elif roll >= 0.3:
+            # Few distinct minutes, so most rows tie on sent_at
+            document["sent_at"] = start + timedelta(minutes=rng.randrange(40))
+        collection.insert_one(document)
+    return collection
+
+
+def page_through(collection, sort):
+    sort = with_tiebreaker(sort)
+    seen, query = [], {}
+    while True:
+        page = list(collection.find(query).sort(sort).limit(PAGE_SIZE))
+        seen.extend(document["number"] for document in page)
+        if len(page) < PAGE_SIZE:
+            return seen
+        cursor = cursor_for(page[-1], sort)
+        query = keyset_filter(sort, decode_cursor(cursor, sort))
+
+
+@pytest.mark.parametrize("direction", [ASCENDING, DESCENDING])
+def test_pages_cover_mixed_id_types_and_null_sort_values_once(direction):
+    collection = make_collection()
+    expected = [document["number"] for document in collection.find().sort(with_tiebreaker([("sent_at", direction)]))]
+
+    assert page_through(collection, [("sent_at", direction)]) == expected
+
+
+@pytest.mark.parametrize("direction", [ASCENDING, DESCENDING])
+def test_pages_cover_mixed_id_types_sorted_by_id_only(direction):
+    collection = make_collection()
+    expected = [document["number"] for document in collection.find().sort("_id", direction)]
+
+    assert page_through(collection, [("_id", direction)]) == expected
+
+
+def test_rows_after_a_null_sort_value_are_its_null_ties_only():
+    sort = with_tiebreaker([("sent_at", DESCENDING)])
+    collection = mongomock.MongoClient().db.messages
+    collection.insert_many([
+        {"_id": "a", "sent_at": None},
+        {"_id": "b"},
+        {"_id": "c", "sent_at": datetime(2026, 1, 1)},
+        {"_id": ObjectId(), "sent_at": None},
+    ])
+
+    after = keyset_filter(sort, [None, "b"])
+
+    # Nulls sort last when descending, and string ids before every ObjectId
+    assert [document["_id"] for document in collection.find(after)] == ["a"]
+
+
+@pytest.mark.parametrize("values", [
+    [{"$gt": ""}, "id-1"], [["a", "b"], "id-1"], [True, "id-1"], ["id-1"], [None, None, "id-1"]
+])
+def test_cursors_that_are_not_sort_key_values_are_rejected(values):
+    sort = [("sent_at", ASCENDING), ("_id", ASCENDING)]
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor(values), sort)
+
+
+def test_scalar_cursor_values_round_trip():
+    sort = [("sent_at", ASCENDING), ("score", ASCENDING), ("_id", ASCENDING)]
+    values = [datetime(2026, 1, 1), -1.5, ObjectId()]
+    assert decode_cursor(encode_cursor(values), sort) == values
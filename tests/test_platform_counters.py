@@ -0,0 +1,69 @@
+"""Platform counters never serve a document that holds only increment deltas"""
+
+import asyncio
+
+import pytest
+
+from services.database import db_service
+from services.platform_counters import COUNTERS_ID, PlatformCounters
+
+COMPUTED = {"totalProjects": 40, "completedProjects": 12, "verifiedProfessionals": 7, "totalUsers": 300,
+            "ratingSum": 90, "ratingCount": 20}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """One platform_counters document, updated the way MongoDB applies $inc and $set"""
+    documents = {}
+
+    async def get_document(collection, document_id, projection=None):
+        document = documents.get(document_id)
+        return {**document, "id": document_id} if document else None
+
+    async def find_one_and_update(collection, filter_dict, update_dict, projection=None,
+                                  return_updated=True, upsert=False, session=None):
+        document_id = filter_dict["_id"]
+        previous = dict(documents.get(document_id, {}))
+        document = documents.setdefault(document_id, {})
+        if "$inc" in update_dict:
+            for field, delta in update_dict["$inc"].items():
+                document[field] = document.get(field, 0) + delta
+        else:
+            document.update(update_dict)
+        return dict(document) if return_updated else (previous or None)
+
+    async def compute_platform_stats():
+        return dict(COMPUTED)
+
+    monkeypatch.setattr(db_service, "get_document", get_document)
+    monkeypatch.setattr(db_service, "find_one_and_update", find_one_and_update)
+    monkeypatch.setattr(db_service, "compute_platform_stats", compute_platform_stats)
+    return documents
+
+
+def test_get_reconciles_a_document_holding_only_deltas(store):
+    counters = PlatformCounters(max_staleness=0)
+
+    async def scenario():
+        await counters.increment(totalProjects=1)
+        return await counters.get()
+
+    stats = asyncio.run(scenario())
+    assert stats["totalUsers"] == 300
+    assert stats["averageRating"] == 4.5
+    assert counters.reconciliations == 1
+
+
+def test_start_reconciles_before_serving(store):
+    counters = PlatformCounters(max_staleness=0)
+
+    async def scenario():
+        await counters.start()
+        try:
+            return await counters.get()
+        finally:
+            await counters.stop()
+
+    assert asyncio.run(scenario())["totalProjects"] == 40
+    assert store[COUNTERS_ID]["totalUsers"] == 300
+    assert counters.reconciliations == 1
@@ -0,0 +1,117 @@
+"""Guarded quote acceptance: one winner per job, and every rejection has a reason"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from services.database import db_service
+from services.quote_acceptance import TRANSACTION_ATTEMPTS, AcceptanceRejected, QuoteAcceptance
+
+FUTURE = datetime.utcnow() + timedelta(days=7)
+PAST = datetime.utcnow() - timedelta(days=1)
+
+
+def quote(quote_id, job="job-1", customer="customer-1", professional="pro-1", status="pending", **fields):
+    return {"_id": quote_id, "job_request_id": job, "customer_id": customer, "professional_id": professional,
+            "status": status, "expires_at": FUTURE, **fields}
+
+
+@pytest.fixture
+def db(mongo):
+    mongo.job_requests.insert_one({"_id": "job-1", "customer_id": "customer-1", "status": "quoted"})
+    mongo.quotes.insert_many([
+        quote("q-1"), quote("q-2", professional="pro-2"), quote("q-3", professional="pro-3"),
+    ])
+    return mongo
+
+
+def accept(quote_id, customer_id="customer-1", acceptance=None):
+    return asyncio.run((acceptance or QuoteAcceptance(use_transactions=False)).accept(quote_id, customer_id))
+
+
+def rejection(quote_id, customer_id="customer-1"):
+    with pytest.raises(AcceptanceRejected) as raised:
+        accept(quote_id, customer_id)
+    return raised.value.status_code, raised.value.detail
+
+
+def test_accepting_declines_the_other_bids(db):
+    outcome = accept("q-1")
+
+    assert outcome["declined_count"] == 2
+    assert {q["_id"]: q["status"] for q in db.quotes.find()} == {"q-1": "accepted", "q-2": "declined",
+                                                                  "q-3": "declined"}
+    job = db.job_requests.find_one({"_id": "job-1"})
+    assert (job["status"], job["accepted_quote_id"], job["assigned_professional_id"]) == ("accepted", "q-1", "pro-1")
+
+
+def test_second_quote_on_a_taken_job_is_rejected_and_handed_back(db):
+    accept("q-1")
+    db.quotes.update_one({"_id": "q-2"}, {"$set": {"status": "pending"}})
+
+    assert rejection("q-2") == (409, "This job is no longer accepting quotes")
+    assert db.quotes.find_one({"_id": "q-2"})["status"] == "pending"
+    assert db.job_requests.find_one({"_id": "job-1"})["accepted_quote_id"] == "q-1"
+
+
+def test_rejection_reasons(db):
+    db.quotes.insert_many([quote("expired", expires_at=PAST), quote("withdrawn", status="withdrawn")])
+
+    assert rejection("missing") == (404, "Quote not found")
+    assert rejection("q-1", customer_id="customer-2")[0] == 403
+    assert rejection("withdrawn") == (400, "Can only accept pending quotes")
+    assert rejection("expired") == (400, "Quote has expired")
+
+
+@pytest.mark.parametrize("fields", [{"expires_at": None}, {}])
+def test_quote_without_an_expiry_can_be_accepted(db, fields):
+    document = quote("open-ended")
+    del document["expires_at"]
+    db.quotes.insert_one({**document, **fields})
+
+    assert accept("open-ended")["quote_id"] == "open-ended"
+
+
+def test_quote_without_an_expiry_explains_its_rejection(db):
+    db.quotes.insert_one({**quote("open-ended"), "expires_at": None})
+    assert rejection("open-ended", customer_id="customer-2")[0] == 403
+
+
+def write_conflict():
+    return OperationFailure("WriteConflict", 112, {"errorLabels": ["TransientTransactionError"]})
+
+
+@pytest.fixture
+def transactions(monkeypatch):
+    """A transaction whose first attempts hit write conflicts"""
+    conflicts = []
+
+    @asynccontextmanager
+    async def transaction():
+        if conflicts:
+            conflicts.pop()
+            raise write_conflict()
+        yield None
+
+    monkeypatch.setattr(db_service, "transaction", transaction)
+    return conflicts
+
+
+def test_write_conflicts_are_retried(db, transactions):
+    transactions.extend([1] * (TRANSACTION_ATTEMPTS - 1))
+    acceptance = QuoteAcceptance(use_transactions=True)
+
+    assert accept("q-1", acceptance=acceptance)["quote_id"] == "q-1"
+    assert acceptance.transaction_retries == TRANSACTION_ATTEMPTS - 1
+
+
+def test_persistent_write_conflicts_are_a_409(db, transactions):
+    transactions.extend([1] * TRANSACTION_ATTEMPTS)
+
+    with pytest.raises(AcceptanceRejected) as raised:
+        accept("q-1", acceptance=QuoteAcceptance(use_transactions=True))
+    assert raised.value.status_code == 409
+    assert db.quotes.find_one({"_id": "q-1"})["status"] == "pending"
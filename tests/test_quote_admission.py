@@ -0,0 +1,114 @@
+"""Quote slots: a job never admits more bids than its cap, and a bid that stops being live gives its slot back"""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import server
+from auth.config import get_current_customer
+from services.database import db_service
+from services.quote_admission import AdmissionRejected, QuoteAdmission, quote_admission
+
+CUSTOMER = SimpleNamespace(id="customer-1", role="customer")
+
+
+@pytest.fixture
+def quotes(monkeypatch):
+    """Stored quotes behind the guarded updates, with slot releases recorded"""
+    stored = {"q-1": {"id": "q-1", "job_request_id": "job-1", "customer_id": CUSTOMER.id, "status": "pending"}}
+    released = []
+
+    async def find_one_and_update(collection, filter_dict, update_dict, projection=None, **kwargs):
+        clauses = filter_dict["$and"]
+        quote = next((quote for quote in stored.values() if db_service.id_filter(quote["id"]) == clauses[0]), None)
+        if quote is None or any(quote.get(field) != value for clause in clauses[1:] for field, value in clause.items()):
+            return None
+        quote.update(update_dict)
+        return dict(quote)
+
+    async def get_document(collection, document_id, projection=None):
+        return dict(stored[document_id]) if document_id in stored else None
+
+    async def release(job_request_id):
+        released.append(job_request_id)
+        return True
+
+    monkeypatch.setattr(db_service, "find_one_and_update", find_one_and_update)
+    monkeypatch.setattr(db_service, "get_document", get_document)
+    monkeypatch.setattr(quote_admission, "release", release)
+    server.app.dependency_overrides[get_current_customer] = lambda: CUSTOMER
+    yield SimpleNamespace(stored=stored, released=released)
+    server.app.dependency_overrides.pop(get_current_customer, None)
+
+
+def post(path):
+    async def request():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(f"/api{path}")
+    return asyncio.run(request())
+
+
+def test_declining_a_bid_releases_its_slot_once(quotes):
+    assert post("/quotes/q-1/decline").status_code == 200
+    assert quotes.stored["q-1"]["status"] == "declined"
+    assert quotes.released == ["job-1"]
+
+    assert post("/quotes/q-1/decline").status_code == 400
+    assert quotes.released == ["job-1"]
+
+
+def test_declining_someone_elses_bid_is_forbidden(quotes):
+    quotes.stored["q-1"]["customer_id"] = "customer-2"
+    assert post("/quotes/q-1/decline").status_code == 403
+    assert quotes.stored["q-1"]["status"] == "pending"
+    assert quotes.released == []
+
+
+@pytest.fixture
+def job(mongo):
+    mongo.job_requests.insert_one({"_id": "job-1", "customer_id": CUSTOMER.id, "status": "open", "max_quotes": 3})
+    return mongo.job_requests
+
+
+def test_bursts_never_take_more_than_the_cap(job):
+    admission = QuoteAdmission()
+
+    async def burst():
+        return await asyncio.gather(*(admission.admit("job-1") for _ in range(10)), return_exceptions=True)
+
+    outcomes = asyncio.run(burst())
+    rejections = [outcome for outcome in outcomes if isinstance(outcome, AdmissionRejected)]
+    assert len(outcomes) - len(rejections) == 3
+    assert {rejection.detail for rejection in rejections} == {"Maximum number of quotes reached for this job"}
+    assert (job.find_one()["quotes_count"], job.find_one()["status"]) == (3, "quoted")
+    assert admission.metrics() == {"admitted": 3, "rejected_full": 7, "released": 0}
+
+
+def test_released_slots_can_be_taken_again(job):
+    admission = QuoteAdmission()
+    for _ in range(3):
+        asyncio.run(admission.admit("job-1"))
+
+    assert asyncio.run(admission.release("job-1"))
+    assert asyncio.run(admission.admit("job-1"))["customer_id"] == CUSTOMER.id
+    assert job.find_one()["quotes_count"] == 3
+
+
+def test_release_never_goes_below_zero(job):
+    admission = QuoteAdmission()
+    assert not asyncio.run(admission.release("job-1"))
+    assert "quotes_count" not in job.find_one() and admission.released == 0
+
+
+@pytest.mark.parametrize("job_id,status,detail", [
+    ("missing", "open", "Job request not found"),
+    ("job-1", "accepted", "This job is no longer accepting quotes"),
+])
+def test_admission_rejection_reasons(job, job_id, status, detail):
+    job.update_one({"_id": "job-1"}, {"$set": {"status": status}})
+    with pytest.raises(AdmissionRejected) as raised:
+        asyncio.run(QuoteAdmission().admit(job_id))
+    assert raised.value.detail == detail
@@ -0,0 +1,57 @@
+"""Batch user summaries only show people the caller deals with"""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import server
+from auth.config import current_active_user
+
+CUSTOMER = SimpleNamespace(id="customer-1", role="customer")
+
+
+def user(user_id, role="professional"):
+    return {"_id": user_id, "role": role, "profile": {"first_name": user_id, "last_name": "Jónsson"}}
+
+
+@pytest.fixture
+def db(mongo):
+    mongo.users.insert_many([user("customer-1", "customer"), user("quoted"), user("assigned"),
+                             user("messaged"), user("stranger")])
+    mongo.quotes.insert_one({"_id": "q-1", "customer_id": "customer-1", "professional_id": "quoted"})
+    mongo.job_requests.insert_one({"_id": "job-1", "customer_id": "customer-1", "assigned_professional_id": "assigned"})
+    mongo.job_messages.insert_one({"_id": "m-1", "sender_id": "messaged", "recipient_id": "customer-1"})
+    yield mongo
+    server.app.dependency_overrides.pop(current_active_user, None)
+
+
+def get_batch(caller, ids):
+    server.app.dependency_overrides[current_active_user] = lambda: caller
+
+    async def request():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/users/batch", params={"ids": ",".join(ids)})
+    response = asyncio.run(request())
+    assert response.status_code == 200
+    return {item["id"]: item["status"] for item in response.json()}
+
+
+IDS = ["customer-1", "quoted", "assigned", "messaged", "stranger", "missing"]
+
+
+def test_only_related_users_are_returned(db):
+    assert get_batch(CUSTOMER, IDS) == {"customer-1": 200, "quoted": 200, "assigned": 200, "messaged": 200,
+                                        "stranger": 403, "missing": 404}
+
+
+def test_the_relationship_holds_both_ways(db):
+    professional = SimpleNamespace(id="quoted", role="professional")
+    assert get_batch(professional, ["customer-1", "messaged"]) == {"customer-1": 200, "messaged": 403}
+
+
+def test_admins_see_everyone(db):
+    admin = SimpleNamespace(id="admin-1", role="admin")
+    assert get_batch(admin, IDS) == {**{user_id: 200 for user_id in IDS}, "missing": 404}
@@ -0,0 +1,59 @@
+"""A failed view flush never counts the same views twice"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from services.database import db_service
+from services.view_counter import ViewCounter
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """Bulk writes sent by the counter, failing with the next queued error"""
+    sent, errors = [], []
+
+    async def bulk_write(collection, operations, ordered=True, invalidate_ids=None):
+        sent.append(list(invalidate_ids))
+        if errors:
+            raise errors.pop(0)
+        return {"matched": len(operations), "modified": len(operations)}
+
+    monkeypatch.setattr(db_service, "bulk_write", bulk_write)
+    return SimpleNamespace(sent=sent, errors=errors)
+
+
+def counter_with_views():
+    counter = ViewCounter()
+    counter.record("job-a", 3)
+    counter.record("job-b", 2)
+    counter.record("job-c", 1)
+    return counter
+
+
+def test_only_the_failed_updates_are_retried(writes):
+    writes.errors.append(BulkWriteError({
+        "writeErrors": [{"index": 1, "code": 9, "errmsg": "failed"}], "nMatched": 2, "nModified": 2
+    }))
+    counter = counter_with_views()
+
+    assert asyncio.run(counter.flush()) == 4
+    assert counter.pending_for("job-a") == 0 and counter.pending_for("job-c") == 0
+    assert counter.pending_for("job-b") == 2
+
+    assert asyncio.run(counter.flush()) == 2
+    assert writes.sent[-1] == ["job-b"]
+    assert counter.metrics()["flushed_views"] == 6
+
+
+def test_an_unknown_outcome_is_dropped_rather_than_counted_twice(writes):
+    writes.errors.append(AutoReconnect("connection closed"))
+    counter = counter_with_views()
+
+    assert asyncio.run(counter.flush()) == 0
+    assert counter.metrics()["pending_views"] == 0
+    assert counter.metrics()["lost_views"] == 6
+    assert asyncio.run(counter.flush()) == 0
+    assert len(writes.sent) == 1